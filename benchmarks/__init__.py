@@ -0,0 +1 @@
+"""Benchmark runners for ingestion and serving performance"""
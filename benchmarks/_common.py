@@ -0,0 +1,24 @@
+"""Helpers shared by the benchmark runners"""
+import os
+import platform
+import subprocess
+from typing import Any, Dict, Optional
+
+
+def git_commit() -> Optional[str]:
+    """Short hash of the checked-out commit, None outside a git checkout"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return None
+
+
+def host_info() -> Dict[str, Any]:
+    """Platform, Python version and CPU count recorded with each report"""
+    return {
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+    }
@@ -0,0 +1,248 @@
+"""
+Benchmark the corpus loaders against the same parquet file.
+
+Every loader runs in a fresh spawned process per trial so that peak RSS and
+import costs are not shared between loaders. Each trial reports throughput
+(rows/sec), time to first batch and peak RSS; the results are written to a
+JSON file tagged with the current git commit so runs can be compared.
+
+Usage (from the project root):
+    python -m benchmarks.corpus_loading --subsets 10000 100000 all
+    python -m benchmarks.corpus_loading --loaders polars arrow --repeat 3
+"""
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import platform
+import resource
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from benchmarks._common import git_commit, host_info
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CORPUS = "data/corpus/dataset.parquet"
+DEFAULT_OUTPUT_DIR = Path("data/benchmarks")
+
+### === LOADERS === ###
+# Each entry imports its dependencies and returns a zero-argument callable that
+# starts loading. Imports happen before the clock starts, so a trial measures
+# loading only; each trial process still only imports what its loader needs.
+LoaderFactory = Callable[[str], Callable[[], Iterator[Any]]]
+
+def _polars_streaming(path: str) -> Callable[[], Iterator[Any]]:
+    from data_processing.loading_corpus import load_corpus_polars
+    return lambda: load_corpus_polars(path)
+
+def _polars_slices(path: str) -> Callable[[], Iterator[Any]]:
+    from data_processing.generate_phrases import load_corpus
+    return lambda: iter(load_corpus(path))
+
+def _data_processor(path: str) -> Callable[[], Iterator[Any]]:
+    from core.clients.elasticsearch.data_processor import DataProcessor
+    from core.search_api.settings import Settings
+    processor = DataProcessor(Settings(), path)
+    return lambda: (doc for batch in processor.process_batches() for doc in batch)
+
+def _arrow_batches(path: str) -> Callable[[], Iterator[Any]]:
+    from data_processing.loading_corpus import load_corpus_arrow
+    return lambda: load_corpus_arrow(path)
+
+def _arrow_multiprocessing(path: str) -> Callable[[], Iterator[Any]]:
+    from data_processing.loading_corpus import load_corpus_multiprocessing
+    return lambda: load_corpus_multiprocessing(path)
+
+def _dask(path: str) -> Callable[[], Iterator[Any]]:
+    from data_processing.loading_corpus import load_corpus_dask
+    return lambda: load_corpus_dask(path)
+
+def _ray(path: str) -> Callable[[], Iterator[Any]]:
+    import ray
+    from data_processing.loading_corpus import load_corpus_parallel
+
+    def run() -> Iterator[Any]:
+        # Cluster startup is part of what a Ray ingestion job pays, so it is timed
+        ray.init(ignore_reinit_error=True, include_dashboard=False, log_to_driver=False)
+        try:
+            yield from load_corpus_parallel(path)
+        finally:
+            ray.shutdown()
+    return run
+
+LOADERS: Dict[str, LoaderFactory] = {
+    "polars": _polars_streaming,
+    "polars_slices": _polars_slices,
+    "data_processor": _data_processor,
+    "arrow": _arrow_batches,
+    "arrow_mp": _arrow_multiprocessing,
+    "dask": _dask,
+    "ray": _ray,
+}
+
+### === MEASUREMENT === ###
+def _max_rss_mb(who: int) -> float:
+    """Peak resident set size in MB (ru_maxrss is KB on Linux, bytes on macOS)"""
+    max_rss = resource.getrusage(who).ru_maxrss
+    divisor = 1024 * 1024 if platform.system() == "Darwin" else 1024
+    return max_rss / divisor
+
+def _run_trial(loader_name: str, corpus_path: str, queue: mp.Queue) -> None:
+    """Child process: consume one loader completely and report its measurements."""
+    rows = 0
+    time_to_first = None
+    try:
+        load = LOADERS[loader_name](corpus_path)
+        baseline_rss_mb = _max_rss_mb(resource.RUSAGE_SELF)
+        start = time.perf_counter()
+        for _ in load():
+            if time_to_first is None:
+                time_to_first = time.perf_counter() - start
+            rows += 1
+    except Exception as e:
+        queue.put({"error": f"{type(e).__name__}: {e}"})
+        return
+
+    elapsed = time.perf_counter() - start
+    queue.put({
+        "rows": rows,
+        "seconds": round(elapsed, 4),
+        "rows_per_sec": round(rows / elapsed, 1) if elapsed > 0 else None,
+        "time_to_first_batch_s": round(time_to_first, 4) if time_to_first is not None else None,
+        "baseline_rss_mb": round(baseline_rss_mb, 1),
+        "peak_rss_mb": round(_max_rss_mb(resource.RUSAGE_SELF), 1),
+        # Largest waited-for child (multiprocessing workers). Ray workers are
+        # started by the raylet, not by this process, and are not included.
+        "peak_child_rss_mb": round(_max_rss_mb(resource.RUSAGE_CHILDREN), 1),
+    })
+
+def run_trial(loader_name: str, corpus_path: str, timeout: float) -> Dict[str, Any]:
+    """Run a single loader in a fresh spawned process"""
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_run_trial, args=(loader_name, corpus_path, queue))
+    process.start()
+    try:
+        result = queue.get(timeout=timeout)
+    except Exception:
+        process.terminate()
+        result = {"error": f"timed out after {timeout:.0f}s"}
+    process.join()
+    return result
+
+### === SUBSETS === ###
+def write_subset(corpus_path: str, rows: int, output_dir: Path) -> Path:
+    """Write the first `rows` rows of the corpus, keeping its row group size."""
+    parquet_file = pq.ParquetFile(corpus_path)
+    row_group_size = parquet_file.metadata.row_group(0).num_rows if parquet_file.num_row_groups else rows
+
+    batches = []
+    remaining = rows
+    for batch in parquet_file.iter_batches(batch_size=min(rows, 65_536)):
+        batches.append(batch.slice(0, remaining))
+        remaining -= batches[-1].num_rows
+        if remaining <= 0:
+            break
+
+    path = output_dir / f"subset-{rows}.parquet"
+    table = pa.Table.from_batches(batches, schema=parquet_file.schema_arrow)
+    pq.write_table(table, path, row_group_size=row_group_size)
+    return path
+
+def run_benchmark(
+    corpus_path: str,
+    loaders: List[str],
+    subsets: List[Optional[int]],
+    repeat: int = 1,
+    timeout: float = 3600.0
+) -> Dict[str, Any]:
+    """
+    Run every loader on every subset of the corpus.
+
+    Args:
+        corpus_path: Source parquet file
+        loaders: Names of loaders from LOADERS
+        subsets: Row counts to benchmark; None means the full file
+        repeat: Number of trials per loader and subset
+        timeout: Per-trial timeout in seconds
+
+    Returns:
+        Benchmark report ready to be serialized as JSON
+    """
+    total_rows = pq.ParquetFile(corpus_path).metadata.num_rows
+    results = []
+
+    with tempfile.TemporaryDirectory(prefix="corpus-bench-") as tmp_dir:
+        for subset in subsets:
+            if subset is not None and subset >= total_rows:
+                subset = None
+            path = corpus_path if subset is None else str(write_subset(corpus_path, subset, Path(tmp_dir)))
+            subset_rows = total_rows if subset is None else subset
+
+            for loader_name in loaders:
+                for trial in range(repeat):
+                    logger.info(f"Running {loader_name} on {subset_rows} rows (trial {trial + 1}/{repeat})")
+                    result = run_trial(loader_name, path, timeout)
+                    results.append({
+                        "loader": loader_name,
+                        "subset_rows": subset_rows,
+                        "trial": trial,
+                        **result,
+                    })
+                    if "error" in result:
+                        logger.error(f"{loader_name} failed: {result['error']}")
+                    else:
+                        logger.info(
+                            f"{loader_name}: {result['rows_per_sec']} rows/s, "
+                            f"first batch {result['time_to_first_batch_s']}s, "
+                            f"peak RSS {result['peak_rss_mb']} MB"
+                        )
+
+    return {
+        "benchmark": "corpus_loading",
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "host": host_info(),
+        "corpus": {"path": corpus_path, "rows": total_rows},
+        "results": results,
+    }
+
+def _parse_subset(value: str) -> Optional[int]:
+    return None if value == "all" else int(value)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark corpus loaders on the same parquet file")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Parquet file to load")
+    parser.add_argument(
+        "--loaders", nargs="+", choices=sorted(LOADERS), default=list(LOADERS),
+        help="Loaders to benchmark (default: all)"
+    )
+    parser.add_argument(
+        "--subsets", nargs="+", type=_parse_subset, default=[None],
+        help="Row counts to benchmark, or 'all' for the full file"
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="Trials per loader and subset")
+    parser.add_argument("--timeout", type=float, default=3600.0, help="Per-trial timeout in seconds")
+    parser.add_argument("--output", default=None, help="JSON output path")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.corpus, args.loaders, args.subsets, args.repeat, args.timeout)
+
+    output = Path(args.output) if args.output else (
+        DEFAULT_OUTPUT_DIR / f"corpus_loading-{report['commit'] or 'unknown'}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Wrote results to {output}")
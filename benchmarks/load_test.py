@@ -0,0 +1,520 @@
+"""
+Query-replay load generator for the search service.
+
+Replays a query file against a running service, or against an in-process copy
+of the FastAPI app wired to fake Elasticsearch/Redis backends with configurable
+latency, and reports latency percentiles, throughput, error rate and cache hit
+ratio. Optional thresholds turn a run into a pass/fail regression gate.
+
+Two load models are supported:
+    --qps N          open loop: requests start on a fixed schedule; latency is
+                     measured from the scheduled start, so a slow server is not
+                     hidden by the generator backing off (coordinated omission)
+    --concurrency N  closed loop: N workers each send the next query as soon
+                     as the previous one completes
+
+With --endpoint batch each request carries --batch-size queries to
+POST /api/search/batch; the report then also gives the query throughput.
+With --endpoint stream (POST /api/search/stream) it also gives the latency
+to the first result event, the delay a UI perceives.
+
+Usage (from the project root):
+    python -m benchmarks.load_test --queries data/processed/queries.json --qps 100 --duration 60
+    python -m benchmarks.load_test --queries data/processed/queries.json --in-process \\
+        --concurrency 32 --requests 5000 --es-latency-ms 15 --es-jitter-ms 10 --max-p99-ms 250
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import random
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import aiohttp
+import numpy as np
+
+from benchmarks._common import git_commit
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERIES = "data/processed/queries.json"
+
+### === QUERY FILES === ###
+def load_queries(path: str) -> List[str]:
+    """
+    Load queries from a file.
+
+    Supports `queries.json` from prepare_queries.py (qid -> query mapping or a
+    list), JSON lines (strings or objects with a "query" or "q" field), TSV
+    (query in the last column, as in queries.doctrain.tsv) and plain text.
+    """
+    file_path = Path(path)
+    if file_path.suffix == ".json":
+        with open(file_path, encoding="utf8") as f:
+            data = json.load(f)
+        return list(data.values()) if isinstance(data, dict) else list(data)
+
+    queries = []
+    with open(file_path, encoding="utf8") as f:
+        if file_path.suffix == ".tsv":
+            return [row[-1] for row in csv.reader(f, delimiter="\t") if row]
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if file_path.suffix == ".jsonl":
+                item = json.loads(line)
+                line = item if isinstance(item, str) else item.get("query") or item.get("q")
+            if line:
+                queries.append(line)
+    return queries
+
+### === IN-PROCESS SERVICE === ###
+class InProcessService:
+    """Runs the FastAPI app with fake backends on a local port in a background thread"""
+
+    def __init__(
+        self,
+        es_latency_ms: float = 10.0,
+        es_jitter_ms: float = 5.0,
+        redis_latency_ms: float = 0.5,
+        redis_jitter_ms: float = 0.2,
+        num_docs: int = 100_000,
+        seed: Optional[int] = None,
+        bm25_index: Optional[str] = None,
+        es_nodes: int = 1,
+        es_pause_ms: float = 0.0,
+        es_pause_rate: float = 0.0,
+        es_shards: int = 1,
+        shard_timeout_ms: Optional[float] = None
+    ):
+        """
+        Args:
+            es_nodes: Fake Elasticsearch nodes, each with its own latency
+                (reads are spread and hedged over them)
+            es_pause_ms: Stall added to a share of fake ES calls, like a GC pause
+            es_pause_rate: Share of fake ES calls that stall
+            es_shards: With more than one, text search is federated over this
+                many fake clusters of `es_nodes` nodes each
+            shard_timeout_ms: Per-shard timeout of the federated search
+            bm25_index: Serve text search from this embedded BM25 index
+                instead of the fake Elasticsearch (a hermetic, real retrieval run)
+        """
+        self.bm25_index = bm25_index
+        self.es_nodes = es_nodes
+        self.es_pause_ms = es_pause_ms
+        self.es_pause_rate = es_pause_rate
+        self.es_shards = es_shards
+        self.shard_timeout_ms = shard_timeout_ms
+        self.es_latency_ms = es_latency_ms
+        self.es_jitter_ms = es_jitter_ms
+        self.redis_latency_ms = redis_latency_ms
+        self.redis_jitter_ms = redis_jitter_ms
+        self.num_docs = num_docs
+        self.seed = seed
+        self.server = None
+        self.thread = None
+        self.port = None
+
+    def _fake_cluster(self, settings, shard: int = 0):
+        """ElasticsearchClient over `es_nodes` fake nodes"""
+        from core.clients.elasticsearch.client import ElasticsearchClient
+        from core.clients.fakes import FakeAsyncElasticsearch, SimulatedLatency
+
+        fake_nodes = {
+            f"fake-es-{shard}-{i}": FakeAsyncElasticsearch(
+                # A different corpus size per shard gives each shard different hits
+                num_docs=self.num_docs + shard,
+                latency=SimulatedLatency(
+                    self.es_latency_ms,
+                    self.es_jitter_ms,
+                    None if self.seed is None else self.seed + shard * self.es_nodes + i,
+                    pause_ms=self.es_pause_ms,
+                    pause_rate=self.es_pause_rate
+                )
+            )
+            for i in range(self.es_nodes)
+        }
+        return ElasticsearchClient(
+            hosts=[],
+            settings=settings,
+            client=next(iter(fake_nodes.values())),
+            node_clients=fake_nodes
+        )
+
+    def _configure_app(self):
+        from main import app
+        from core.clients.fakes import FakeRedis, SimulatedLatency
+        from core.clients.federated_client import FederatedSearchClient, SearchShard
+        from core.clients.redis_client import RedisClient
+        from core.middleware.cache import SearchCacheMiddleware
+        from core.search_api.dependencies import get_elasticsearch_client, get_result_cache, get_settings
+
+        settings = get_settings()
+        # Startup warm-up targets the real backends; the fakes need none
+        settings.warmup_enabled = False
+        # One client for the whole run, like the service's process-wide one
+        if self.bm25_index:
+            from core.clients.bm25_client import EmbeddedSearchClient
+
+            es_client = EmbeddedSearchClient.from_path(self.bm25_index)
+        elif self.es_shards > 1:
+            es_client = FederatedSearchClient(
+                [
+                    SearchShard(
+                        f"shard-{shard}",
+                        self._fake_cluster(settings, shard),
+                        timeout=self.shard_timeout_ms / 1000 if self.shard_timeout_ms else None
+                    )
+                    for shard in range(self.es_shards)
+                ],
+                normalization=settings.federated_normalization
+            )
+        else:
+            es_client = self._fake_cluster(settings)
+        fake_cache = RedisClient(
+            max_queries=settings.max_cache_queries,
+            ttl=settings.cache_ttl,
+            redis=FakeRedis(latency=SimulatedLatency(self.redis_latency_ms, self.redis_jitter_ms, self.seed))
+        )
+
+        async def fake_elasticsearch_client():
+            yield es_client
+
+        app.dependency_overrides[get_elasticsearch_client] = fake_elasticsearch_client
+        app.dependency_overrides[get_result_cache] = lambda: fake_cache
+        for middleware in app.user_middleware:
+            if middleware.cls is SearchCacheMiddleware:
+                middleware.kwargs["cache"] = fake_cache
+        return app
+
+    def start(self) -> str:
+        """Start the server and return its base URL"""
+        import uvicorn
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+
+        config = uvicorn.Config(
+            self._configure_app(),
+            host="127.0.0.1",
+            port=self.port,
+            log_level="warning",
+            access_log=False
+        )
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.thread.start()
+        while not self.server.started:
+            if not self.thread.is_alive():
+                raise RuntimeError("In-process server failed to start")
+            time.sleep(0.05)
+        return f"http://127.0.0.1:{self.port}"
+
+    def stop(self) -> None:
+        if self.server is not None:
+            self.server.should_exit = True
+            self.thread.join(timeout=10)
+
+### === LOAD GENERATION === ###
+class LoadGenerator:
+    """Sends queries to the service and records per-request outcomes"""
+
+    def __init__(
+        self,
+        base_url: str,
+        queries: List[str],
+        endpoint: str = "api",
+        search_type: str = "text",
+        page_size: int = 10,
+        timeout: float = 10.0,
+        batch_size: int = 1
+    ):
+        self.base_url = base_url.rstrip("/")
+        if endpoint == "batch":
+            # One request per chunk of queries
+            queries = [queries[i:i + batch_size] for i in range(0, len(queries), batch_size)]
+        self.queries = queries
+        self.endpoint = endpoint
+        self.search_type = search_type
+        self.page_size = page_size
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.latencies: List[float] = []
+        self.first_result_latencies: List[float] = []
+        self.statuses: Counter = Counter()
+        self.cache_hits = 0
+        self.cache_lookups = 0
+        self.errors = 0
+        self.queries_sent = 0
+
+    async def _send(self, session: aiohttp.ClientSession, query: Union[str, List[str]], started: float) -> None:
+        """Send one request (a list of queries for the batch endpoint); latency is measured from `started`"""
+        self.queries_sent += len(query) if isinstance(query, list) else 1
+        try:
+            if self.endpoint == "batch":
+                request = session.post(
+                    f"{self.base_url}/api/search/batch",
+                    json={"searches": [
+                        {"query": item, "page": 1, "page_size": self.page_size, "search_type": self.search_type}
+                        for item in query
+                    ]}
+                )
+            elif self.endpoint in ("api", "stream"):
+                request = session.post(
+                    f"{self.base_url}/api/search" + ("/stream" if self.endpoint == "stream" else ""),
+                    json={"query": query, "page": 1, "page_size": self.page_size, "search_type": self.search_type}
+                )
+            else:
+                request = session.get(f"{self.base_url}/search", params={"q": query})
+            async with request as response:
+                if self.endpoint == "stream" and response.status == 200:
+                    # The first line is the first stage's "results" event
+                    await response.content.readline()
+                    self.first_result_latencies.append(time.perf_counter() - started)
+                await response.read()
+                status = response.status
+                cache_header = response.headers.get("X-Cache")
+        except Exception as e:
+            status = type(e).__name__
+            cache_header = None
+
+        self.latencies.append(time.perf_counter() - started)
+        self.statuses[status] += 1
+        if not isinstance(status, int) or status >= 400:
+            self.errors += 1
+        if cache_header is not None:
+            self.cache_lookups += 1
+            self.cache_hits += cache_header == "HIT"
+
+    async def run_open_loop(self, qps: float, duration: float, max_requests: Optional[int], max_in_flight: int) -> float:
+        """Start requests at a fixed rate regardless of how fast they complete"""
+        total = int(qps * duration)
+        if max_requests is not None:
+            total = min(total, max_requests)
+        in_flight = asyncio.Semaphore(max_in_flight)
+        tasks = set()
+
+        async def send(query: str, scheduled: float):
+            try:
+                await self._send(session, query, scheduled)
+            finally:
+                in_flight.release()
+
+        connector = aiohttp.TCPConnector(limit=max_in_flight)
+        async with aiohttp.ClientSession(connector=connector, timeout=self.timeout) as session:
+            start = time.perf_counter()
+            for i in range(total):
+                scheduled = start + i / qps
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await in_flight.acquire()
+                task = asyncio.create_task(send(self.queries[i % len(self.queries)], scheduled))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+            return time.perf_counter() - start
+
+    async def run_closed_loop(self, concurrency: int, duration: float, max_requests: Optional[int]) -> float:
+        """Keep `concurrency` requests outstanding until the duration or request budget runs out"""
+        next_index = 0
+
+        async def worker(deadline: float):
+            nonlocal next_index
+            while time.perf_counter() < deadline:
+                if max_requests is not None and next_index >= max_requests:
+                    return
+                query = self.queries[next_index % len(self.queries)]
+                next_index += 1
+                await self._send(session, query, time.perf_counter())
+
+        connector = aiohttp.TCPConnector(limit=concurrency)
+        async with aiohttp.ClientSession(connector=connector, timeout=self.timeout) as session:
+            start = time.perf_counter()
+            await asyncio.gather(*(worker(start + duration) for _ in range(concurrency)))
+            return time.perf_counter() - start
+
+    @staticmethod
+    def _percentiles(latencies_ms: np.ndarray) -> Dict[str, float]:
+        if not len(latencies_ms):
+            return {}
+        return dict(zip(["p50", "p90", "p95", "p99"], np.percentile(latencies_ms, [50, 90, 95, 99]).round(2).tolist()))
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        latencies_ms = np.array(self.latencies) * 1000
+        total = len(latencies_ms)
+        percentiles = self._percentiles(latencies_ms)
+        summary = {
+            "requests": total,
+            "errors": self.errors,
+            "error_rate": round(self.errors / total, 4) if total else None,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(total / elapsed, 2) if elapsed > 0 else None,
+            "queries": self.queries_sent,
+            "query_throughput_qps": round(self.queries_sent / elapsed, 2) if elapsed > 0 else None,
+            "latency_ms": {
+                **percentiles,
+                "mean": round(float(latencies_ms.mean()), 2) if total else None,
+                "max": round(float(latencies_ms.max()), 2) if total else None,
+            },
+            "cache_hit_ratio": round(self.cache_hits / self.cache_lookups, 4) if self.cache_lookups else None,
+            "status_counts": {str(status): count for status, count in self.statuses.items()},
+        }
+        if self.endpoint == "stream":
+            summary["first_result_ms"] = self._percentiles(np.array(self.first_result_latencies) * 1000)
+        return summary
+
+### === REPORTING === ###
+def check_gates(summary: Dict[str, Any], args: argparse.Namespace) -> Dict[str, bool]:
+    """Evaluate configured regression thresholds"""
+    gates = {}
+    if args.max_p99_ms is not None:
+        gates["max_p99_ms"] = summary["latency_ms"].get("p99", float("inf")) <= args.max_p99_ms
+    if args.max_error_rate is not None:
+        gates["max_error_rate"] = (summary["error_rate"] or 0.0) <= args.max_error_rate
+    if args.min_throughput is not None:
+        gates["min_throughput"] = (summary["throughput_rps"] or 0.0) >= args.min_throughput
+    return gates
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    queries = load_queries(args.queries)
+    if not queries:
+        raise ValueError(f"No queries found in {args.queries}")
+    if args.shuffle:
+        random.Random(args.seed).shuffle(queries)
+
+    service = None
+    base_url = args.target
+    if args.in_process:
+        service = InProcessService(
+            es_latency_ms=args.es_latency_ms,
+            es_jitter_ms=args.es_jitter_ms,
+            redis_latency_ms=args.redis_latency_ms,
+            redis_jitter_ms=args.redis_jitter_ms,
+            seed=args.seed,
+            bm25_index=args.bm25_index,
+            es_nodes=args.es_nodes,
+            es_pause_ms=args.es_pause_ms,
+            es_pause_rate=args.es_pause_rate,
+            es_shards=args.es_shards,
+            shard_timeout_ms=args.shard_timeout_ms
+        )
+        base_url = service.start()
+        for name in ("core", "main"):
+            logging.getLogger(name).setLevel(args.log_level)
+
+    generator = LoadGenerator(
+        base_url,
+        queries,
+        endpoint=args.endpoint,
+        search_type=args.search_type,
+        page_size=args.page_size,
+        timeout=args.timeout,
+        batch_size=args.batch_size
+    )
+    logger.info(f"Replaying {len(queries)} queries against {base_url}")
+    try:
+        if args.qps:
+            elapsed = await generator.run_open_loop(args.qps, args.duration, args.requests, args.max_in_flight)
+        else:
+            elapsed = await generator.run_closed_loop(args.concurrency, args.duration, args.requests)
+    finally:
+        if service is not None:
+            service.stop()
+
+    summary = generator.summary(elapsed)
+    return {
+        "benchmark": "load_test",
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "target": "in-process" if args.in_process else base_url,
+            "queries": args.queries,
+            "endpoint": args.endpoint,
+            "batch_size": args.batch_size if args.endpoint == "batch" else None,
+            "search_type": args.search_type,
+            "mode": "open" if args.qps else "closed",
+            "qps": args.qps,
+            "concurrency": None if args.qps else args.concurrency,
+            "duration_s": args.duration,
+            "max_requests": args.requests,
+            "es_latency_ms": args.es_latency_ms if args.in_process and not args.bm25_index else None,
+            "es_nodes": args.es_nodes if args.in_process and not args.bm25_index else None,
+            "es_shards": args.es_shards if args.in_process and not args.bm25_index else None,
+            "es_pause": [args.es_pause_ms, args.es_pause_rate] if args.in_process and args.es_pause_rate else None,
+            "bm25_index": args.bm25_index if args.in_process else None,
+            "redis_latency_ms": args.redis_latency_ms if args.in_process else None,
+        },
+        "summary": summary,
+        "gates": check_gates(summary, args),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay queries against the search service")
+    parser.add_argument("--queries", default=DEFAULT_QUERIES, help="Query file (.json, .jsonl, .tsv or text)")
+    parser.add_argument("--target", default="http://localhost:2345", help="Base URL of a running service")
+    parser.add_argument(
+        "--endpoint", choices=["api", "web", "batch", "stream"], default="api",
+        help="POST /api/search, GET /search, POST /api/search/batch or POST /api/search/stream"
+    )
+    parser.add_argument("--batch-size", type=int, default=50, help="Queries per request with --endpoint batch")
+    parser.add_argument("--search-type", choices=["text", "semantic", "hybrid"], default="text")
+    parser.add_argument("--page-size", type=int, default=10)
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--qps", type=float, default=None, help="Open-loop arrival rate")
+    load.add_argument("--concurrency", type=int, default=8, help="Closed-loop number of workers")
+    parser.add_argument("--duration", type=float, default=30.0, help="Run length in seconds")
+    parser.add_argument("--requests", type=int, default=None, help="Stop after this many requests")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Open-loop cap on outstanding requests")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout in seconds")
+    parser.add_argument("--shuffle", action="store_true", help="Shuffle the query order")
+    parser.add_argument("--seed", type=int, default=None)
+
+    fakes = parser.add_argument_group("in-process service")
+    fakes.add_argument("--in-process", action="store_true", help="Serve the app locally with fake ES/Redis")
+    fakes.add_argument("--es-latency-ms", type=float, default=10.0)
+    fakes.add_argument("--es-jitter-ms", type=float, default=5.0)
+    fakes.add_argument("--es-nodes", type=int, default=1, help="Fake ES nodes to spread and hedge reads over")
+    fakes.add_argument("--es-pause-ms", type=float, default=0.0, help="Stall of a paused fake ES call (GC pause)")
+    fakes.add_argument("--es-pause-rate", type=float, default=0.0, help="Share of fake ES calls that stall")
+    fakes.add_argument("--es-shards", type=int, default=1, help="Federate text search over this many fake clusters")
+    fakes.add_argument("--shard-timeout-ms", type=float, default=None, help="Per-shard timeout of federated search")
+    fakes.add_argument("--redis-latency-ms", type=float, default=0.5)
+    fakes.add_argument("--redis-jitter-ms", type=float, default=0.2)
+    fakes.add_argument("--bm25-index", default=None, help="Use this embedded BM25 index instead of fake ES")
+    fakes.add_argument("--log-level", default="WARNING", help="Service log level while load testing in-process")
+
+    gates = parser.add_argument_group("regression gates")
+    gates.add_argument("--max-p99-ms", type=float, default=None)
+    gates.add_argument("--max-error-rate", type=float, default=None)
+    gates.add_argument("--min-throughput", type=float, default=None)
+
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report["summary"], indent=2))
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Wrote report to {args.output}")
+
+    failed = [name for name, passed in report["gates"].items() if not passed]
+    if failed:
+        logger.error(f"Regression gates failed: {', '.join(failed)}")
+        sys.exit(1)
@@ -0,0 +1,133 @@
+"""
+Benchmark QueryParser throughput in single-query and batch modes.
+
+Modes:
+    single   one `parse` call per query, as in the online pipeline
+    batch    `parse_many` over the whole query list in this process
+    nogc     `batch` with the cyclic garbage collector disabled (an option
+             for offline jobs only; the server must never pause GC)
+    pool     `parse_many` with a process pool (--workers)
+
+The query file is repeated up to --num-queries; repeats get a numeric suffix
+so they are distinct queries (pass --duplicates to keep exact repeats and
+measure the batch de-duplication as well). Results are written to a JSON file
+tagged with the current git commit so runs can be compared.
+
+Usage (from the project root):
+    python -m benchmarks.query_parsing --queries data/processed/queries.json --num-queries 200000
+    python -m benchmarks.query_parsing --modes single batch --spelling-index data/processed/spelling
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks._common import git_commit, host_info
+from benchmarks.load_test import DEFAULT_QUERIES, load_queries
+from core.pipeline.steps.parser import QueryParser
+from core.processing.spelling import SpellingCorrector
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT_DIR = Path("data/benchmarks")
+MODES = ["single", "batch", "nogc", "pool"]
+
+def expand_queries(queries: List[str], num_queries: int, duplicates: bool = False) -> List[str]:
+    """Repeat `queries` up to `num_queries`; repeats are made distinct unless `duplicates`"""
+    expanded = []
+    for i in range(num_queries):
+        query = queries[i % len(queries)]
+        repeat = i // len(queries)
+        expanded.append(query if repeat == 0 or duplicates else f"{query} {repeat}")
+    return expanded
+
+def run_mode(parser: QueryParser, queries: List[str], mode: str, workers: int) -> Dict[str, Any]:
+    start = time.perf_counter()
+    if mode == "single":
+        for query in queries:
+            parser.parse(query)
+    elif mode == "batch":
+        parser.parse_many(queries)
+    elif mode == "nogc":
+        gc.disable()
+        try:
+            parser.parse_many(queries)
+        finally:
+            gc.enable()
+    else:
+        parser.parse_many(queries, workers=workers)
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "queries": len(queries),
+        "seconds": round(elapsed, 4),
+        "queries_per_sec": round(len(queries) / elapsed, 1) if elapsed > 0 else None,
+        "us_per_query": round(elapsed / len(queries) * 1e6, 2),
+    }
+
+def run_benchmark(
+    queries_path: str,
+    modes: List[str],
+    num_queries: int,
+    workers: int,
+    repeat: int = 1,
+    duplicates: bool = False,
+    spelling_index: Optional[str] = None
+) -> Dict[str, Any]:
+    queries = expand_queries(load_queries(queries_path), num_queries, duplicates)
+    results = []
+    for mode in modes:
+        for trial in range(repeat):
+            # A fresh parser per trial, so the spelling cache doesn't carry over
+            spelling = SpellingCorrector.load(spelling_index) if spelling_index else None
+            result = run_mode(QueryParser(spelling=spelling), queries, mode, workers)
+            results.append({**result, "trial": trial})
+            logger.info(f"{mode}: {result['queries_per_sec']} queries/s ({result['us_per_query']} us/query)")
+
+    return {
+        "benchmark": "query_parsing",
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "host": host_info(),
+        "config": {
+            "queries": queries_path,
+            "num_queries": len(queries),
+            "unique_queries": len(set(queries)),
+            "workers": workers,
+            "spelling_index": spelling_index,
+        },
+        "results": results,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark query parsing throughput")
+    parser.add_argument("--queries", default=DEFAULT_QUERIES, help="Query file (any format load_test accepts)")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--num-queries", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes for the pool mode")
+    parser.add_argument("--repeat", type=int, default=1, help="Trials per mode")
+    parser.add_argument("--duplicates", action="store_true", help="Repeat queries verbatim instead of making them distinct")
+    parser.add_argument("--spelling-index", default=None, help="Spelling index to correct queries with")
+    parser.add_argument("--output", default=None, help="JSON output path")
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        args.queries, args.modes, args.num_queries, args.workers, args.repeat, args.duplicates, args.spelling_index
+    )
+
+    output = Path(args.output) if args.output else (
+        DEFAULT_OUTPUT_DIR / f"query_parsing-{report['commit'] or 'unknown'}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Wrote results to {output}")
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Union
+
+from core.clients.elasticsearch.client import SearchItemError
+from core.documents.store import DocumentStore
+from core.lexical.bm25 import BM25Index
+from core.observability.metrics import BM25_LATENCY
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class EmbeddedSearchClient:
+    """
+    Drop-in replacement for ElasticsearchClient's search interface backed by
+    the in-process BM25 index, so the text search step runs without an
+    Elasticsearch cluster. Queries run in worker threads (NumPy releases the
+    GIL for most of the work) to keep the event loop responsive.
+
+    The index only stores docids; `title`/`body` are not returned by
+    `search` (the text search step hydrates hits from the document store).
+    Document lookups are served by `documents` and find nothing without it.
+    The index has no filter context either (`supports_filters`): the text
+    search step filters its hits against the document store instead.
+    """
+
+    supports_filters = False
+
+    def __init__(self, index: BM25Index, documents: Optional[DocumentStore] = None):
+        self.index = index
+        self.documents = documents
+
+    @classmethod
+    def from_path(cls, path: str, documents: Optional[DocumentStore] = None) -> "EmbeddedSearchClient":
+        return cls(BM25Index.load(path), documents)
+
+    def _search(self, query: Any, size: int, offset: int) -> List[Dict[str, Any]]:
+        return [{"score": score, "docid": docid} for docid, score in self.index.search(query, size, offset)]
+
+    async def search(
+        self,
+        query: Any,
+        size: int = 10,
+        offset: int = 0,
+        **kwargs
+    ) -> List[Dict[str, Any]]:
+        """
+        Execute search and return results
+
+        Args:
+            query: Query string or query dict
+            size: Number of results to return
+            offset: Starting offset for pagination
+            **kwargs: Accepted for compatibility with ElasticsearchClient (index, source_includes)
+
+        Returns:
+            List of document dictionaries
+        """
+        start = time.perf_counter()
+        try:
+            results = await asyncio.to_thread(self._search, query, size, offset)
+            BM25_LATENCY.labels(operation="search", outcome="ok").observe(time.perf_counter() - start)
+            return results
+        except Exception as e:
+            BM25_LATENCY.labels(operation="search", outcome="error").observe(time.perf_counter() - start)
+            logger.error(f"Embedded search failed: {str(e)}")
+            raise
+
+    async def msearch(
+        self,
+        queries: List[Dict[str, Any]],
+        size: int = 10,
+        offset: int = 0,
+        **kwargs
+    ) -> List[Union[List[Dict[str, Any]], SearchItemError]]:
+        """
+        Execute several searches; like `_msearch`, a failing search is
+        reported in its slot instead of failing the batch
+        """
+        start = time.perf_counter()
+
+        def run_all() -> List[Union[List[Dict[str, Any]], SearchItemError]]:
+            results = []
+            for query in queries:
+                try:
+                    results.append(self._search(query, size, offset))
+                except Exception as e:
+                    results.append(SearchItemError(str(e)))
+            return results
+
+        results = await asyncio.to_thread(run_all)
+        BM25_LATENCY.labels(operation="msearch", outcome="ok").observe(time.perf_counter() - start)
+        return results
+
+    async def get_document(self, doc_id: str, **kwargs) -> Optional[Dict[str, Any]]:
+        return self.documents.get(doc_id) if self.documents is not None else None
+
+    async def get_documents(self, doc_ids: List[str], **kwargs) -> Dict[str, Dict[str, Any]]:
+        return self.documents.get_many(doc_ids) if self.documents is not None else {}
+
+    async def warm_up(self, connections: int = 1) -> None:
+        """Nothing to connect to"""
+
+    async def close(self):
+        """Nothing to release: the index is shared by the process"""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
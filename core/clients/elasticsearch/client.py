@@ -1,10 +1,15 @@
 from elasticsearch import AsyncElasticsearch
-from elasticsearch.exceptions import ConnectionError, TransportError
-from typing import Dict, List, Any, Optional
+from elasticsearch.exceptions import ApiError, ConnectionError, ConnectionTimeout, TransportError
+from typing import Awaitable, Callable, Dict, List, Any, Optional, Union
+from collections import defaultdict
 from fastapi import HTTPException
 import logging
 import asyncio
+import random
+import time
 from core.clients.elasticsearch.data_processor import DataProcessor
+from core.clients.elasticsearch.resilience import CLOSED, CircuitBreaker, CircuitOpenError, LatencyTracker
+from core.observability.metrics import ELASTICSEARCH_CIRCUIT_STATE, ELASTICSEARCH_HEDGES, ELASTICSEARCH_LATENCY
 from core.search_api.settings import Settings
 
 logging.basicConfig(
@@ -14,19 +19,269 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+class SearchItemError(Exception):
+    """A single search within an `_msearch` request failed"""
+
+
+class SearchHits(list):
+    """
+    Documents of one search; `timed_out` is set when the results are partial,
+    and `missing` names the shards of a federated search that didn't answer
+    """
+
+    def __init__(self, documents: List[Dict[str, Any]], timed_out: bool = False, missing: Optional[List[str]] = None):
+        super().__init__(documents)
+        self.timed_out = timed_out
+        self.missing = missing or []
+
+
+# Share of a request's remaining budget given to the ES-side `timeout`, so
+# shards stop collecting and return partial hits before the client gives up
+ES_TIMEOUT_SHARE = 0.8
+# Hedges that can be saved up while traffic is calm
+MAX_HEDGE_BURST = 10.0
+
+
+def _is_timeout(error: BaseException) -> bool:
+    return isinstance(error, (ConnectionTimeout, asyncio.TimeoutError))
+
+
+def _is_node_failure(error: BaseException, deadline_bound: bool = False) -> bool:
+    """
+    Errors that say the node is unhealthy (as opposed to a bad request).
+    A timeout only counts if it was the node's own request timeout, not the
+    shorter cap set from the request's deadline (`deadline_bound`): running
+    out of a small budget says nothing about the node.
+    """
+    if isinstance(error, ApiError):
+        return error.status_code == 429 or error.status_code >= 500
+    if _is_timeout(error):
+        return not deadline_bound
+    return isinstance(error, (ConnectionError, TransportError))
+
+
+class ReadNode:
+    """An Elasticsearch node reads can be sent to, with its circuit breaker"""
+
+    def __init__(self, name: str, client: Any, breaker: CircuitBreaker):
+        self.name = name
+        self.client = client
+        self.breaker = breaker
+
+
 class ElasticsearchClient():
-    def __init__(self, hosts: List[str], settings: Settings):
-        """Initialize Elasticsearch client with hosts"""
-        self.client = AsyncElasticsearch(hosts=hosts)
+    def __init__(
+        self,
+        hosts: List[str],
+        settings: Settings,
+        client: Optional[Any] = None,
+        node_clients: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Initialize Elasticsearch client with hosts
+
+        Reads (search, msearch, get, mget) are spread round-robin over the
+        nodes, each behind a circuit breaker, and hedged: a read still
+        outstanding after the observed p95 latency of its operation is sent
+        to a second node and the first response wins. A read that fails on an
+        unhealthy node is retried once on another while the request's
+        deadline allows; a timeout set by the deadline is not held against
+        the node. Indexing and admin calls go through `client`.
+
+        Args:
+            hosts: Elasticsearch host URLs; with several, each gets its own
+                read client so hedges land on a different node
+            settings: Application settings
+            client: Optional pre-built client (e.g. `FakeAsyncElasticsearch`); overrides hosts
+            node_clients: Optional pre-built read clients by node name; default
+                one per host, or just `client`
+        """
+        self.client = client if client is not None else AsyncElasticsearch(
+            hosts=hosts,
+            request_timeout=settings.elasticsearch_timeout
+        )
         self.settings = settings
+        if node_clients is None:
+            if client is None and len(hosts) > 1:
+                node_clients = {
+                    host: AsyncElasticsearch(hosts=[host], request_timeout=settings.elasticsearch_timeout)
+                    for host in hosts
+                }
+            else:
+                node_clients = {hosts[0] if hosts else "default": self.client}
+        self.nodes = [
+            ReadNode(name, node_client, CircuitBreaker(settings.es_breaker_failures, settings.es_breaker_reset_s))
+            for name, node_client in node_clients.items()
+        ]
+        for node in self.nodes:
+            ELASTICSEARCH_CIRCUIT_STATE.labels(node=node.name).set(node.breaker.state)
+        self._latency: Dict[str, LatencyTracker] = defaultdict(LatencyTracker)
+        self._next_node = 0
+        self._hedge_tokens = 0.0
+
+    @staticmethod
+    def _es_timeout(timeout: Optional[float]) -> Optional[str]:
+        """ES-side `timeout` for a call that must finish within `timeout` seconds (None = unbounded)"""
+        if timeout is None:
+            return None
+        return f"{max(1, int(max(timeout, 0.001) * ES_TIMEOUT_SHARE * 1000))}ms"
+
+    @staticmethod
+    def _bounded(client: Any, timeout: Optional[float]) -> Any:
+        """`client` with its HTTP request timeout capped at `timeout` seconds"""
+        if timeout is None:
+            return client
+        return client.options(request_timeout=max(timeout, 0.001))
+
+    def _pick(self, exclude: List[ReadNode]) -> Optional[ReadNode]:
+        """Next node in round-robin order whose circuit lets a call through"""
+        start = self._next_node
+        self._next_node = (start + 1) % len(self.nodes)
+        for i in range(len(self.nodes)):
+            node = self.nodes[(start + i) % len(self.nodes)]
+            if node not in exclude and node.breaker.allow():
+                return node
+        return None
+
+    def _hedge_delay(self, operation: str) -> Optional[float]:
+        """Seconds after which a read is hedged (None: not hedged)"""
+        if not self.settings.es_hedge_enabled:
+            return None
+        quantile = self._latency[operation].quantile(self.settings.es_hedge_quantile)
+        if quantile is None:
+            return None
+        return max(quantile, self.settings.es_hedge_min_delay_ms / 1000)
+
+    def _deadline_bound(self, budget: Optional[float]) -> bool:
+        """Whether a call's HTTP timeout comes from the request's deadline rather than the node's own timeout"""
+        return budget is not None and budget <= self.settings.elasticsearch_timeout
+
+    async def _attempt(
+        self,
+        node: ReadNode,
+        operation: str,
+        call: Callable[[Any], Awaitable[Any]],
+        budget: Optional[float]
+    ) -> Any:
+        """One read on one node within `budget` seconds, recording the outcome on its breaker and the latency window"""
+        start = time.perf_counter()
+        try:
+            result = await call(self._bounded(node.client, budget))
+        except asyncio.CancelledError:
+            # Lost a hedge or the request's deadline: it took at least this long
+            self._latency[operation].observe(time.perf_counter() - start)
+            node.breaker.record_abandoned()
+            raise
+        except Exception as e:
+            deadline_bound = self._deadline_bound(budget)
+            if _is_node_failure(e, deadline_bound):
+                node.breaker.record_failure()
+            elif _is_timeout(e):
+                # Ran out of the request's budget: no verdict on the node
+                self._latency[operation].observe(time.perf_counter() - start)
+                node.breaker.record_abandoned()
+            else:
+                node.breaker.record_success()
+            raise
+        else:
+            node.breaker.record_success()
+            self._latency[operation].observe(time.perf_counter() - start)
+            return result
+        finally:
+            ELASTICSEARCH_CIRCUIT_STATE.labels(node=node.name).set(node.breaker.state)
+
+    async def _read(
+        self,
+        operation: str,
+        call: Callable[[Any], Awaitable[Any]],
+        timeout: Optional[float] = None
+    ) -> Any:
+        """
+        Run a read with hedging and failover (see `__init__`)
+
+        Args:
+            operation: Operation name, for latency tracking and metrics
+            call: Issues the read on a given node's client, whose HTTP request
+                timeout is already capped at what is left of `timeout`
+            timeout: Seconds left for the read (None = unbounded)
+
+        Raises:
+            CircuitOpenError: If every node's circuit is open
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def attempt(node: ReadNode) -> asyncio.Task:
+            budget = None if deadline is None else deadline - time.monotonic()
+            task = asyncio.create_task(self._attempt(node, operation, call, budget))
+            tasks[task] = self._deadline_bound(budget)
+            return task
+
+        primary = self._pick([])
+        if primary is None:
+            raise CircuitOpenError(f"No Elasticsearch node available for {operation}")
+        tried = [primary]
+        # Attempts in flight, with whether their timeout is the deadline's
+        tasks: Dict[asyncio.Task, bool] = {}
+        attempt(primary)
+        hedge_task = None
+        hedge_delay = self._hedge_delay(operation)
+        self._hedge_tokens = min(self._hedge_tokens + self.settings.es_hedge_budget, MAX_HEDGE_BURST)
+        error: Optional[BaseException] = None
+        try:
+            while True:
+                done, _ = await asyncio.wait(
+                    tasks,
+                    timeout=hedge_delay if len(tried) == 1 else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    deadline_bound = tasks.pop(task)
+                    if task.exception() is None:
+                        if task is hedge_task:
+                            ELASTICSEARCH_HEDGES.labels(operation=operation, outcome="won").inc()
+                        return task.result()
+                    error = task.exception()
+                    if not _is_node_failure(error, deadline_bound):
+                        raise error
+                if deadline is not None and deadline <= time.monotonic():
+                    # Out of budget: another node could not answer in time either
+                    hedge_delay = None
+                elif len(tried) == 1:
+                    node = None
+                    if done:
+                        # Failed on an unhealthy node: fail over
+                        node = self._pick(tried)
+                    elif self._hedge_tokens >= 1:
+                        # Slower than usual: hedge, on another node if there is one
+                        node = self._pick(tried) or (primary if primary.breaker.state == CLOSED else None)
+                        if node is not None:
+                            self._hedge_tokens -= 1
+                            ELASTICSEARCH_HEDGES.labels(operation=operation, outcome="sent").inc()
+                    if node is not None:
+                        tried.append(node)
+                        task = attempt(node)
+                        if not done:
+                            hedge_task = task
+                    else:
+                        hedge_delay = None
+                if not tasks:
+                    raise error
+        finally:
+            for task in tasks:
+                if task.done():
+                    if not task.cancelled():
+                        task.exception()  # Retrieved, so a losing failure isn't logged as unhandled
+                else:
+                    task.cancel()
         
     async def search(
         self, 
         query: str, 
         size: int = 10, 
         offset: int = 0,
+        timeout: Optional[float] = None,
         **kwargs
-    ) -> Dict[str, Any]:
+    ) -> SearchHits:
         """
         Execute search and return results
         
@@ -34,56 +289,159 @@ class ElasticsearchClient():
             query: Query string or query dict
             size: Number of results to return
             offset: Starting offset for pagination
+            timeout: Seconds left for the call; bounds both the ES search
+                (partial results past it) and the HTTP request
             **kwargs: Additional search parameters (index, etc.)
             
         Returns:
             List of document dictionaries
         """
+        start = time.perf_counter()
         try:
             index = kwargs.get("index", "msmarco-docs")
+            es_timeout = self._es_timeout(timeout)
             
-            response = await self.client.search(
+            response = await self._read("search", lambda client: client.search(
                 index=index,
                 query=query,
                 size=size,
-                from_=offset
-            )
+                from_=offset,
+                source_includes=kwargs.get("source_includes"),
+                timeout=es_timeout
+            ), timeout)
+            ELASTICSEARCH_LATENCY.labels(operation="search", outcome="ok").observe(time.perf_counter() - start)
             
-            return [
-                {
-                    "score": hit["_score"],
-                    **hit["_source"],
-                }
-                for hit in response["hits"]["hits"]
-            ]
+            return SearchHits(self._hits_to_documents(response["hits"]["hits"]), response.get("timed_out", False))
             
         except Exception as e:
+            ELASTICSEARCH_LATENCY.labels(operation="search", outcome="error").observe(time.perf_counter() - start)
             logger.error(f"Elasticsearch search failed: {str(e)}")
             raise
 
-    async def get_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
+    async def msearch(
+        self,
+        queries: List[Dict[str, Any]],
+        size: int = 10,
+        offset: int = 0,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> List[Union[SearchHits, SearchItemError]]:
+        """
+        Execute several searches in a single `_msearch` round trip
+        
+        Args:
+            queries: Query dicts, one per search
+            size: Number of results to return per search
+            offset: Starting offset for pagination
+            timeout: Seconds left for the whole round trip (see `search`)
+            **kwargs: Additional search parameters (index, source_includes)
+            
+        Returns:
+            One entry per query, in order: a list of document dictionaries,
+            or a SearchItemError if that search failed
+        """
+        if not queries:
+            return []
+
+        index = kwargs.get("index", "msmarco-docs")
+        source_includes = kwargs.get("source_includes")
+        es_timeout = self._es_timeout(timeout)
+        searches = []
+        for query in queries:
+            body = {"query": query, "size": size, "from": offset}
+            if source_includes is not None:
+                body["_source"] = source_includes
+            if es_timeout is not None:
+                body["timeout"] = es_timeout
+            searches.extend([{"index": index}, body])
+
+        start = time.perf_counter()
+        try:
+            response = await self._read("msearch", lambda client: client.msearch(searches=searches), timeout)
+            ELASTICSEARCH_LATENCY.labels(operation="msearch", outcome="ok").observe(time.perf_counter() - start)
+        except Exception as e:
+            ELASTICSEARCH_LATENCY.labels(operation="msearch", outcome="error").observe(time.perf_counter() - start)
+            logger.error(f"Elasticsearch msearch failed: {str(e)}")
+            raise
+
+        return [
+            SearchItemError(str(item["error"])) if "error" in item
+            else SearchHits(self._hits_to_documents(item["hits"]["hits"]), item.get("timed_out", False))
+            for item in response["responses"]
+        ]
+
+    @staticmethod
+    def _hits_to_documents(hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Flatten ES hits into document dictionaries with a score"""
+        return [
+            {
+                "score": hit["_score"],
+                **hit["_source"],
+            }
+            for hit in hits
+        ]
+
+    async def get_document(self, doc_id: str, index: str = "msmarco-docs") -> Optional[Dict[str, Any]]:
         """
         Retrieve a single document by ID
         
         Args:
             doc_id: Document ID to retrieve
+            index: Index holding the document
             
         Returns:
             Document dictionary if found, None otherwise
         """
+        start = time.perf_counter()
         try:
-            response = await self.client.get(
-                index="msmarco-docs",
+            response = await self._read("get", lambda client: client.get(
+                index=index,
                 id=doc_id
-            )
+            ))
+            ELASTICSEARCH_LATENCY.labels(operation="get", outcome="ok").observe(time.perf_counter() - start)
             return response["_source"] if response else None
             
         except Exception as e:
+            ELASTICSEARCH_LATENCY.labels(operation="get", outcome="error").observe(time.perf_counter() - start)
             logger.error(f"Failed to get document {doc_id}: {str(e)}")
             return None
             
+    async def get_documents(self, doc_ids: List[str], index: str = "msmarco-docs") -> Dict[str, Dict[str, Any]]:
+        """
+        Retrieve several documents by ID in one `_mget` round trip
+        
+        Args:
+            doc_ids: Document IDs to retrieve
+            index: Index holding the documents
+            
+        Returns:
+            Mapping of document ID to source for the documents that were found
+        """
+        if not doc_ids:
+            return {}
+
+        start = time.perf_counter()
+        try:
+            response = await self._read("mget", lambda client: client.mget(index=index, ids=doc_ids))
+            ELASTICSEARCH_LATENCY.labels(operation="mget", outcome="ok").observe(time.perf_counter() - start)
+        except Exception as e:
+            ELASTICSEARCH_LATENCY.labels(operation="mget", outcome="error").observe(time.perf_counter() - start)
+            logger.error(f"Failed to get documents: {str(e)}")
+            raise
+
+        return {doc["_id"]: doc["_source"] for doc in response["docs"] if doc.get("found")}
+
+    async def warm_up(self, connections: int = 1) -> None:
+        """Open `connections` pooled connections to every node ahead of traffic (concurrent `info` calls)"""
+        await asyncio.gather(*(
+            node.client.info() for node in self.nodes for _ in range(connections)
+        ))
+
     async def close(self):
-        """Close the Elasticsearch client connection"""
+        """Close the Elasticsearch client connections"""
+        for node in self.nodes:
+            if node.client is not self.client:
+                await node.client.close()
         await self.client.close()
         
     async def __aenter__(self):
@@ -95,7 +453,7 @@ class ElasticsearchClient():
         await self.close()
 
     async def _execute_with_retry(self, operation, *args, **kwargs):
-        """Execute an operation with retry logic"""
+        """Execute an operation with retry logic (exponential backoff with full jitter, capped at retry_interval)"""
         for attempt in range(self.settings.max_retries):
             try:
                 return await operation(*args, **kwargs)
@@ -103,7 +461,9 @@ class ElasticsearchClient():
                 if attempt == self.settings.max_retries - 1:
                     logger.error(f"Operation failed after {attempt + 1} attempts: {str(e)}")
                     raise
-                await asyncio.sleep(self.settings.retry_interval)
+                await asyncio.sleep(random.uniform(
+                    0, min(self.settings.retry_interval, self.settings.retry_backoff_base * 2 ** attempt)
+                ))
                 logger.warning(f"Retrying operation, attempt {attempt + 2}")
 
     async def create_index(self, index: str, mappings: Dict[str, Any]) -> bool:
@@ -111,6 +471,7 @@ class ElasticsearchClient():
         try:
             if await self.client.indices.exists(index=index):
                 logger.info(f"Index '{index}' already exists")
+                await self._warn_missing_fields(index, mappings)
                 return False
 
             # Create index with a following structure
@@ -137,6 +498,24 @@ class ElasticsearchClient():
                 detail=f"Failed to create index: {str(e)}"
             )
 
+    async def _warn_missing_fields(self, index: str, mappings: Dict[str, Any]) -> None:
+        """An existing index keeps its mapping: flag fields it lacks (e.g. `url`, needed by filters)"""
+        try:
+            response = await self.client.indices.get_mapping(index=index)
+            existing = {
+                field
+                for index_mapping in response.values()
+                for field in index_mapping.get("mappings", {}).get("properties", {})
+            }
+        except Exception as e:
+            logger.warning(f"Could not read the mapping of '{index}': {str(e)}")
+            return
+        missing = sorted(set(mappings.get("mappings", {}).get("properties", {})) - existing)
+        if missing:
+            logger.warning(
+                f"Index '{index}' has no mapping for {missing}; delete and re-index it to search or filter on them"
+            )
+
     async def bulk_index_documents(
         self,
         documents: List[Dict],
@@ -48,6 +48,7 @@ class DataProcessor:
                 transformed_docs = [
                     {
                         "docid": doc["docid"],
+                        "url": doc["url"],
                         "title": doc["title"],
                         "body": doc["body"]
                     }
@@ -0,0 +1,94 @@
+"""
+Resilience primitives for the Elasticsearch read path.
+
+`LatencyTracker` keeps a sliding window of call latencies per operation;
+its p95 is the hedge delay: a read still outstanding after it is sent
+again to another node (or, with a single node, again to the coordinator,
+whose adaptive replica selection routes it to the fastest shard copy) and
+the first response wins. `CircuitBreaker` fails a node fast after
+consecutive failures and lets a single probe through once `reset_timeout`
+has passed.
+"""
+import time
+from collections import deque
+from typing import Deque, Optional
+
+import numpy as np
+
+CLOSED = 0
+HALF_OPEN = 1
+OPEN = 2
+STATE_NAMES = ("closed", "half_open", "open")
+
+
+class CircuitOpenError(Exception):
+    """Every node's circuit is open; the read was not attempted"""
+
+
+class LatencyTracker:
+    def __init__(self, window: int = 1000, min_samples: int = 50, refresh_every: int = 32):
+        """
+        Args:
+            window: Most recent latencies kept
+            min_samples: Quantiles are unknown (None) until this many were observed
+            refresh_every: Observations between quantile recomputations
+        """
+        self.window: Deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.refresh_every = refresh_every
+        self._since_refresh = 0
+        self._quantiles = {}
+
+    def observe(self, latency: float) -> None:
+        self.window.append(latency)
+        self._since_refresh += 1
+        if self._since_refresh >= self.refresh_every:
+            self._since_refresh = 0
+            self._quantiles.clear()
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Latency quantile over the window (cached between refreshes), None while warming up"""
+        if len(self.window) < self.min_samples:
+            return None
+        if q not in self._quantiles:
+            self._quantiles[q] = float(np.quantile(np.fromiter(self.window, dtype=np.float64), q))
+        return self._quantiles[q]
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0):
+        """
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds an open circuit waits before letting a probe through
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+
+    def allow(self) -> bool:
+        """Whether a call may be sent; an open circuit past `reset_timeout` admits one probe"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.failures = 0
+
+    def record_abandoned(self) -> None:
+        """A call was cancelled before its outcome was known (e.g. it lost a hedge)"""
+        if self.state == HALF_OPEN:
+            # No verdict from the probe: let the next call probe again
+            self.state = OPEN
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = OPEN
+            self._opened_at = time.monotonic()
@@ -0,0 +1,169 @@
+"""
+Read path of ElasticsearchClient over in-process fake nodes: failover,
+hedging, circuit breaker transitions, and timeouts set by a request's own
+deadline not counting against the node.
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+import pytest
+from elastic_transport import ApiResponseMeta, HttpHeaders, NodeConfig
+from elasticsearch import BadRequestError, ConnectionError, ConnectionTimeout
+
+from core.clients.elasticsearch.client import ElasticsearchClient
+from core.clients.elasticsearch.resilience import CLOSED, HALF_OPEN, OPEN, CircuitOpenError
+from core.clients.fakes import FakeAsyncElasticsearch, SimulatedLatency
+from core.search_api.settings import Settings
+
+QUERY = {"match": {"body": "solar panel"}}
+
+
+class Node(FakeAsyncElasticsearch):
+    """Fake node that records its searches and can be made to fail them"""
+
+    def __init__(self, latency_ms: float = 0.0, request_timeout: Optional[float] = None):
+        super().__init__(num_docs=1000, latency=SimulatedLatency(latency_ms), request_timeout=request_timeout)
+        # Shared with the request-timeout copies `options` makes
+        self.calls: List[str] = []
+        self.error: Optional[Exception] = None
+
+    async def search(self, **kwargs) -> Dict[str, Any]:
+        self.calls.append("search")
+        if self.error is not None:
+            raise self.error
+        return await super().search(**kwargs)
+
+
+def _client(*nodes: Node, **settings: Any) -> ElasticsearchClient:
+    settings = Settings(**{"es_hedge_enabled": False, **settings})
+    return ElasticsearchClient(
+        hosts=[], settings=settings, client=nodes[0], node_clients={f"n{i}": node for i, node in enumerate(nodes)}
+    )
+
+
+def _bad_request() -> BadRequestError:
+    meta = ApiResponseMeta(400, "1.1", HttpHeaders(), 0.0, NodeConfig("http", "localhost", 9200))
+    return BadRequestError("parsing_exception", meta, {})
+
+
+def test_reads_are_spread_round_robin():
+    nodes = Node(), Node()
+    client = _client(*nodes)
+    for _ in range(4):
+        asyncio.run(client.search(QUERY))
+    assert [len(node.calls) for node in nodes] == [2, 2]
+
+
+def test_read_fails_over_from_an_unhealthy_node():
+    down, up = Node(), Node()
+    down.error = ConnectionError("connection refused")
+    client = _client(down, up)
+    hits = asyncio.run(client.search(QUERY))
+    assert len(hits) == 10
+    assert (len(down.calls), len(up.calls)) == (1, 1)
+    assert client.nodes[0].breaker.failures == 1
+
+
+def test_bad_request_is_not_retried_or_held_against_the_node():
+    node, other = Node(), Node()
+    node.error = _bad_request()
+    client = _client(node, other)
+    with pytest.raises(BadRequestError):
+        asyncio.run(client.search(QUERY))
+    assert len(other.calls) == 0
+    assert client.nodes[0].breaker.failures == 0
+
+
+def test_breaker_opens_then_probes_and_closes():
+    down, up = Node(), Node()
+    down.error = ConnectionError("connection refused")
+    client = _client(down, up, es_breaker_failures=2, es_breaker_reset_s=0.05)
+    breaker = client.nodes[0].breaker
+
+    for _ in range(4):
+        asyncio.run(client.search(QUERY))
+    assert breaker.state == OPEN and len(down.calls) == 2
+
+    # Open: reads skip the node entirely
+    for _ in range(4):
+        asyncio.run(client.search(QUERY))
+    assert len(down.calls) == 2
+
+    # Past the reset timeout one probe goes through; a failed probe reopens
+    time.sleep(0.06)
+    client._next_node = 0
+    asyncio.run(client.search(QUERY))
+    assert len(down.calls) == 3 and breaker.state == OPEN
+
+    time.sleep(0.06)
+    down.error = None
+    client._next_node = 0
+    asyncio.run(client.search(QUERY))
+    assert breaker.state == CLOSED and breaker.failures == 0
+
+
+def test_all_circuits_open():
+    node = Node()
+    node.error = ConnectionError("connection refused")
+    client = _client(node, es_breaker_failures=1)
+    with pytest.raises(ConnectionError):
+        asyncio.run(client.search(QUERY))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(client.search(QUERY))
+
+
+def test_abandoned_probe_leaves_the_circuit_open():
+    client = _client(Node())
+    breaker = client.nodes[0].breaker
+    breaker.state = HALF_OPEN
+    breaker.record_abandoned()
+    assert breaker.state == OPEN
+
+
+def test_slow_read_is_hedged_on_another_node():
+    slow, fast = Node(latency_ms=500), Node(latency_ms=1)
+    client = _client(slow, fast, es_hedge_enabled=True, es_hedge_budget=1.0)
+    for _ in range(50):
+        client._latency["search"].observe(0.002)
+
+    start = time.perf_counter()
+    hits = asyncio.run(client.search(QUERY))
+    assert len(hits) == 10 and time.perf_counter() - start < 0.25
+    assert (len(slow.calls), len(fast.calls)) == (1, 1)
+    # The losing attempt was cancelled, not failed
+    assert client.nodes[0].breaker.state == CLOSED and client.nodes[0].breaker.failures == 0
+
+
+def test_deadline_expirations_never_open_a_breaker():
+    nodes = Node(latency_ms=30), Node(latency_ms=30)
+    client = _client(*nodes)
+    for _ in range(5):
+        with pytest.raises(ConnectionTimeout):
+            asyncio.run(client.search(QUERY, timeout=0.01))
+
+    # Each expired read stayed on its node: no failover with a spent budget
+    assert sum(len(node.calls) for node in nodes) == 5
+    assert all(node.breaker.state == CLOSED and node.breaker.failures == 0 for node in client.nodes)
+    assert len(asyncio.run(client.search(QUERY, timeout=1.0))) == 10
+
+
+def test_node_timeout_counts_as_a_failure():
+    stalled, up = Node(latency_ms=200, request_timeout=0.02), Node()
+    client = _client(stalled, up)
+    hits = asyncio.run(client.search(QUERY))
+    assert len(hits) == 10 and len(up.calls) == 1
+    assert client.nodes[0].breaker.failures == 1
+
+
+def test_msearch_items_fail_on_their_own():
+    class PartlyFailing(Node):
+        async def msearch(self, searches, index=None, **kwargs):
+            response = await super().msearch(searches, index, **kwargs)
+            response["responses"][1] = {"error": {"type": "query_shard_exception"}, "status": 400}
+            return response
+
+    client = _client(PartlyFailing())
+    results = asyncio.run(client.msearch([QUERY, {"match": {"body": "wind"}}], timeout=1.0))
+    assert len(results[0]) == 10
+    assert "query_shard_exception" in str(results[1])
@@ -0,0 +1,363 @@
+"""
+In-process stand-ins for external services.
+
+These fakes implement the subset of the `AsyncElasticsearch` and
+`redis.asyncio.Redis` interfaces used by our clients, with configurable
+latency, so the service can be exercised (load tests, local runs) on a laptop
+with no Elasticsearch or Redis running. They are wrapped by the real
+`ElasticsearchClient`/`RedisClient`, so client-side code paths stay in play.
+`FakeQdrantClient` instead stands in for `QdrantClient` itself, doing exact
+search over the points it holds.
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from elasticsearch.exceptions import ConnectionTimeout
+
+FAKE_VOCABULARY = (
+    "solar energy panel wind turbine river bank loan house price health doctor "
+    "heart disease weather rain city travel flight hotel music guitar piano movie "
+    "history king queen python code market stock coffee tea garden school"
+).split()
+
+
+class SimulatedLatency:
+    """Latency model: a fixed base plus an exponential tail, with occasional stalls"""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        seed: Optional[int] = None,
+        pause_ms: float = 0.0,
+        pause_rate: float = 0.0
+    ):
+        """
+        Args:
+            latency_ms: Base latency added to every call
+            jitter_ms: Mean of the exponential tail added on top of the base
+            seed: Optional seed for reproducible runs
+            pause_ms: Extra delay of a stalled call (e.g. a GC pause on the node)
+            pause_rate: Share of calls that stall
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.pause_ms = pause_ms
+        self.pause_rate = pause_rate
+        self._random = random.Random(seed)
+
+    async def wait(self) -> None:
+        delay_ms = self.latency_ms
+        if self.jitter_ms > 0:
+            delay_ms += self._random.expovariate(1.0 / self.jitter_ms)
+        if self.pause_rate > 0 and self._random.random() < self.pause_rate:
+            delay_ms += self.pause_ms
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+
+
+def _stable_int(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class FakeAsyncElasticsearch:
+    """Deterministic fake of the read APIs of `AsyncElasticsearch`"""
+
+    def __init__(
+        self,
+        num_docs: int = 100_000,
+        body_words: int = 200,
+        latency: Optional[SimulatedLatency] = None,
+        request_timeout: Optional[float] = None
+    ):
+        """
+        Args:
+            num_docs: Size of the simulated corpus (bounds generated doc ids)
+            body_words: Words per generated body, to simulate payload size
+            latency: Latency model applied to every call
+            request_timeout: Seconds after which a call raises ConnectionTimeout,
+                like the transport's own request timeout (None = never)
+        """
+        self.num_docs = num_docs
+        self.body_words = body_words
+        self.latency = latency or SimulatedLatency()
+        self.request_timeout = request_timeout
+
+    async def _wait(self) -> None:
+        if self.request_timeout is None:
+            await self.latency.wait()
+            return
+        try:
+            await asyncio.wait_for(self.latency.wait(), self.request_timeout)
+        except asyncio.TimeoutError:
+            raise ConnectionTimeout(f"Connection timed out after {self.request_timeout}s")
+
+    def _document(self, doc_num: int) -> Dict[str, Any]:
+        rng = random.Random(doc_num)
+        return {
+            "docid": f"D{doc_num}",
+            "title": " ".join(rng.choices(FAKE_VOCABULARY, k=5)).title(),
+            "body": " ".join(rng.choices(FAKE_VOCABULARY, k=self.body_words)),
+        }
+
+    def _hits(
+        self,
+        query: Any,
+        size: int,
+        offset: int,
+        source_includes: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        seed = _stable_int(json.dumps(query, sort_keys=True, default=str))
+        hits = []
+        for rank in range(offset, offset + size):
+            doc_num = (seed + rank * 7919) % self.num_docs
+            source = self._document(doc_num)
+            if source_includes is not None:
+                source = {field: source[field] for field in source_includes if field in source}
+            hits.append({
+                "_index": "msmarco-docs",
+                "_id": f"D{doc_num}",
+                "_score": round(20.0 / (1 + rank), 4),
+                "_source": source,
+            })
+        return {
+            "took": 1,
+            "timed_out": False,
+            "hits": {"total": {"value": self.num_docs, "relation": "gte"}, "hits": hits},
+        }
+
+    async def search(
+        self,
+        index: str = "msmarco-docs",
+        query: Any = None,
+        size: int = 10,
+        from_: int = 0,
+        **kwargs
+    ) -> Dict[str, Any]:
+        await self._wait()
+        return self._hits(query, size, from_, kwargs.get("source_includes"))
+
+    async def msearch(self, searches: List[Dict[str, Any]], index: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        await self._wait()
+        responses = []
+        for body in searches[1::2]:
+            response = self._hits(body.get("query"), body.get("size", 10), body.get("from", 0), body.get("_source"))
+            responses.append({**response, "status": 200})
+        return {"took": 1, "responses": responses}
+
+    async def get(self, index: str, id: str, **kwargs) -> Dict[str, Any]:
+        await self._wait()
+        return {"_index": index, "_id": id, "found": True, "_source": self._document(int(id.lstrip("D")))}
+
+    async def mget(self, index: str, ids: List[str], **kwargs) -> Dict[str, Any]:
+        await self._wait()
+        return {
+            "docs": [
+                {"_index": index, "_id": doc_id, "found": True, "_source": self._document(int(doc_id.lstrip("D")))}
+                for doc_id in ids
+            ]
+        }
+
+    async def info(self, **kwargs) -> Dict[str, Any]:
+        return {"name": "fake-es", "version": {"number": "8.11.1"}}
+
+    def options(self, request_timeout: Optional[float] = None, **kwargs) -> "FakeAsyncElasticsearch":
+        """Per-request transport options; only `request_timeout` is honoured"""
+        if request_timeout is None:
+            return self
+        bounded = copy.copy(self)
+        bounded.request_timeout = request_timeout
+        return bounded
+
+    async def close(self) -> None:
+        return None
+
+
+class FakeRedis:
+    """In-memory fake of the `redis.asyncio.Redis` commands used by `RedisClient`"""
+
+    def __init__(self, latency: Optional[SimulatedLatency] = None):
+        """
+        Args:
+            latency: Latency model applied to every command or pipeline round trip
+        """
+        self.latency = latency or SimulatedLatency()
+        self._values: Dict[str, bytes] = {}
+        self._expires_at: Dict[str, float] = {}
+        self._lists: Dict[str, List[bytes]] = {}
+
+    @staticmethod
+    def _encode(value: Any) -> bytes:
+        return value if isinstance(value, bytes) else str(value).encode("utf-8")
+
+    def _get(self, key: str) -> Optional[bytes]:
+        expires_at = self._expires_at.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._values.pop(key, None)
+            self._expires_at.pop(key, None)
+        return self._values.get(key)
+
+    def _set(self, key: str, value: Any, ex: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        if nx and self._get(key) is not None:
+            return None
+        self._values[key] = self._encode(value)
+        if ex:
+            self._expires_at[key] = time.monotonic() + ex
+        else:
+            self._expires_at.pop(key, None)
+        return True
+
+    def _lpush(self, key: str, *values: Any) -> int:
+        items = self._lists.setdefault(key, [])
+        for value in values:
+            items.insert(0, self._encode(value))
+        return len(items)
+
+    def _ltrim(self, key: str, start: int, end: int) -> bool:
+        items = self._lists.get(key, [])
+        self._lists[key] = items[start:end + 1 if end != -1 else None]
+        return True
+
+    def _lrange(self, key: str, start: int, end: int) -> List[bytes]:
+        return self._lists.get(key, [])[start:end + 1 if end != -1 else None]
+
+    async def get(self, key: str) -> Optional[bytes]:
+        await self.latency.wait()
+        return self._get(key)
+
+    async def set(self, key: str, value: Any, ex: Optional[int] = None, nx: bool = False, **kwargs) -> Optional[bool]:
+        await self.latency.wait()
+        return self._set(key, value, ex=ex, nx=nx)
+
+    async def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        await self.latency.wait()
+        return [self._get(key) for key in keys]
+
+    async def lrange(self, key: str, start: int, end: int) -> List[bytes]:
+        await self.latency.wait()
+        return self._lrange(key, start, end)
+
+    async def ping(self) -> bool:
+        await self.latency.wait()
+        return True
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":
+        return FakePipeline(self)
+
+    async def close(self) -> None:
+        return None
+
+
+class FakePipeline:
+    """Buffers commands and runs them in a single simulated round trip"""
+
+    def __init__(self, redis: FakeRedis):
+        self.redis = redis
+        self._commands: List[tuple] = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._commands.clear()
+
+    def _queue(self, name: str, *args, **kwargs) -> "FakePipeline":
+        self._commands.append((name, args, kwargs))
+        return self
+
+    async def get(self, key: str) -> "FakePipeline":
+        return self._queue("_get", key)
+
+    async def set(self, key: str, value: Any, ex: Optional[int] = None, nx: bool = False, **kwargs) -> "FakePipeline":
+        return self._queue("_set", key, value, ex=ex, nx=nx)
+
+    async def lpush(self, key: str, *values: Any) -> "FakePipeline":
+        return self._queue("_lpush", key, *values)
+
+    async def ltrim(self, key: str, start: int, end: int) -> "FakePipeline":
+        return self._queue("_ltrim", key, start, end)
+
+    async def execute(self) -> List[Any]:
+        await self.redis.latency.wait()
+        results = [getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self._commands]
+        self._commands.clear()
+        return results
+
+
+class FakeQdrantClient:
+    """In-memory stand-in for `QdrantClient` with exact (brute-force) cosine search"""
+
+    def __init__(self, latency: Optional[SimulatedLatency] = None, docid_field: str = "docid"):
+        """
+        Args:
+            latency: Latency model applied to every request
+            docid_field: Payload field holding the corpus docid
+        """
+        self.latency = latency or SimulatedLatency()
+        self.docid_field = docid_field
+        self.dim: Optional[int] = None
+        self._points: Dict[int, Tuple[np.ndarray, Dict[str, Any]]] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._ids: List[int] = []
+
+    def _index(self) -> np.ndarray:
+        if self._matrix is None:
+            self._ids = list(self._points)
+            vectors = [self._points[point_id][0] for point_id in self._ids]
+            self._matrix = np.stack(vectors) if vectors else np.empty((0, self.dim or 0), dtype=np.float32)
+        return self._matrix
+
+    def _search(self, vector: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        matrix = self._index()
+        if not len(matrix):
+            return np.array([], dtype=object), np.array([], dtype=np.float32)
+        query = np.asarray(vector, dtype=np.float32)
+        scores = matrix @ (query / (np.linalg.norm(query) or 1.0))
+        top = np.argsort(-scores, kind="stable")[:k]
+        docids = np.array([self._points[self._ids[i]][1][self.docid_field] for i in top], dtype=object)
+        return docids, scores[top]
+
+    async def search(self, vector: np.ndarray, k: int = 100, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        await self.latency.wait()
+        return self._search(vector, k)
+
+    async def search_batch(
+        self,
+        vectors: np.ndarray,
+        k: int = 100,
+        nprobe: Optional[int] = None
+    ) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        await self.latency.wait()
+        results = [self._search(vector, k) for vector in np.atleast_2d(vectors)]
+        return [docids for docids, _ in results], [scores for _, scores in results]
+
+    async def create_collection(self, dim: int, distance: str = "Cosine", on_disk: bool = False) -> None:
+        await self.latency.wait()
+        self.dim = self.dim or dim
+
+    async def upsert(
+        self,
+        ids: Sequence[int],
+        vectors: np.ndarray,
+        payloads: Sequence[Dict[str, Any]],
+        batch_size: int = 256,
+        concurrency: int = 4,
+        wait: bool = False
+    ) -> int:
+        for start in range(0, len(ids), batch_size):
+            await self.latency.wait()
+            for i in range(start, min(start + batch_size, len(ids))):
+                vector = np.asarray(vectors[i], dtype=np.float32)
+                # Cosine distance: Qdrant normalizes vectors on insert
+                self._points[int(ids[i])] = (vector / (np.linalg.norm(vector) or 1.0), dict(payloads[i]))
+        self._matrix = None
+        return len(ids)
+
+    async def close(self) -> None:
+        return None
@@ -0,0 +1,261 @@
+import asyncio
+import heapq
+import logging
+import time
+from itertools import islice
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from core.clients.elasticsearch.client import SearchHits, SearchItemError
+from core.observability.metrics import FEDERATED_SHARD_LATENCY
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+NORMALIZATIONS = ("max", "minmax", "none")
+
+
+class SearchShard:
+    """One backend of a federated search: its own client (and connection pool), index and timeout"""
+
+    def __init__(self, name: str, client: Any, index: str = "msmarco-docs", timeout: Optional[float] = None):
+        """
+        Args:
+            name: Shard name, used in metrics, logs and the `shard` field of hits
+            client: `ElasticsearchClient` (or any client with its search interface)
+            index: Index searched on this backend
+            timeout: Seconds this shard may take; None leaves it to the request deadline
+        """
+        self.name = name
+        self.client = client
+        self.index = index
+        self.timeout = timeout
+
+
+class FederatedSearchClient:
+    """
+    Scatter-gather over several indices or clusters, with the search
+    interface of ElasticsearchClient so the text search step can use it
+    unchanged.
+
+    Every search fans out to all shards concurrently. Each shard is bounded
+    by the smaller of its own timeout and the request's remaining budget; a
+    shard that misses it (or fails) is left out and the hits are flagged
+    partial (`SearchHits.missing` names the shards). BM25 scores from
+    different indices aren't comparable (their term statistics differ), so
+    each shard's scores are normalized before the top-k are merged with a
+    heap. A document found on several shards is kept once, at its best rank.
+    """
+
+    def __init__(self, shards: Sequence[SearchShard], normalization: str = "max"):
+        """
+        Args:
+            shards: Backends to fan out to
+            normalization: Per-shard score normalization: "max" (divide by
+                the shard's top score), "minmax" or "none"
+        """
+        if not shards:
+            raise ValueError("Federated search needs at least one shard")
+        if normalization not in NORMALIZATIONS:
+            raise ValueError(f"Unknown normalization '{normalization}', expected one of {NORMALIZATIONS}")
+        self.shards = list(shards)
+        self.normalization = normalization
+
+    def _normalize(self, documents: List[Dict[str, Any]], shard: SearchShard) -> List[Dict[str, Any]]:
+        """Shard hits (sorted by score) with normalized scores, tagged with the shard"""
+        if not documents:
+            return []
+        top, bottom = documents[0]["score"], documents[-1]["score"]
+        if self.normalization == "max" and top > 0:
+            scale, shift = 1.0 / top, 0.0
+        elif self.normalization == "minmax" and top > bottom:
+            scale, shift = 1.0 / (top - bottom), bottom
+        else:
+            scale, shift = 1.0, 0.0
+        return [
+            {**doc, "score": (doc["score"] - shift) * scale, "shard": shard.name}
+            for doc in documents
+        ]
+
+    def _merge(self, ranked: List[List[Dict[str, Any]]], size: int, offset: int) -> List[Dict[str, Any]]:
+        """k-way heap merge of per-shard ranked lists into the requested page"""
+        merged = heapq.merge(*ranked, key=lambda doc: doc["score"], reverse=True)
+        seen = set()
+        unique = (doc for doc in merged if not (doc["docid"] in seen or seen.add(doc["docid"])))
+        return list(islice(unique, offset, offset + size))
+
+    def _budget(self, shard: SearchShard, timeout: Optional[float]) -> Optional[float]:
+        if shard.timeout is None or timeout is None:
+            return timeout if shard.timeout is None else shard.timeout
+        return min(shard.timeout, timeout)
+
+    async def _call_shard(self, shard: SearchShard, operation: str, timeout: Optional[float], call) -> Tuple[str, Any]:
+        """
+        Run `call(shard, budget)` within the shard's budget.
+
+        Returns:
+            ("ok", result), ("timeout", None) or ("error", exception)
+        """
+        budget = self._budget(shard, timeout)
+        start = time.perf_counter()
+        try:
+            if budget is None:
+                result = await call(shard, budget)
+            else:
+                result = await asyncio.wait_for(call(shard, budget), max(budget, 0.0))
+            outcome = ("ok", result)
+        except asyncio.TimeoutError:
+            # Without a budget, the timeout came from the shard client itself
+            limit = f"its {budget:.3f}s budget" if budget is not None else "its deadline"
+            logger.warning(f"Shard '{shard.name}' missed {limit} for {operation}")
+            outcome = ("timeout", None)
+        except Exception as e:
+            logger.error(f"Shard '{shard.name}' {operation} failed: {str(e)}")
+            outcome = ("error", e)
+        FEDERATED_SHARD_LATENCY.labels(shard=shard.name, operation=operation, outcome=outcome[0]).observe(
+            time.perf_counter() - start
+        )
+        return outcome
+
+    async def _scatter(self, operation: str, timeout: Optional[float], call) -> List[Tuple[str, Any]]:
+        """Run `call(shard, budget)` on every shard concurrently; one outcome per shard, in order"""
+        return await asyncio.gather(*(self._call_shard(shard, operation, timeout, call) for shard in self.shards))
+
+    def _gather(self, shard_hits: List[Tuple[SearchShard, Any]], size: int, offset: int) -> SearchHits:
+        """Merge per-shard hits; shards without hits (or with partial ones) make the result partial"""
+        ranked, missing, timed_out = [], [], False
+        for shard, hits in shard_hits:
+            if hits is None:
+                missing.append(shard.name)
+            else:
+                ranked.append(self._normalize(list(hits), shard))
+                timed_out = timed_out or getattr(hits, "timed_out", False)
+        return SearchHits(self._merge(ranked, size, offset), timed_out or bool(missing), missing)
+
+    async def search(
+        self,
+        query: Any,
+        size: int = 10,
+        offset: int = 0,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> SearchHits:
+        """
+        Execute search on every shard and merge the results
+
+        Args:
+            query: Query dict
+            size: Number of results to return
+            offset: Starting offset for pagination
+            timeout: Seconds left for the request; each shard gets at most this
+            **kwargs: Additional search parameters (source_includes); `index`
+                is ignored, every shard searches its own
+
+        Returns:
+            Merged documents; `timed_out` is set if any shard is missing
+
+        Raises:
+            Exception: The first shard error, if no shard answered
+            asyncio.TimeoutError: If every shard missed its deadline
+        """
+        kwargs.pop("index", None)
+        outcomes = await self._scatter("search", timeout, lambda shard, budget: shard.client.search(
+            query=query,
+            size=offset + size,
+            offset=0,
+            index=shard.index,
+            timeout=budget,
+            **kwargs
+        ))
+        self._raise_if_all_failed("search", outcomes)
+        return self._gather(
+            [(shard, result if status == "ok" else None) for shard, (status, result) in zip(self.shards, outcomes)],
+            size,
+            offset
+        )
+
+    async def msearch(
+        self,
+        queries: List[Dict[str, Any]],
+        size: int = 10,
+        offset: int = 0,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> List[Union[SearchHits, SearchItemError]]:
+        """
+        Execute a batch of searches: one `_msearch` per shard, merged per
+        query; a query fails only if it failed on every shard that answered
+        """
+        if not queries:
+            return []
+        kwargs.pop("index", None)
+        outcomes = await self._scatter("msearch", timeout, lambda shard, budget: shard.client.msearch(
+            queries,
+            size=offset + size,
+            offset=0,
+            index=shard.index,
+            timeout=budget,
+            **kwargs
+        ))
+        self._raise_if_all_failed("msearch", outcomes)
+
+        results = []
+        for i in range(len(queries)):
+            shard_hits, errors = [], []
+            for shard, (status, responses) in zip(self.shards, outcomes):
+                item = responses[i] if status == "ok" else None
+                if isinstance(item, Exception):
+                    errors.append(item)
+                    item = None
+                shard_hits.append((shard, item))
+            if len(errors) == sum(status == "ok" for status, _ in outcomes):
+                results.append(SearchItemError("; ".join(str(error) for error in errors)))
+            else:
+                results.append(self._gather(shard_hits, size, offset))
+        return results
+
+    def _raise_if_all_failed(self, operation: str, outcomes: List[Tuple[str, Any]]) -> None:
+        if any(status == "ok" for status, _ in outcomes):
+            return
+        errors = [result for status, result in outcomes if status == "error"]
+        if errors:
+            raise errors[0]
+        raise asyncio.TimeoutError(f"Every shard missed its deadline for {operation}")
+
+    async def get_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """First copy of the document found, in shard order"""
+        for document in await self._documents([doc_id]):
+            if doc_id in document:
+                return document[doc_id]
+        return None
+
+    async def get_documents(self, doc_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Documents found on any shard (the first shard holding a docid wins)"""
+        documents: Dict[str, Dict[str, Any]] = {}
+        for found in await self._documents(doc_ids):
+            for doc_id, document in found.items():
+                documents.setdefault(doc_id, document)
+        return documents
+
+    async def _documents(self, doc_ids: List[str]) -> List[Dict[str, Dict[str, Any]]]:
+        if not doc_ids:
+            return []
+        outcomes = await self._scatter("mget", None, lambda shard, budget: shard.client.get_documents(doc_ids, index=shard.index))
+        return [result for status, result in outcomes if status == "ok"]
+
+    async def warm_up(self, connections: int = 1) -> None:
+        """Warm every shard's connection pool"""
+        await asyncio.gather(*(shard.client.warm_up(connections) for shard in self.shards))
+
+    async def close(self):
+        """Close every shard's client"""
+        for shard in self.shards:
+            await shard.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
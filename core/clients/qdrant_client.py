@@ -1,5 +1,12 @@
+import asyncio
 import logging
-from typing import Dict, List
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import aiohttp
+import numpy as np
+
+from core.observability.metrics import QDRANT_LATENCY
 
 logging.basicConfig(
     level=logging.INFO,
@@ -7,16 +14,182 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+class QdrantError(Exception):
+    """Raised when Qdrant returns a non-2xx response"""
+
 class QdrantClient:
-    def __init__(self, base_url: str | None = None, collection: str | None = None):
+    """
+    Async client for the Qdrant REST API.
+
+    One pooled aiohttp session is kept for the lifetime of the client, so
+    searches reuse keep-alive connections instead of reconnecting per request.
+    Points carry the corpus docid in their payload (Qdrant ids must be
+    integers or UUIDs); searches only request that payload field, so
+    responses stay small. `search`/`search_batch` mirror `IVFIndex`, which
+    makes the client a drop-in backend for SemanticSearchStep.
+    """
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        collection: str | None = None,
+        api_key: str | None = None,
+        pool_size: int = 32,
+        timeout: float = 10.0,
+        hnsw_ef: int | None = None,
+        docid_field: str = "docid"
+    ):
         """
         Initialize Qdrant client with configuration
-        
+
         Args:
             base_url: Optional override for Qdrant base URL
             collection: Optional override for collection name
+            api_key: Optional API key sent as the `api-key` header
+            pool_size: Maximum pooled connections
+            timeout: Total timeout per request in seconds
+            hnsw_ef: Optional search-time HNSW ef (recall/latency trade-off)
+            docid_field: Payload field holding the corpus docid
+        """
+        self.base_url = (base_url or "http://qdrant:6333").rstrip("/")
+        self.collection = collection or "msmarco-docs"
+        self.api_key = api_key
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.hnsw_ef = hnsw_ef
+        self.docid_field = docid_field
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily: aiohttp sessions must be built inside the running loop
+        if self._session is None or self._session.closed:
+            headers = {"api-key": self.api_key} if self.api_key else None
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers=headers
+            )
+        return self._session
+
+    async def _request(self, operation: str, method: str, path: str, body: Optional[Dict] = None) -> Any:
+        start = time.perf_counter()
+        try:
+            async with self._get_session().request(method, f"{self.base_url}{path}", json=body) as response:
+                payload = await response.json(content_type=None)
+                if response.status >= 300:
+                    raise QdrantError(f"{method} {path} failed with {response.status}: {payload}")
+            QDRANT_LATENCY.labels(operation=operation, outcome="ok").observe(time.perf_counter() - start)
+            return payload["result"]
+        except Exception as e:
+            QDRANT_LATENCY.labels(operation=operation, outcome="error").observe(time.perf_counter() - start)
+            logger.error(f"Qdrant {operation} failed: {str(e)}")
+            raise
+
+    def _search_request(self, vector: np.ndarray, k: int) -> Dict[str, Any]:
+        request = {
+            "vector": np.asarray(vector, dtype=np.float32).tolist(),
+            "limit": k,
+            "with_payload": [self.docid_field],
+            "with_vector": False,
+        }
+        if self.hnsw_ef:
+            request["params"] = {"hnsw_ef": self.hnsw_ef}
+        return request
+
+    def _parse_hits(self, hits: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        docids = np.array([hit["payload"][self.docid_field] for hit in hits], dtype=object)
+        scores = np.array([hit["score"] for hit in hits], dtype=np.float32)
+        return docids, scores
+
+    async def search(self, vector: np.ndarray, k: int = 100, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Nearest neighbours of one query vector.
+
+        Args:
+            vector: (dim,) query vector
+            k: Number of results
+            nprobe: Ignored; accepted for interface compatibility with IVFIndex
+
+        Returns:
+            (docids, scores), best first
+        """
+        hits = await self._request(
+            "search", "POST", f"/collections/{self.collection}/points/search", self._search_request(vector, k)
+        )
+        return self._parse_hits(hits)
+
+    async def search_batch(
+        self,
+        vectors: np.ndarray,
+        k: int = 100,
+        nprobe: Optional[int] = None
+    ) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """Search several query vectors in one request; returns per-query lists of (docids, scores)"""
+        body = {"searches": [self._search_request(vector, k) for vector in np.atleast_2d(vectors)]}
+        results = await self._request(
+            "search_batch", "POST", f"/collections/{self.collection}/points/search/batch", body
+        )
+        parsed = [self._parse_hits(hits) for hits in results]
+        return [docids for docids, _ in parsed], [scores for _, scores in parsed]
+
+    async def create_collection(self, dim: int, distance: str = "Cosine", on_disk: bool = False) -> None:
+        """Create the collection if it doesn't exist yet"""
+        try:
+            await self._request("get_collection", "GET", f"/collections/{self.collection}")
+            return
+        except QdrantError:
+            pass
+        await self._request("create_collection", "PUT", f"/collections/{self.collection}", {
+            "vectors": {"size": dim, "distance": distance, "on_disk": on_disk},
+        })
+
+    async def upsert(
+        self,
+        ids: Sequence[int],
+        vectors: np.ndarray,
+        payloads: Sequence[Dict[str, Any]],
+        batch_size: int = 256,
+        concurrency: int = 4,
+        wait: bool = False
+    ) -> int:
         """
+        Upsert points in batches, with up to `concurrency` batches in flight.
+
+        Args:
+            ids: Integer point ids
+            vectors: (n, dim) vectors
+            payloads: One payload per point (should include the docid field)
+            batch_size: Points per request
+            concurrency: Maximum concurrent requests
+            wait: Ask Qdrant to apply each batch before responding
+
+        Returns:
+            Number of points written
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        path = f"/collections/{self.collection}/points?wait={'true' if wait else 'false'}"
+
+        async def send(start: int) -> int:
+            end = min(start + batch_size, len(ids))
+            async with semaphore:
+                # Built under the semaphore so only `concurrency` batches are materialized at once
+                points = [
+                    {"id": int(ids[i]), "vector": np.asarray(vectors[i], dtype=np.float32).tolist(), "payload": payloads[i]}
+                    for i in range(start, end)
+                ]
+                await self._request("upsert", "PUT", path, {"points": points})
+            return end - start
+
+        written = await asyncio.gather(*(send(start) for start in range(0, len(ids), batch_size)))
+        return sum(written)
 
-    async def search(self) -> List[Dict]:
-        pass
+    async def warm_up(self, connections: int = 1) -> None:
+        """Open `connections` pooled connections ahead of traffic (concurrent collection lookups)"""
+        await asyncio.gather(*(
+            self._request("collection", "GET", f"/collections/{self.collection}") for _ in range(connections)
+        ))
 
+    async def close(self):
+        """Close the pooled HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
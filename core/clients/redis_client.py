@@ -1,7 +1,10 @@
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
+import asyncio
 import json
+import time
 from redis import asyncio as aioredis
 import logging
+from core.observability.metrics import REDIS_LATENCY
 
 logging.basicConfig(
     level=logging.INFO,
@@ -14,7 +17,8 @@ class RedisClient():
         self, 
         redis_url: str = "redis://redis:6379",
         max_queries: int = 5,
-        ttl: int = 3600
+        ttl: int = 3600,
+        redis: Optional[Any] = None
     ):
         """
         Initialize Redis client
@@ -23,8 +27,9 @@ class RedisClient():
             redis_url: Redis connection URL
             max_queries: Maximum number of recent queries to track
             ttl: Default TTL for cached items in seconds
+            redis: Optional pre-built connection (e.g. `FakeRedis`); overrides redis_url
         """
-        self.redis = aioredis.from_url(redis_url)
+        self.redis = redis if redis is not None else aioredis.from_url(redis_url)
         self.max_queries = max_queries
         self.ttl = ttl
         self.query_list_key = "recent_queries"
@@ -39,17 +44,71 @@ class RedisClient():
         Returns:
             Cached value if found and valid, None otherwise
         """
+        start = time.perf_counter()
         try:
             cached = await self.redis.get(key)
+            REDIS_LATENCY.labels(command="get", outcome="ok").observe(time.perf_counter() - start)
             if cached:
-                logger.info(f"Cache hit for key: {key}")
+                logger.debug(f"Cache hit for key: {key}")
                 return json.loads(cached)
-            logger.info(f"Cache miss for key: {key}")
+            logger.debug(f"Cache miss for key: {key}")
             return None
         except Exception as e:
+            REDIS_LATENCY.labels(command="get", outcome="error").observe(time.perf_counter() - start)
             logger.error(f"Failed to get from cache: {str(e)}")
             return None
 
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        Retrieve several values in one round trip
+        
+        Args:
+            keys: Cache keys to retrieve
+            
+        Returns:
+            One entry per key, in order: the cached value, or None on a miss
+            (or for every key if Redis is unavailable)
+        """
+        if not keys:
+            return []
+        start = time.perf_counter()
+        try:
+            cached = await self.redis.mget(keys)
+            REDIS_LATENCY.labels(command="mget", outcome="ok").observe(time.perf_counter() - start)
+        except Exception as e:
+            REDIS_LATENCY.labels(command="mget", outcome="error").observe(time.perf_counter() - start)
+            logger.error(f"Failed to get from cache: {str(e)}")
+            return [None] * len(keys)
+
+        values = []
+        for value in cached:
+            try:
+                values.append(json.loads(value) if value else None)
+            except json.JSONDecodeError:
+                values.append(None)
+        return values
+
+    async def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        """
+        Store several values in one pipelined round trip
+        
+        Args:
+            items: Values by cache key
+            ttl: Time-to-live in seconds (optional)
+        """
+        if not items:
+            return
+        start = time.perf_counter()
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    await pipe.set(key, json.dumps(value), ex=ttl or self.ttl, nx=True)
+                await pipe.execute()
+            REDIS_LATENCY.labels(command="pipeline", outcome="ok").observe(time.perf_counter() - start)
+        except Exception as e:
+            REDIS_LATENCY.labels(command="pipeline", outcome="error").observe(time.perf_counter() - start)
+            logger.error(f"Failed to cache values: {str(e)}")
+
     async def set(
         self, 
         key: str, 
@@ -64,6 +123,7 @@ class RedisClient():
             value: Value to store
             ttl: Time-to-live in seconds (optional)
         """
+        start = time.perf_counter()
         try:
             await self.redis.set(
                 key,
@@ -71,14 +131,16 @@ class RedisClient():
                 ex=ttl or self.ttl,
                 nx=True  # Only set if key doesn't exist
             )
+            REDIS_LATENCY.labels(command="set", outcome="ok").observe(time.perf_counter() - start)
             
             # If this is a search result, update recent queries
             if key.startswith("search:"):
                 await self._update_recent_queries(key)
                 
-            logger.info(f"Cached value for key: {key}")
+            logger.debug(f"Cached value for key: {key}")
             
         except Exception as e:
+            REDIS_LATENCY.labels(command="set", outcome="error").observe(time.perf_counter() - start)
             logger.error(f"Failed to cache value: {str(e)}")
 
     async def get_recent_keys(self) -> List[str]:
@@ -105,6 +167,7 @@ class RedisClient():
         Args:
             query_key: Key to add to recent queries list
         """
+        start = time.perf_counter()
         try:
             async with self.redis.pipeline() as pipe:
                 # Add new query to front
@@ -112,9 +175,15 @@ class RedisClient():
                 # Trim to keep only recent queries
                 await pipe.ltrim(self.query_list_key, 0, self.max_queries - 1)
                 await pipe.execute()
+            REDIS_LATENCY.labels(command="pipeline", outcome="ok").observe(time.perf_counter() - start)
         except Exception as e:
+            REDIS_LATENCY.labels(command="pipeline", outcome="error").observe(time.perf_counter() - start)
             logger.error(f"Failed to update recent queries: {str(e)}")
 
+    async def warm_up(self, connections: int = 1) -> None:
+        """Open `connections` pooled connections ahead of traffic (concurrent PINGs)"""
+        await asyncio.gather(*(self.redis.ping() for _ in range(connections)))
+
     async def close(self) -> None:
         """Close Redis connection"""
         await self.redis.close()
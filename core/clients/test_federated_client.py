@@ -0,0 +1,174 @@
+"""
+FederatedSearchClient over in-process fake clusters: per-shard score
+normalization, the heap merge with dedup and pagination, and shards that
+time out or fail leaving partial results.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List
+
+import pytest
+from elasticsearch import ConnectionTimeout
+
+from core.clients.elasticsearch.client import ElasticsearchClient, SearchHits, SearchItemError
+from core.clients.fakes import FakeAsyncElasticsearch, SimulatedLatency
+from core.clients.federated_client import FederatedSearchClient, SearchShard
+from core.search_api.settings import Settings
+
+QUERY = {"match": {"body": "solar panel"}}
+
+
+def _es(num_docs: int = 1000, latency_ms: float = 0.0) -> ElasticsearchClient:
+    fake = FakeAsyncElasticsearch(num_docs=num_docs, latency=SimulatedLatency(latency_ms))
+    return ElasticsearchClient(hosts=[], settings=Settings(es_hedge_enabled=False), client=fake)
+
+
+class BrokenClient:
+    """Shard client whose searches raise `error`"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+    async def search(self, **kwargs):
+        raise self.error
+
+    async def msearch(self, queries, **kwargs):
+        raise self.error
+
+
+def _docs(*scored) -> List[Dict[str, Any]]:
+    return [{"docid": docid, "title": "", "body": "", "score": score} for docid, score in scored]
+
+
+def _ids(hits) -> List[str]:
+    return [doc["docid"] for doc in hits]
+
+
+def test_needs_a_shard_and_a_known_normalization():
+    with pytest.raises(ValueError):
+        FederatedSearchClient([])
+    with pytest.raises(ValueError):
+        FederatedSearchClient([SearchShard("a", _es())], normalization="zscore")
+
+
+@pytest.mark.parametrize("normalization, expected", [
+    ("max", [1.0, 0.5, 0.25]),
+    ("minmax", [1.0, 1 / 3, 0.0]),
+    ("none", [8.0, 4.0, 2.0]),
+])
+def test_normalize(normalization, expected):
+    shard = SearchShard("a", None)
+    normalized = FederatedSearchClient([shard], normalization)._normalize(_docs(("x", 8.0), ("y", 4.0), ("z", 2.0)), shard)
+    assert [doc["score"] for doc in normalized] == pytest.approx(expected)
+    assert all(doc["shard"] == "a" for doc in normalized)
+
+
+def test_merge_interleaves_dedups_and_pages():
+    client = FederatedSearchClient([SearchShard("a", None)])
+    ranked = [
+        _docs(("a1", 1.0), ("dup", 0.8), ("a2", 0.3)),
+        _docs(("b1", 0.9), ("dup", 0.5), ("b2", 0.4)),
+    ]
+    assert _ids(client._merge(ranked, 10, 0)) == ["a1", "b1", "dup", "b2", "a2"]
+    # The duplicate is kept once, at its best score, and pages don't shift around it
+    assert [doc["score"] for doc in client._merge(ranked, 10, 0)][2] == 0.8
+    assert _ids(client._merge(ranked, 2, 2)) == ["dup", "b2"]
+    assert _ids(client._merge(ranked, 2, 4)) == ["a2"]
+
+
+def test_identical_shards_return_each_document_once():
+    single = asyncio.run(_es().search(QUERY))
+    federated = FederatedSearchClient([SearchShard("a", _es()), SearchShard("b", _es())])
+    hits = asyncio.run(federated.search(QUERY))
+    assert _ids(hits) == _ids(single)
+    assert not hits.timed_out and hits.missing == []
+    assert {doc["shard"] for doc in hits} == {"a"}
+
+
+def test_pages_concatenate_to_the_full_ranking():
+    federated = FederatedSearchClient([SearchShard("a", _es(1000)), SearchShard("b", _es(777))])
+    full = asyncio.run(federated.search(QUERY, size=15))
+    pages = [asyncio.run(federated.search(QUERY, size=5, offset=offset)) for offset in (0, 5, 10)]
+    assert [docid for page in pages for docid in _ids(page)] == _ids(full)
+    assert len(set(_ids(full))) == 15
+
+
+def test_slow_shard_is_left_out():
+    federated = FederatedSearchClient([
+        SearchShard("fast", _es(1000)),
+        SearchShard("slow", _es(777, latency_ms=500), timeout=0.02),
+    ])
+    hits = asyncio.run(federated.search(QUERY))
+    assert hits.timed_out and hits.missing == ["slow"]
+    assert len(hits) == 10 and {doc["shard"] for doc in hits} == {"fast"}
+
+
+def test_request_deadline_bounds_every_shard():
+    federated = FederatedSearchClient([SearchShard("a", _es(latency_ms=500)), SearchShard("b", _es(latency_ms=500))])
+    start = time.perf_counter()
+    # Whichever fires first: the shard's wait or its client's request timeout
+    with pytest.raises((asyncio.TimeoutError, ConnectionTimeout)):
+        asyncio.run(federated.search(QUERY, timeout=0.02))
+    assert time.perf_counter() - start < 0.25
+
+
+def test_failed_shard_is_left_out():
+    federated = FederatedSearchClient([SearchShard("ok", _es()), SearchShard("down", BrokenClient(RuntimeError("boom")))])
+    hits = asyncio.run(federated.search(QUERY))
+    assert hits.missing == ["down"] and len(hits) == 10
+
+
+def test_every_shard_failing_raises():
+    federated = FederatedSearchClient([
+        SearchShard("a", BrokenClient(RuntimeError("first"))),
+        SearchShard("b", BrokenClient(RuntimeError("second"))),
+    ])
+    with pytest.raises(RuntimeError, match="first"):
+        asyncio.run(federated.search(QUERY))
+
+    federated = FederatedSearchClient([SearchShard("a", BrokenClient(asyncio.TimeoutError()))])
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(federated.search(QUERY))
+
+
+def test_client_timeout_without_a_budget_marks_the_shard_missing(caplog):
+    federated = FederatedSearchClient([SearchShard("ok", _es()), SearchShard("stuck", BrokenClient(asyncio.TimeoutError()))])
+    with caplog.at_level(logging.WARNING):
+        hits = asyncio.run(federated.search(QUERY))
+    assert hits.missing == ["stuck"]
+    assert "Shard 'stuck' missed its deadline for search" in caplog.text
+
+
+def test_msearch_merges_per_query():
+    class PartlyFailing(FakeAsyncElasticsearch):
+        async def msearch(self, searches, index=None, **kwargs):
+            response = await super().msearch(searches, index, **kwargs)
+            response["responses"][1] = {"error": {"type": "query_shard_exception"}, "status": 400}
+            return response
+
+    failing = ElasticsearchClient(hosts=[], settings=Settings(), client=PartlyFailing(num_docs=777))
+    federated = FederatedSearchClient([SearchShard("a", _es()), SearchShard("b", failing)])
+    queries = [QUERY, {"match": {"body": "wind"}}]
+    first, second = asyncio.run(federated.msearch(queries, size=5))
+    assert isinstance(first, SearchHits) and {doc["shard"] for doc in first} == {"a", "b"}
+    # Failed on one shard only: the other's hits still answer it
+    assert isinstance(second, SearchHits) and {doc["shard"] for doc in second} == {"a"}
+
+    federated = FederatedSearchClient([SearchShard("b", failing), SearchShard("down", BrokenClient(RuntimeError("boom")))])
+    first, second = asyncio.run(federated.msearch(queries, size=5))
+    assert first.missing == ["down"]
+    assert isinstance(second, SearchItemError)
+
+
+def test_get_documents_prefers_the_first_shard():
+    class Renamed(ElasticsearchClient):
+        async def get_documents(self, doc_ids, **kwargs):
+            documents = await super().get_documents(doc_ids, **kwargs)
+            return {doc_id: {**document, "title": "second"} for doc_id, document in documents.items()}
+
+    second = Renamed(hosts=[], settings=Settings(), client=FakeAsyncElasticsearch(num_docs=1000))
+    federated = FederatedSearchClient([SearchShard("a", _es()), SearchShard("b", second)])
+    documents = asyncio.run(federated.get_documents(["D1", "D2"]))
+    assert set(documents) == {"D1", "D2"}
+    assert all(document["title"] != "second" for document in documents.values())
@@ -0,0 +1,148 @@
+"""
+Memory-mapped document store for hydrating search hits locally.
+
+Each text field is one append-only blob of concatenated UTF-8 values, with
+an int64 offsets array delimiting them (value i is blob[offsets[i]:offsets[i+1]]).
+Docids map to rows through the same open-addressing FNV-1a table as the
+feature store. Reading a document is a hash probe plus one slice and UTF-8
+decode per field: nothing is parsed, and the blobs stay in the page cache,
+shared by every worker process on the host.
+
+On-disk layout (one directory):
+    meta.json              count, fields, table size
+    docids.npy             (count,) fixed-width bytes docid of each row
+    hash_keys.npy          (table_size,) uint64 docid hashes (0 = empty slot)
+    hash_rows.npy          (table_size,) int32 row of each slot
+    <field>.bin            concatenated UTF-8 values of the field
+    <field>.offsets.npy    (count + 1,) int64 byte offsets into <field>.bin
+"""
+import json
+import mmap
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from core.processing.hashing import build_hash_table, encode_docids, fnv1a, fnv1a_hash, lookup_rows
+
+FIELDS = ["url", "title", "body"]
+
+
+def _map(path: Path):
+    """Read-only mapping of a blob (an empty file can't be mapped)"""
+    with open(path, "rb") as f:
+        if f.seek(0, 2) == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class DocumentStore:
+    def __init__(self, path: str):
+        """Open a document store directory (all files memory-mapped)"""
+        store_dir = Path(path)
+        with open(store_dir / "meta.json") as f:
+            self.meta = json.load(f)
+        self.fields: List[str] = self.meta["fields"]
+        self.docids = np.load(store_dir / "docids.npy", mmap_mode="r")
+        self.hash_keys = np.load(store_dir / "hash_keys.npy", mmap_mode="r")
+        self.hash_rows = np.load(store_dir / "hash_rows.npy", mmap_mode="r")
+        self._mask = len(self.hash_keys) - 1
+        self._blobs = {field: _map(store_dir / f"{field}.bin") for field in self.fields}
+        self._offsets = {
+            field: np.load(store_dir / f"{field}.offsets.npy", mmap_mode="r") for field in self.fields
+        }
+
+    def __len__(self) -> int:
+        return len(self.docids)
+
+    def _row(self, docid: str) -> int:
+        """Row of a single docid, -1 if unknown"""
+        key = docid.encode("utf-8")
+        h = fnv1a(key)
+        slot = h & self._mask
+        while True:
+            slot_key = int(self.hash_keys[slot])
+            if slot_key == 0:
+                return -1
+            if slot_key == h:
+                row = int(self.hash_rows[slot])
+                # Guard against 64-bit hash collisions
+                return row if self.docids[row] == key else -1
+            slot = (slot + 1) & self._mask
+
+    def _documents(self, docids: Sequence[str], rows: np.ndarray) -> Dict[str, Dict[str, Any]]:
+        """Slice every field of the given (known) rows out of the blobs"""
+        documents = {docid: {"docid": docid} for docid in docids}
+        for field in self.fields:
+            blob, offsets = self._blobs[field], self._offsets[field]
+            starts, ends = offsets[rows].tolist(), offsets[rows + 1].tolist()
+            for docid, start, end in zip(docids, starts, ends):
+                documents[docid][field] = blob[start:end].decode("utf-8")
+        return documents
+
+    def get(self, docid: str) -> Optional[Dict[str, Any]]:
+        """Document with all stored fields, None if unknown"""
+        row = self._row(docid)
+        if row < 0:
+            return None
+        document = {"docid": docid}
+        for field in self.fields:
+            offsets = self._offsets[field]
+            document[field] = self._blobs[field][int(offsets[row]):int(offsets[row + 1])].decode("utf-8")
+        return document
+
+    def get_many(self, docids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Documents for several docids, keyed by docid like
+        `ElasticsearchClient.get_documents`; unknown docids are left out
+        """
+        if not docids:
+            return {}
+        rows = lookup_rows(docids, self.docids, self.hash_keys, self.hash_rows)
+        found = rows >= 0
+        return self._documents([docid for docid, hit in zip(docids, found) if hit], rows[found])
+
+
+def write_document_store(batches: Iterable[pa.RecordBatch], path: str, fields: Sequence[str] = FIELDS) -> Dict[str, Any]:
+    """
+    Write a store directory from Arrow batches with a `docid` column and `fields`.
+
+    Field values are appended to the blobs straight from the Arrow string
+    buffers, so only the docids are held in memory while writing. Missing
+    values are stored as "".
+    """
+    store_dir = Path(path)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    blobs = {field: open(store_dir / f"{field}.bin", "wb") for field in fields}
+    offsets = {field: [np.zeros(1, dtype=np.int64)] for field in fields}
+    positions = dict.fromkeys(fields, 0)
+    docids = []
+    try:
+        for batch in batches:
+            docids.extend(batch.column(batch.schema.get_field_index("docid")).to_pylist())
+            for field in fields:
+                values = pc.fill_null(batch.column(batch.schema.get_field_index(field)), "").cast(pa.large_string())
+                value_offsets = np.frombuffer(values.buffers()[1], dtype=np.int64)[values.offset:values.offset + len(values) + 1]
+                data = values.buffers()[2]
+                start, end = int(value_offsets[0]), int(value_offsets[-1])
+                if data is not None and end > start:
+                    blobs[field].write(memoryview(data)[start:end])
+                offsets[field].append(value_offsets[1:] - start + positions[field])
+                positions[field] += end - start
+    finally:
+        for blob in blobs.values():
+            blob.close()
+
+    encoded = encode_docids(docids)
+    hash_keys, hash_rows = build_hash_table(fnv1a_hash(encoded))
+    np.save(store_dir / "docids.npy", encoded)
+    np.save(store_dir / "hash_keys.npy", hash_keys)
+    np.save(store_dir / "hash_rows.npy", hash_rows)
+    for field in fields:
+        np.save(store_dir / f"{field}.offsets.npy", np.concatenate(offsets[field]))
+    meta = {"count": len(docids), "fields": list(fields), "table_size": len(hash_keys)}
+    with open(store_dir / "meta.json", "w") as f:
+        json.dump(meta, f)
+    return meta
@@ -0,0 +1,156 @@
+"""
+Query-time encoder that micro-batches concurrent requests.
+
+Callers `await encode(text)` one query at a time. Queries are first looked up
+in an LRU cache (keyed by the cleaned query text, so head queries never reach
+the model); misses are queued and a single background task drains the queue
+into batches of up to `max_batch_size`, waiting at most `max_wait` for a batch
+to fill. Each batch is encoded in a worker thread, so the event loop is never
+blocked and concurrent tail queries share one model call. Identical queries
+that arrive while the first is being encoded wait on the same future.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.embeddings.encoder import TextEncoder
+from core.observability.metrics import (
+    QUERY_ENCODER_BATCH_SIZE,
+    QUERY_ENCODER_CACHE,
+    QUERY_ENCODER_QUEUE_WAIT,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BatchingQueryEncoder:
+    def __init__(
+        self,
+        encoder: TextEncoder,
+        max_batch_size: int = 32,
+        max_wait: float = 0.002,
+        cache_size: int = 10_000,
+        executor: Optional[Executor] = None
+    ):
+        """
+        Args:
+            encoder: Underlying encoder (must match the vector index)
+            max_batch_size: Most queries encoded in one call
+            max_wait: Seconds the first query of a batch waits for others to join
+            cache_size: Number of query vectors kept in the LRU cache (0 disables it)
+            executor: Pool for encode calls; None uses the loop's default thread pool
+        """
+        self.encoder = encoder
+        self.dim = encoder.dim
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.cache_size = cache_size
+        self.executor = executor
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _cache_get(self, key: str) -> Optional[np.ndarray]:
+        vector = self._cache.get(key)
+        if vector is not None:
+            self._cache.move_to_end(key)
+        return vector
+
+    def _cache_put(self, key: str, vector: np.ndarray) -> None:
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = vector
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _ensure_worker(self) -> None:
+        # The queue and task belong to one event loop; rebuild them if we're called from another
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._inflight = {}
+            self._worker = loop.create_task(self._run())
+
+    async def encode(self, text: str) -> np.ndarray:
+        """Vector for one query, from the cache or a shared batch"""
+        vector = self._cache_get(text)
+        if vector is not None:
+            QUERY_ENCODER_CACHE.labels(result="hit").inc()
+            return vector
+        QUERY_ENCODER_CACHE.labels(result="miss").inc()
+
+        self._ensure_worker()
+        future = self._inflight.get(text)
+        if future is None:
+            future = self._loop.create_future()
+            self._inflight[text] = future
+            self._queue.put_nowait((text, future, time.perf_counter()))
+        # shield: one caller being cancelled must not cancel the shared result
+        return await asyncio.shield(future)
+
+    async def encode_many(self, texts: List[str]) -> List[np.ndarray]:
+        return await asyncio.gather(*(self.encode(text) for text in texts))
+
+    async def _next_batch(self) -> List[Tuple[str, asyncio.Future, float]]:
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            started = time.perf_counter()
+            for _, _, enqueued in batch:
+                QUERY_ENCODER_QUEUE_WAIT.observe(started - enqueued)
+            QUERY_ENCODER_BATCH_SIZE.observe(len(batch))
+
+            texts = [text for text, _, _ in batch]
+            try:
+                vectors = await loop.run_in_executor(self.executor, self.encoder.encode, texts)
+            except Exception as e:
+                logger.error(f"Query encoding failed for a batch of {len(texts)}: {e}")
+                for text, future, _ in batch:
+                    self._inflight.pop(text, None)
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (text, future, _), vector in zip(batch, vectors):
+                self._cache_put(text, vector)
+                self._inflight.pop(text, None)
+                if not future.done():
+                    future.set_result(vector)
+
+    async def close(self) -> None:
+        """Stop the batching task; queries still waiting for a vector fail"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        # Queued and mid-batch queries alike have their future in _inflight
+        for future in self._inflight.values():
+            if not future.done():
+                future.set_exception(RuntimeError("Query encoder closed"))
+        self._inflight = {}
+        self._queue = None
@@ -0,0 +1,69 @@
+"""
+Text encoders producing L2-normalized float32 embeddings.
+
+`HashingEncoder` needs no model download: it hashes word uni/bigrams into a
+fixed number of signed buckets (a random projection of the bag of words), which
+gives a usable lexical-semantic baseline on CPU. `SentenceTransformerEncoder`
+wraps a sentence-transformers model and is only available when that optional
+package is installed.
+"""
+from abc import ABC, abstractmethod
+from typing import List
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+
+
+class TextEncoder(ABC):
+    dim: int
+
+    @abstractmethod
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into a (len(texts), dim) float32 array of unit vectors"""
+        pass
+
+
+class HashingEncoder(TextEncoder):
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.vectorizer = HashingVectorizer(
+            n_features=dim,
+            ngram_range=(1, 2),
+            stop_words="english",
+            alternate_sign=True,
+            norm="l2",
+            dtype=np.float32
+        )
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.vectorizer.transform(texts).toarray()
+
+
+class SentenceTransformerEncoder(TextEncoder):
+    def __init__(self, model_name: str, device: str = "cpu"):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "sentence-transformers is required for this encoder: pip install sentence-transformers"
+            ) from e
+        self.model = SentenceTransformer(model_name, device=device)
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(
+            texts,
+            batch_size=len(texts),
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        ).astype(np.float32, copy=False)
+
+
+def load_encoder(backend: str, model_name: str = "", dim: int = 384) -> TextEncoder:
+    """Build the encoder selected in settings ("hashing" or "sentence_transformers")"""
+    if backend == "hashing":
+        return HashingEncoder(dim=dim)
+    if backend == "sentence_transformers":
+        return SentenceTransformerEncoder(model_name)
+    raise ValueError(f"Unknown encoder backend: {backend}")
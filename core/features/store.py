@@ -0,0 +1,80 @@
+"""
+Memory-mapped per-document feature store for learning-to-rank.
+
+Features are stored column by column, one .npy per feature, with row i
+describing the document at dense index i. A docid -> index hash table (open
+addressing over 64-bit FNV-1a hashes) is stored next to them. Both lookup and
+gather are vectorized: hashing runs over a fixed-width byte matrix of the
+docids, probing advances all unresolved keys at once, and features for every
+candidate come out of one fancy-indexing call per column.
+
+On-disk layout (one directory):
+    meta.json            count, columns, table size
+    docids.npy           (count,) fixed-width bytes docid of each row
+    hash_keys.npy        (table_size,) uint64 docid hashes (0 = empty slot)
+    hash_rows.npy        (table_size,) int32 row of each slot
+    <column>.npy         (count,) one per feature column
+
+All arrays are opened read-only with mmap, so worker processes share them.
+"""
+import json
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from core.processing.hashing import build_hash_table, encode_docids, fnv1a_hash, lookup_rows
+
+
+class FeatureStore:
+    def __init__(self, path: str):
+        """Open a feature store directory (all arrays memory-mapped)"""
+        store_dir = Path(path)
+        with open(store_dir / "meta.json") as f:
+            self.meta = json.load(f)
+        self.columns: List[str] = self.meta["columns"]
+        self.docids = np.load(store_dir / "docids.npy", mmap_mode="r")
+        self.hash_keys = np.load(store_dir / "hash_keys.npy", mmap_mode="r")
+        self.hash_rows = np.load(store_dir / "hash_rows.npy", mmap_mode="r")
+        self._data: Dict[str, np.ndarray] = {
+            column: np.load(store_dir / f"{column}.npy", mmap_mode="r") for column in self.columns
+        }
+
+    def __len__(self) -> int:
+        return len(self.docids)
+
+    def lookup(self, docids: Sequence[str]) -> np.ndarray:
+        """Dense row index of each docid, -1 if unknown"""
+        return lookup_rows(docids, self.docids, self.hash_keys, self.hash_rows)
+
+    def gather(self, rows: np.ndarray, columns: Sequence[str] = None) -> np.ndarray:
+        """(len(rows), len(columns)) float32 feature matrix; rows of -1 are all zeros"""
+        columns = columns or self.columns
+        rows = np.asarray(rows, dtype=np.int64)
+        valid = rows >= 0
+        safe_rows = np.where(valid, rows, 0)
+        features = np.empty((len(rows), len(columns)), dtype=np.float32)
+        for j, column in enumerate(columns):
+            features[:, j] = self._data[column][safe_rows]
+        features[~valid] = 0.0
+        return features
+
+    def features_for(self, docids: Sequence[str], columns: Sequence[str] = None) -> np.ndarray:
+        """Feature matrix for a list of candidate docids"""
+        return self.gather(self.lookup(docids), columns)
+
+
+def write_feature_store(path: str, docids: np.ndarray, features: Dict[str, np.ndarray]) -> None:
+    """Write docids, their hash table and feature columns as a store directory"""
+    store_dir = Path(path)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    docids = encode_docids(list(docids))
+    hash_keys, hash_rows = build_hash_table(fnv1a_hash(docids))
+
+    np.save(store_dir / "docids.npy", docids)
+    np.save(store_dir / "hash_keys.npy", hash_keys)
+    np.save(store_dir / "hash_rows.npy", hash_rows)
+    for column, values in features.items():
+        np.save(store_dir / f"{column}.npy", values)
+    with open(store_dir / "meta.json", "w") as f:
+        json.dump({"count": len(docids), "columns": list(features), "table_size": len(hash_keys)}, f)
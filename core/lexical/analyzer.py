@@ -0,0 +1,51 @@
+"""
+Python equivalent of the `custom_baseline_analyzer` from Settings.es_mappings:
+standard tokenizer, then lowercase, asciifolding and the default English stop
+filter. Used by the embedded BM25 engine so that its index and queries are
+analyzed the way Elasticsearch would analyze them.
+
+The standard tokenizer (Unicode word segmentation) is approximated by word
+runs that may be joined by an apostrophe or period ("don't", "u.s.a",
+"3.14", "example.com"); everything else splits, as it does in ES.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from core.processing.unicode import combining_marks
+
+TOKEN_PATTERN = re.compile(r"\w+(?:['.]\w+)*")
+
+# Lucene's default English stop set (the `stop` filter's `_english_` list)
+STOP_WORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'if',
+    'in', 'into', 'is', 'it', 'no', 'not', 'of', 'on', 'or', 'such', 'that',
+    'the', 'their', 'then', 'there', 'these', 'they', 'this', 'to', 'was',
+    'will', 'with'
+})
+
+# Letters asciifolding maps that have no NFKD decomposition
+_FOLDINGS = {
+    'ß': 'ss', 'æ': 'ae', 'œ': 'oe', 'ø': 'o', 'đ': 'd', 'ð': 'd', 'ł': 'l',
+    'þ': 'th', 'ı': 'i', '’': "'", '‘': "'",
+}
+
+@lru_cache(maxsize=None)
+def folding_table() -> Dict[int, Optional[str]]:
+    """str.translate table dropping combining marks and folding the letters above"""
+    table = dict(combining_marks())
+    table.update({ord(char): folded for char, folded in _FOLDINGS.items()})
+    return table
+
+def fold_to_ascii(text: str) -> str:
+    """Strip accents from (lowercase) text, e.g. "café" -> "cafe" """
+    if text.isascii():
+        return text
+    return unicodedata.normalize('NFKD', text).translate(folding_table())
+
+def analyze(text: Optional[str]) -> List[str]:
+    """Tokens of `text` as custom_baseline_analyzer would index them"""
+    if not text:
+        return []
+    return [token for token in TOKEN_PATTERN.findall(fold_to_ascii(text.lower())) if token not in STOP_WORDS]
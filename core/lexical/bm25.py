@@ -0,0 +1,528 @@
+"""
+Embedded BM25 engine: an inverted index over the corpus `title` and `body`
+fields that answers the subset of the query DSL the pipeline sends to
+Elasticsearch (multi_match / match / match_phrase leaves combined in a bool
+must/should), for single-node deployments and hermetic benchmarks.
+
+The index is built offline (data_processing/build_bm25_index.py) with the
+same analysis as `custom_baseline_analyzer` and stored as flat arrays in one
+directory, all memory-mapped at load time:
+
+    meta.json                  num_docs, fields, k1, b, block_size, average field lengths
+    docids.npy                 (N,) docid of each internal document number
+    terms.npy                  (V,) sorted fixed-width bytes vocabulary shared by all fields
+    {field}.term_blocks.npy    (V + 1,) int64; blocks of term t are [term_blocks[t], term_blocks[t+1])
+    {field}.block_base.npy     (B,) uint32 first document number of each block
+    {field}.block_offsets.npy  (B + 1,) int64; postings of block j are [block_offsets[j], block_offsets[j+1])
+    {field}.block_max.npy      (B,) float32 largest BM25 tf-norm in the block
+    {field}.deltas.npy         (P,) uint16 document number minus its block's base
+    {field}.tfs.npy            (P,) uint8 term frequency (saturated at 255)
+    {field}.lengths.npy        (N,) uint32 field length in tokens
+
+Postings are frame-of-reference compressed: a block holds at most
+`block_size` postings of one term spanning fewer than 65536 document
+numbers, so a posting costs 3 bytes instead of 8.
+
+Scoring follows Elasticsearch's BM25 similarity:
+    idf = ln(1 + (N - df + 0.5) / (df + 0.5))
+    tf-norm = tf / (tf + k1 * (1 - b + b * field_length / average_length))
+Field lengths are exact rather than Lucene's one-byte norms, so scores can
+differ from ES in the last digits.
+
+Top-k retrieval uses block-max MaxScore: query terms are expanded in order
+of their score upper bound, each newly seen document is scored completely
+by binary-searching the other terms' postings, and expansion stops once no
+unseen document can beat the current k-th score. Blocks whose upper bound
+can't beat it are never decoded.
+"""
+import json
+import logging
+import tempfile
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.lexical.analyzer import analyze
+
+logger = logging.getLogger(__name__)
+
+MAX_DELTA = np.iinfo(np.uint16).max
+FIELD_ARRAYS = ("term_blocks", "block_base", "block_offsets", "block_max", "deltas", "tfs", "lengths")
+
+
+def _ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Concatenation of arange(start, end) for each pair, without a Python loop"""
+    sizes = ends - starts
+    return np.repeat(starts - np.cumsum(sizes) + sizes, sizes) + np.arange(sizes.sum())
+
+
+def _as_list(clauses: Any) -> List[Any]:
+    """bool clauses may be a single query or a list of them"""
+    if clauses is None:
+        return []
+    return clauses if isinstance(clauses, list) else [clauses]
+
+
+def _parse_field(spec: str) -> Tuple[str, float]:
+    """'title^2' -> ('title', 2.0)"""
+    name, _, boost = spec.partition("^")
+    return name, float(boost) if boost else 1.0
+
+
+@dataclass
+class _Clause:
+    """One scoring clause: a match over some fields, combined across fields with a tie breaker"""
+    terms: List[int]
+    fields: List[Tuple[str, float]]
+    boost: float = 1.0
+    tie_breaker: float = 0.0  # 0: best field only (best_fields), 1: sum of fields (most_fields)
+    required: bool = True
+    all_terms: bool = False  # operator "and" / phrase
+
+
+class _FieldIndex:
+    """Postings and norms of one field"""
+
+    def __init__(self, index_dir: Path, name: str, num_docs: int, average_length: float, k1: float, b: float):
+        for array in FIELD_ARRAYS:
+            setattr(self, array, np.load(index_dir / f"{name}.{array}.npy", mmap_mode="r"))
+        self.df = np.diff(np.asarray(self.block_offsets)[np.asarray(self.term_blocks)])
+        self.idf = np.log1p((num_docs - self.df + 0.5) / (self.df + 0.5)).astype(np.float32)
+        # Denominator term k1 * (1 - b + b * length / average) per document
+        self.norms = (k1 * (1 - b + b * np.asarray(self.lengths, dtype=np.float32) / max(average_length, 1e-9))).astype(np.float32)
+
+    def blocks(self, term: int) -> np.ndarray:
+        return np.arange(self.term_blocks[term], self.term_blocks[term + 1])
+
+    def max_norm(self, term: int) -> float:
+        start, end = int(self.term_blocks[term]), int(self.term_blocks[term + 1])
+        return float(self.block_max[start:end].max()) if end > start else 0.0
+
+    def decode(self, blocks: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Document numbers and term frequencies of the postings in `blocks` (ascending)"""
+        starts = self.block_offsets[blocks]
+        ends = self.block_offsets[blocks + 1]
+        positions = _ranges(starts, ends)
+        docs = np.repeat(self.block_base[blocks].astype(np.int64), ends - starts) + self.deltas[positions]
+        return docs, self.tfs[positions]
+
+    def tf_norms(self, term: int, docs: np.ndarray) -> np.ndarray:
+        """BM25 tf-norm of `term` in each of the sorted document numbers (0 where absent)"""
+        blocks = self.blocks(term)
+        if not len(blocks) or not len(docs):
+            return np.zeros(len(docs), dtype=np.float32)
+        # Only decode the blocks that can contain one of the documents
+        owner = np.searchsorted(self.block_base[blocks[0]:blocks[-1] + 1], docs, side="right") - 1
+        needed = blocks[0] + np.unique(owner[owner >= 0])
+        if not len(needed):
+            return np.zeros(len(docs), dtype=np.float32)
+        posting_docs, tfs = self.decode(needed)
+        position = np.minimum(np.searchsorted(posting_docs, docs), len(posting_docs) - 1)
+        found = posting_docs[position] == docs
+        tf = np.where(found, tfs[position], 0).astype(np.float32)
+        return tf / (tf + self.norms[docs])
+
+
+class BM25Index:
+    def __init__(self, path: str):
+        index_dir = Path(path)
+        with open(index_dir / "meta.json") as f:
+            self.meta = json.load(f)
+        self.num_docs = self.meta["num_docs"]
+        self.docids = np.load(index_dir / "docids.npy", mmap_mode="r")
+        self.terms = np.load(index_dir / "terms.npy", mmap_mode="r")
+        self.fields = {
+            name: _FieldIndex(index_dir, name, self.num_docs, self.meta["average_lengths"][name], self.meta["k1"], self.meta["b"])
+            for name in self.meta["fields"]
+        }
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        return cls(path)
+
+    def __len__(self) -> int:
+        return self.num_docs
+
+    ### === QUERY COMPILATION === ###
+    def _term_ids(self, text: str) -> List[int]:
+        """Vocabulary ids of the analyzed query text; -1 for terms not in the index"""
+        ids = []
+        for token in analyze(text):
+            key = token.encode("utf-8")
+            i = int(np.searchsorted(self.terms, key)) if len(key) <= self.terms.dtype.itemsize else len(self.terms)
+            ids.append(i if i < len(self.terms) and self.terms[i] == key else -1)
+        return ids
+
+    def _leaf(self, query: Dict[str, Any], required: bool) -> _Clause:
+        (kind, spec), = query.items()
+        if kind == "multi_match":
+            fields = [_parse_field(field) for field in spec.get("fields", list(self.fields))]
+            match_type = spec.get("type", "best_fields")
+            if match_type not in ("best_fields", "most_fields", "phrase"):
+                raise ValueError(f"Unsupported multi_match type: {match_type}")
+            tie_breaker = spec.get("tie_breaker", 1.0 if match_type == "most_fields" else 0.0)
+            text = spec["query"]
+        elif kind in ("match", "match_phrase"):
+            (field, spec), = spec.items()
+            spec = spec if isinstance(spec, dict) else {"query": spec}
+            fields, match_type, tie_breaker, text = [(field, 1.0)], kind, 0.0, spec["query"]
+        else:
+            raise ValueError(f"Unsupported query type for the embedded engine: {kind}")
+
+        unknown = [name for name, _ in fields if name not in self.fields]
+        if unknown:
+            raise ValueError(f"Fields not in the embedded index: {unknown}")
+        return _Clause(
+            terms=self._term_ids(text),
+            fields=fields,
+            boost=float(spec.get("boost", 1.0)),
+            tie_breaker=float(tie_breaker),
+            required=required,
+            # Positions aren't indexed, so a phrase is matched as all of its terms
+            all_terms=match_type in ("phrase", "match_phrase") or spec.get("operator", "or").lower() == "and"
+        )
+
+    def _compile(self, query: Any) -> Optional[List[_Clause]]:
+        """Clauses of the query, or None if it can't match any document"""
+        if isinstance(query, str):
+            query = {"multi_match": {"query": query, "fields": list(self.fields)}}
+        if "bool" in query:
+            spec = query["bool"]
+            unsupported = set(spec) - {"must", "should"}
+            if unsupported:
+                raise ValueError(f"Unsupported bool clauses for the embedded engine: {sorted(unsupported)}")
+            leaves = [(leaf, True) for leaf in _as_list(spec.get("must"))] + [(leaf, False) for leaf in _as_list(spec.get("should"))]
+        else:
+            leaves = [(query, True)]
+
+        clauses = []
+        for leaf, required in leaves:
+            clause = self._leaf(leaf, required)
+            known = [term for term in clause.terms if term >= 0]
+            if not known or (clause.all_terms and len(known) < len(clause.terms)):
+                # The clause matches nothing: fatal if required, ignorable otherwise
+                if required:
+                    return None
+                continue
+            clause.terms = known
+            clauses.append(clause)
+        return clauses or None
+
+    ### === SCORING === ###
+    def _term_bounds(self, clauses: List[_Clause]) -> Tuple[Dict[int, float], Dict[int, float]]:
+        """
+        Per term: the most it can add to a document's score (U), and the
+        same without the tf-norm factor (W), so W * block_max bounds what it
+        adds to any document in that block.
+        """
+        upper: Dict[int, float] = {}
+        weight: Dict[int, float] = {}
+        for clause in clauses:
+            for term in clause.terms:
+                bounds = [boost * float(self.fields[field].idf[term]) * self.fields[field].max_norm(term) for field, boost in clause.fields]
+                weights = [boost * float(self.fields[field].idf[term]) for field, boost in clause.fields]
+                # A clause score is (1 - tie) * max over fields + tie * sum over fields
+                tie = clause.tie_breaker
+                upper[term] = upper.get(term, 0.0) + clause.boost * ((1 - tie) * max(bounds) + tie * sum(bounds))
+                weight[term] = weight.get(term, 0.0) + clause.boost * ((1 - tie) * max(weights) + tie * sum(weights))
+        return upper, weight
+
+    def _score(self, clauses: List[_Clause], docs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Scores of the sorted document numbers `docs` and whether each matches the query"""
+        norms: Dict[Tuple[str, int], np.ndarray] = {}
+
+        def tf_norms(field: str, term: int) -> np.ndarray:
+            if (field, term) not in norms:
+                norms[field, term] = self.fields[field].tf_norms(term, docs)
+            return norms[field, term]
+
+        scores = np.zeros(len(docs), dtype=np.float32)
+        matches = np.ones(len(docs), dtype=bool)
+        any_optional = np.zeros(len(docs), dtype=bool)
+        has_required = False
+        for clause in clauses:
+            field_scores = []
+            present = np.ones(len(docs), dtype=bool) if clause.all_terms else np.zeros(len(docs), dtype=bool)
+            for term in clause.terms:
+                term_present = np.zeros(len(docs), dtype=bool)
+                for field, _ in clause.fields:
+                    term_present |= tf_norms(field, term) > 0
+                present = (present & term_present) if clause.all_terms else (present | term_present)
+            for field, boost in clause.fields:
+                field_index = self.fields[field]
+                field_score = np.zeros(len(docs), dtype=np.float32)
+                for term in clause.terms:
+                    field_score += field_index.idf[term] * tf_norms(field, term)
+                field_scores.append(boost * field_score)
+            field_scores = np.stack(field_scores)
+            best = field_scores.max(axis=0)
+            clause_score = clause.boost * (best + clause.tie_breaker * (field_scores.sum(axis=0) - best))
+            scores += np.where(present, clause_score, 0)
+            if clause.required:
+                has_required = True
+                matches &= present
+            else:
+                any_optional |= present
+        return scores, (matches if has_required else any_optional)
+
+    def _generating_terms(self, clauses: List[_Clause]) -> List[int]:
+        """Terms whose postings contain every matching document"""
+        required = [clause for clause in clauses if clause.required]
+        if not required:
+            return sorted({term for clause in clauses for term in clause.terms})
+
+        def cost(clause: _Clause, term: int) -> int:
+            return sum(int(self.fields[field].df[term]) for field, _ in clause.fields)
+
+        # The cheapest required clause; with "all terms" its rarest term alone suffices
+        clause = min(required, key=lambda c: min(cost(c, t) for t in c.terms) if c.all_terms else sum(cost(c, t) for t in c.terms))
+        if clause.all_terms:
+            return [min(clause.terms, key=lambda t: cost(clause, t))]
+        return sorted(set(clause.terms))
+
+    def _top_k(self, clauses: List[_Clause], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        upper, weight = self._term_bounds(clauses)
+        generating = sorted(self._generating_terms(clauses), key=lambda term: -upper[term])
+        term_fields = {
+            term: sorted({field for clause in clauses if term in clause.terms for field, _ in clause.fields})
+            for term in generating
+        }
+
+        top_docs = np.array([], dtype=np.int64)
+        top_scores = np.array([], dtype=np.float32)
+        visited = np.array([], dtype=np.int64)
+        threshold = -np.inf
+        # Most an unseen document can score: it contains none of the expanded terms
+        remaining = sum(upper.values())
+        for term in generating:
+            if len(top_docs) >= k and remaining <= threshold:
+                break
+            others = remaining - upper[term]
+            found, found_norms = [], []
+            for field in term_fields[term]:
+                field_index = self.fields[field]
+                blocks = field_index.blocks(term)
+                if len(top_docs) >= k:
+                    # Everything in a skipped block scores at most the threshold, so it can be dropped for good
+                    blocks = blocks[weight[term] * field_index.block_max[blocks] + others > threshold]
+                if len(blocks):
+                    docs, tfs = field_index.decode(blocks)
+                    found.append(docs)
+                    found_norms.append(tfs / (tfs + field_index.norms[docs]))
+            remaining = others
+            if not found:
+                continue
+
+            candidates, inverse = np.unique(np.concatenate(found), return_inverse=True)
+            best_norm = np.zeros(len(candidates), dtype=np.float32)
+            np.maximum.at(best_norm, inverse, np.concatenate(found_norms))
+            if len(visited):
+                position = np.minimum(np.searchsorted(visited, candidates), len(visited) - 1)
+                new = visited[position] != candidates
+                candidates, best_norm = candidates[new], best_norm[new]
+            if not len(candidates):
+                continue
+            visited = np.union1d(visited, candidates)
+
+            if len(top_docs) >= k:
+                # A new document has none of the terms expanded before this one: this term's
+                # actual contribution plus the bound of the terms not expanded yet caps its score
+                candidates = candidates[weight[term] * best_norm + others > threshold]
+                if not len(candidates):
+                    continue
+
+            scores, matches = self._score(clauses, candidates)
+            top_docs = np.concatenate([top_docs, candidates[matches]])
+            top_scores = np.concatenate([top_scores, scores[matches]])
+            if len(top_docs) > k:
+                keep = np.argpartition(-top_scores, k - 1)[:k]
+                top_docs, top_scores = top_docs[keep], top_scores[keep]
+            if len(top_docs) >= k:
+                threshold = float(top_scores.min())
+
+        # Highest score first, ties in index order (as ES breaks them)
+        order = np.lexsort((top_docs, -top_scores))
+        return top_docs[order], top_scores[order]
+
+    def search(self, query: Any, size: int = 10, offset: int = 0) -> List[Tuple[str, float]]:
+        """
+        Top documents for an ES-style query.
+
+        Args:
+            query: Query dict (multi_match, match, match_phrase, or a bool of
+                those in must/should), or a plain query string
+            size: Number of results to return
+            offset: Starting offset for pagination
+
+        Returns:
+            (docid, score) pairs, best first
+        """
+        if size + offset <= 0:
+            return []
+        clauses = self._compile(query)
+        if clauses is None:
+            return []
+        docs, scores = self._top_k(clauses, size + offset)
+        return [
+            (self.docids[doc].decode("utf-8"), float(score))
+            for doc, score in zip(docs[offset:], scores[offset:])
+        ]
+
+
+def write_bm25_index(
+    batches: Iterable[Dict[str, Sequence[Optional[str]]]],
+    output_dir: str,
+    fields: Sequence[str] = ("title", "body"),
+    k1: float = 1.2,
+    b: float = 0.75,
+    block_size: int = 128
+) -> Dict[str, Any]:
+    """
+    Build a BM25 index from column batches of documents.
+
+    Postings are collected in one pass into per-batch runs on disk, then
+    scattered into their final (term, document) order using the document
+    frequencies counted in the first pass, so memory stays proportional to
+    the vocabulary and the final posting arrays.
+
+    Args:
+        batches: Iterable of {"docid": [...], field: [...], ...} columns
+        output_dir: Index directory
+        fields: Text fields to index
+        k1: BM25 term-frequency saturation
+        b: BM25 length normalization
+        block_size: Postings per compressed block (at most)
+
+    Returns:
+        The index metadata
+    """
+    index_dir = Path(output_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+
+    vocabulary: Dict[str, int] = {}
+    doc_freqs = {field: np.zeros(0, dtype=np.int64) for field in fields}
+    lengths: Dict[str, List[np.ndarray]] = {field: [] for field in fields}
+    docids: List[str] = []
+
+    with tempfile.TemporaryDirectory(dir=index_dir, prefix="runs-") as tmp_dir:
+        runs = []
+        for batch in batches:
+            base = len(docids)
+            docids.extend(batch["docid"])
+            for field in fields:
+                term_ids, doc_nums, tfs, field_lengths = [], [], [], []
+                for i, text in enumerate(batch[field]):
+                    counts = Counter(analyze(text))
+                    field_lengths.append(sum(counts.values()))
+                    for term, tf in counts.items():
+                        term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+                        tfs.append(tf)
+                    doc_nums.extend([base + i] * len(counts))
+
+                run = np.array([term_ids, doc_nums, tfs], dtype=np.int64).reshape(3, -1)
+                run_path = Path(tmp_dir) / f"{field}-{len(runs)}.npy"
+                np.save(run_path, run)
+                runs.append((field, run_path))
+                df = doc_freqs[field]
+                doc_freqs[field] = np.pad(df, (0, len(vocabulary) - len(df))) + np.bincount(run[0], minlength=len(vocabulary))
+                lengths[field].append(np.array(field_lengths, dtype=np.uint32))
+            logger.info(f"Indexed {len(docids)} documents, {len(vocabulary)} terms")
+
+        num_terms = len(vocabulary)
+        terms = np.array([term.encode("utf-8") for term in vocabulary], dtype="S")
+        order = np.argsort(terms, kind="stable")
+        rank = np.empty(num_terms, dtype=np.int64)
+        rank[order] = np.arange(num_terms)
+        np.save(index_dir / "terms.npy", terms[order])
+        np.save(index_dir / "docids.npy", np.array(docids, dtype="S"))
+
+        meta = {
+            "num_docs": len(docids),
+            "num_terms": num_terms,
+            "fields": list(fields),
+            "average_lengths": {},
+            "k1": k1,
+            "b": b,
+            "block_size": block_size,
+        }
+        for field in fields:
+            field_lengths = np.concatenate(lengths[field]) if lengths[field] else np.array([], dtype=np.uint32)
+            nonempty = field_lengths[field_lengths > 0]
+            average_length = float(nonempty.mean()) if len(nonempty) else 0.0
+            meta["average_lengths"][field] = average_length
+            _write_field(
+                index_dir, field, [path for run_field, path in runs if run_field == field],
+                np.pad(doc_freqs[field], (0, num_terms - len(doc_freqs[field])))[order], rank,
+                field_lengths, average_length, k1, b, block_size
+            )
+
+    with open(index_dir / "meta.json", "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def _write_field(
+    index_dir: Path,
+    field: str,
+    run_paths: List[Path],
+    doc_freqs: np.ndarray,
+    rank: np.ndarray,
+    lengths: np.ndarray,
+    average_length: float,
+    k1: float,
+    b: float,
+    block_size: int
+) -> None:
+    """Scatter one field's runs into term order, then block-compress the postings"""
+    num_terms = len(doc_freqs)
+    offsets = np.concatenate([[0], np.cumsum(doc_freqs)])
+    docs = np.empty(offsets[-1], dtype=np.int64)
+    tfs = np.empty(offsets[-1], dtype=np.uint8)
+    cursor = offsets[:-1].copy()
+    for run_path in run_paths:
+        term_ids, doc_nums, run_tfs = np.load(run_path)
+        ranks = rank[term_ids]
+        # Runs are in document order, so a stable sort keeps each term's postings ascending
+        by_term = np.argsort(ranks, kind="stable")
+        ranks = ranks[by_term]
+        counts = np.bincount(ranks, minlength=num_terms)
+        group_starts = np.concatenate([[0], np.cumsum(counts)])[:-1]
+        positions = cursor[ranks] + np.arange(len(ranks)) - group_starts[ranks]
+        docs[positions] = doc_nums[by_term]
+        tfs[positions] = np.minimum(run_tfs[by_term], 255)
+        cursor += counts
+
+    # Blocks of at most block_size postings of one term, spanning at most MAX_DELTA documents
+    block_starts: List[int] = []
+    term_blocks = np.zeros(num_terms + 1, dtype=np.int64)
+    for term in range(num_terms):
+        start, end = int(offsets[term]), int(offsets[term + 1])
+        while start < end:
+            stop = min(start + block_size, end)
+            if docs[stop - 1] - docs[start] > MAX_DELTA:
+                stop = start + int(np.searchsorted(docs[start:stop], docs[start] + MAX_DELTA, side="right"))
+            block_starts.append(start)
+            start = stop
+        term_blocks[term + 1] = len(block_starts)
+
+    block_offsets = np.array(block_starts + [len(docs)], dtype=np.int64)
+    block_base = docs[block_offsets[:-1]].astype(np.uint32)
+    deltas = (docs - np.repeat(block_base.astype(np.int64), np.diff(block_offsets))).astype(np.uint16)
+    norms = k1 * (1 - b + b * lengths[docs] / max(average_length, 1e-9))
+    tf_norms = (tfs / (tfs + norms)).astype(np.float32)
+    block_max = np.maximum.reduceat(tf_norms, block_offsets[:-1]) if len(docs) else np.array([], dtype=np.float32)
+
+    arrays = {
+        "term_blocks": term_blocks,
+        "block_base": block_base,
+        "block_offsets": block_offsets,
+        "block_max": block_max.astype(np.float32),
+        "deltas": deltas,
+        "tfs": tfs,
+        "lengths": lengths,
+    }
+    for name in FIELD_ARRAYS:
+        np.save(index_dir / f"{field}.{name}.npy", arrays[name])
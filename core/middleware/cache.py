@@ -1,9 +1,13 @@
 import json
 import logging
+from typing import Any, Dict, Optional
 from fastapi import FastAPI, Request
 from starlette.middleware.base import BaseHTTPMiddleware
 from core.search_api.settings import Settings
+from core.search_api.dependencies import get_filterable_fields, get_query_parser, get_result_cache
+from core.processing.filters import filters_cache_key, filters_from_params, normalize_filters
 from core.clients.redis_client import RedisClient
+from core.observability.metrics import CACHE_LOOKUPS
 
 logging.basicConfig(
     level=logging.INFO,
@@ -11,66 +15,84 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def results_cache_key(query: str, search_type: str, filters: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Cache key for the full (unpaginated) results of an API search; one entry
+    serves every page and page size of the same canonical query.
+    """
+    key = f"results:{search_type}:{get_query_parser().canonical_query(query)}"
+    return f"{key}:{filters_cache_key(filters)}" if filters else key
+
 
 class SearchCacheMiddleware(BaseHTTPMiddleware):
     """
     Middleware that caches 'data' for /search requests in Redis.
     It does NOT cache rendered HTML, so each request can still
     render templates fresh while skipping the expensive data lookup.
+    The /api/search routes resolve their own entries (`results_cache_key`).
     """
 
-    def __init__(self, app: FastAPI):
+    def __init__(self, app: FastAPI, cache: Optional[RedisClient] = None):
         super().__init__(app)
         self.settings = Settings()
-        self.cache = RedisClient(
-            redis_url=self.settings.redis_url,
-            max_queries=self.settings.max_cache_queries,
-            ttl=self.settings.cache_ttl
-        )
+        # Shares the process-wide pool with the batch route (warmed at startup)
+        self.cache = cache or get_result_cache()
         logger.info("Initialized SearchCacheMiddleware with Redis connection")
 
     def _should_cache_path(self, path: str) -> bool:
         """Determine if this path should be cached."""
-        cacheable_paths = {"/api/search", "/search", "/document"}
+        cacheable_paths = {"/search", "/document"}
         return any(path.startswith(p) for p in cacheable_paths)
     
     def _build_cache_key(self, request: Request) -> str:
-        """Build cache key from request parameters."""
-        if request.url.path == "/api/search":
-            # Handle POST request body
-            return f"search:{request.query_params.get('q', '')}:{request.query_params.get('page', '1')}"
-        else:
-            # Handle GET request query params
-            q = request.query_params.get('q', '')
-            page = request.query_params.get('page', '1')
-            return f"search:{q}:{page}"
+        """
+        Build cache key from request parameters. The query is keyed by its
+        cleaned, spelling-corrected form so that typo variants share an entry,
+        and filters by their normalized form.
+        
+        Raises:
+            ValueError: If the request filters are invalid
+        """
+        q = request.query_params.get('q', '')
+        page = request.query_params.get('page', '1')
+        filters = normalize_filters(filters_from_params(request.query_params.multi_items()), get_filterable_fields())
+        key = f"search:{get_query_parser().canonical_query(q)}:{page}"
+        return f"{key}:{filters_cache_key(filters)}" if filters else key
     
     async def dispatch(self, request: Request, call_next):
         if not self._should_cache_path(request.url.path):
             return await call_next(request)
         
-        cache_key = self._build_cache_key(request)
-        logger.info(f"Cache key: {cache_key}")
+        try:
+            cache_key = self._build_cache_key(request)
+        except ValueError:
+            # Invalid filters: nothing to cache, the route rejects the request
+            return await call_next(request)
+        logger.debug(f"Cache key: {cache_key}")
         
         cached_data = await self.cache.get(cache_key)
         if cached_data:
             try:
                 request.state.cache_hit = True
                 request.state.cached_data = json.loads(cached_data)
-                logger.info(f"Cache hit for key: {cache_key}")
+                logger.debug(f"Cache hit for key: {cache_key}")
             except json.JSONDecodeError:
+                request.state.cache_hit = False
                 request.state.cached_data = None
                 logger.error(f"Failed to decode cached data for key: {cache_key}")
         else:
             request.state.cache_hit = False
             request.state.cached_data = None
-            logger.info(f"Cache miss for key: {cache_key}")
+            logger.debug(f"Cache miss for key: {cache_key}")
+        CACHE_LOOKUPS.labels(result="hit" if request.state.cache_hit else "miss").inc()
 
         response = await call_next(request)
+        response.headers["X-Cache"] = "HIT" if request.state.cache_hit else "MISS"
 
         if response.status_code == 200 and not request.state.cache_hit:
             data_to_cache = request.state.cached_data
-            if data_to_cache is not None:
+            # Results cut short by the request deadline aren't worth keeping
+            if data_to_cache is not None and not data_to_cache.get("partial"):
                 try:
                     # Ensure we're caching both full and paginated results
                     if "results" in data_to_cache and "full_results" not in data_to_cache:
@@ -81,7 +103,7 @@ class SearchCacheMiddleware(BaseHTTPMiddleware):
                         value=json.dumps(data_to_cache),
                         ttl=self.settings.cache_ttl
                     )
-                    logger.info(f"Cached new data under key={cache_key}")
+                    logger.debug(f"Cached new data under key={cache_key}")
                 except Exception as e:
                     logger.error(f"Error caching data for key={cache_key}: {e}")
 
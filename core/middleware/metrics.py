@@ -0,0 +1,41 @@
+import time
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from core.observability.metrics import REQUEST_LATENCY, REQUESTS_IN_FLIGHT
+from core.observability.profiler import get_active_profiler
+
+
+class MetricsMiddleware(BaseHTTPMiddleware):
+    """
+    Records request latency per route template and status, and the number
+    of in-flight requests. Routes are labelled by their template
+    (e.g. "/api/search"), never the raw URL, to keep label cardinality bounded.
+    """
+
+    def __init__(self, app: FastAPI):
+        super().__init__(app)
+
+    @staticmethod
+    def _route_label(request: Request) -> str:
+        route = request.scope.get("route")
+        return getattr(route, "path", "unmatched")
+
+    async def dispatch(self, request: Request, call_next):
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            end = time.perf_counter()
+            REQUESTS_IN_FLIGHT.dec()
+            REQUEST_LATENCY.labels(
+                route=self._route_label(request),
+                method=request.method,
+                status=str(status)
+            ).observe(end - start)
+            profiler = get_active_profiler()
+            if profiler is not None:
+                profiler.record_request(start, end)
@@ -0,0 +1,170 @@
+"""
+Prometheus metrics for the search service.
+
+All metrics live in the default registry. When PROMETHEUS_MULTIPROC_DIR is set
+(multi-worker deployments), `render_metrics` aggregates the per-process files
+instead, so every worker's samples are included in a single scrape.
+"""
+import asyncio
+import logging
+import os
+from typing import Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets (seconds) tuned for a search service: sub-ms cache hits up to multi-second outliers
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.075,
+    0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0
+)
+
+REQUEST_LATENCY = Histogram(
+    "search_http_request_duration_seconds",
+    "HTTP request latency by route template, method and status code",
+    ["route", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "search_http_requests_in_flight",
+    "HTTP requests currently being served",
+    multiprocess_mode="livesum",
+)
+PIPELINE_STEP_LATENCY = Histogram(
+    "search_pipeline_step_duration_seconds",
+    "Time spent in each search pipeline step",
+    ["step"],
+    buckets=LATENCY_BUCKETS,
+)
+PIPELINE_DEGRADED = Counter(
+    "search_pipeline_degraded_total",
+    "Pipeline steps skipped or cut short by the request deadline",
+    ["step", "reason"],
+)
+ELASTICSEARCH_LATENCY = Histogram(
+    "search_elasticsearch_request_duration_seconds",
+    "Elasticsearch request latency by operation and outcome",
+    ["operation", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+ELASTICSEARCH_HEDGES = Counter(
+    "search_elasticsearch_hedged_requests_total",
+    "Duplicate reads sent after the hedge delay (outcome=sent) and those that answered first (outcome=won)",
+    ["operation", "outcome"],
+)
+ELASTICSEARCH_CIRCUIT_STATE = Gauge(
+    "search_elasticsearch_circuit_state",
+    "Circuit breaker state per Elasticsearch node: 0 closed, 1 half-open, 2 open",
+    ["node"],
+    multiprocess_mode="max",
+)
+FEDERATED_SHARD_LATENCY = Histogram(
+    "search_federated_shard_duration_seconds",
+    "Per-shard latency of federated searches by outcome (ok, timeout, error)",
+    ["shard", "operation", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+REDIS_LATENCY = Histogram(
+    "search_redis_command_duration_seconds",
+    "Redis command latency by command and outcome",
+    ["command", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+QDRANT_LATENCY = Histogram(
+    "search_qdrant_request_duration_seconds",
+    "Qdrant request latency by operation and outcome",
+    ["operation", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+BM25_LATENCY = Histogram(
+    "search_bm25_request_duration_seconds",
+    "Embedded BM25 engine latency by operation and outcome",
+    ["operation", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "search_cache_lookups_total",
+    "Result cache lookups by result (hit/miss)",
+    ["result"],
+)
+QUERY_ENCODER_BATCH_SIZE = Histogram(
+    "search_query_encoder_batch_size",
+    "Queries encoded per model call by the batching query encoder",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+QUERY_ENCODER_QUEUE_WAIT = Histogram(
+    "search_query_encoder_queue_wait_seconds",
+    "Time a query waited for its encoding batch to start",
+    buckets=LATENCY_BUCKETS,
+)
+QUERY_ENCODER_CACHE = Counter(
+    "search_query_encoder_cache_lookups_total",
+    "Query embedding cache lookups by result (hit/miss)",
+    ["result"],
+)
+RERANK_REQUESTS = Counter(
+    "search_rerank_requests_total",
+    "Rerank attempts by outcome (reranked/timeout/rejected/error)",
+    ["outcome"],
+)
+RERANK_LATENCY = Histogram(
+    "search_rerank_duration_seconds",
+    "Time to rerank one request's candidates, including pool queueing",
+    buckets=LATENCY_BUCKETS,
+)
+ADMISSION_REQUESTS = Counter(
+    "search_admission_requests_total",
+    "Admission decisions by priority lane and outcome (admitted/queue_full/timeout/evicted)",
+    ["priority", "outcome"],
+)
+ADMISSION_QUEUE_WAIT = Histogram(
+    "search_admission_queue_wait_seconds",
+    "Time a request waited in the admission queue",
+    ["priority"],
+    buckets=LATENCY_BUCKETS,
+)
+ADMISSION_LIMIT = Gauge(
+    "search_admission_concurrency_limit",
+    "Current adaptive limit on concurrent pipeline executions",
+    multiprocess_mode="livesum",
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "search_admission_in_flight",
+    "Pipeline executions currently admitted",
+    multiprocess_mode="livesum",
+)
+EVENT_LOOP_LAG = Histogram(
+    "search_event_loop_lag_seconds",
+    "Delay between when a periodic event-loop callback was due and when it ran",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Serialize metrics in the Prometheus text format"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+async def monitor_event_loop_lag(interval: float = 0.5) -> None:
+    """
+    Measure event-loop lag until cancelled.
+    Sleeps for `interval` and records how late the wake-up was; any CPU-bound
+    work blocking the loop shows up directly as lag.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        scheduled = loop.time() + interval
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - scheduled))
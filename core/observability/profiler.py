@@ -0,0 +1,161 @@
+"""
+In-process sampling profiler producing collapsed stacks.
+
+A background thread periodically snapshots the Python stack of every other
+thread in the worker (`sys._current_frames`) and counts identical stacks. The
+output is the "collapsed" format understood by flamegraph.pl, speedscope and
+similar tools: one line per unique stack, frames joined by ";" (root first),
+followed by a space and the sample count.
+
+Only one profile can run per process at a time. Samples are taken when the
+sampler thread gets the GIL, so very short GIL-holding sections may be
+under-represented; at the default 5 ms interval the overhead is small enough
+to run against live traffic.
+"""
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType, FrameType
+from typing import Dict, List, Optional, Tuple
+
+# Frames where a thread is waiting rather than working
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("selectors.py", "poll"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+}
+
+_active_profiler: Optional["SamplingProfiler"] = None
+_active_lock = threading.Lock()
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile is requested while another one is running"""
+
+
+class SamplingProfiler:
+    def __init__(
+        self,
+        interval: float = 0.005,
+        slow_request_threshold: Optional[float] = None,
+        include_idle: bool = False
+    ):
+        """
+        Args:
+            interval: Seconds between samples
+            slow_request_threshold: If set, only keep samples taken while a
+                request slower than this many seconds was in flight
+            include_idle: Keep samples of threads blocked in select/wait
+        """
+        self.interval = interval
+        self.slow_request_threshold = slow_request_threshold
+        self.include_idle = include_idle
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._timed_stacks: List[Tuple[float, str]] = []
+        self._slow_windows: List[Tuple[float, float]] = []
+        self._labels: Dict[CodeType, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._path_prefixes = sorted({os.path.abspath(p) + os.sep for p in sys.path if p}, key=len, reverse=True)
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            for prefix in self._path_prefixes:
+                if filename.startswith(prefix):
+                    filename = filename[len(prefix):]
+                    break
+            name = getattr(code, "co_qualname", code.co_name)
+            label = f"{name} ({filename}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _is_idle(self, frame: FrameType) -> bool:
+        return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES
+
+    def _collapse(self, frame: FrameType, thread_name: str) -> str:
+        labels = []
+        while frame is not None:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        labels.append(thread_name)
+        return ";".join(reversed(labels))
+
+    def _sample(self) -> None:
+        own_ident = threading.get_ident()
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        now = time.perf_counter()
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident or (not self.include_idle and self._is_idle(frame)):
+                continue
+            stack = self._collapse(frame, thread_names.get(ident, f"thread-{ident}"))
+            if self.slow_request_threshold is None:
+                self._stacks[stack] += 1
+            else:
+                self._timed_stacks.append((now, stack))
+        self.samples += 1
+
+    def _run(self) -> None:
+        next_sample = time.perf_counter()
+        while not self._stop.is_set():
+            self._sample()
+            next_sample += self.interval
+            self._stop.wait(max(0.0, next_sample - time.perf_counter()))
+
+    def record_request(self, start: float, end: float) -> None:
+        """Report a finished request (perf_counter timestamps) for slow-request filtering"""
+        if self.slow_request_threshold is not None and end - start >= self.slow_request_threshold:
+            self._slow_windows.append((start, end))
+
+    def start(self) -> None:
+        global _active_profiler
+        with _active_lock:
+            if _active_profiler is not None:
+                raise ProfilerBusyError("A profile is already running")
+            _active_profiler = self
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Dict[str, int]:
+        """Stop sampling and return sample counts per collapsed stack"""
+        global _active_profiler
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        with _active_lock:
+            if _active_profiler is self:
+                _active_profiler = None
+
+        if self.slow_request_threshold is None:
+            return dict(self._stacks)
+
+        # Keep samples that fall inside any slow request's [start, end] window
+        windows = sorted(self._slow_windows)
+        starts = [start for start, _ in windows]
+        max_end_so_far = []
+        running_max = float("-inf")
+        for _, end in windows:
+            running_max = max(running_max, end)
+            max_end_so_far.append(running_max)
+
+        stacks: Counter = Counter()
+        for timestamp, stack in self._timed_stacks:
+            i = bisect.bisect_right(starts, timestamp) - 1
+            if i >= 0 and max_end_so_far[i] >= timestamp:
+                stacks[stack] += 1
+        return dict(stacks)
+
+def get_active_profiler() -> Optional[SamplingProfiler]:
+    """Profiler currently running in this process, if any"""
+    return _active_profiler
+
+def format_collapsed(stacks: Dict[str, int]) -> str:
+    """Render stack counts in the collapsed (folded) flamegraph format"""
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
@@ -0,0 +1,61 @@
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import PlainTextResponse
+from core.observability.metrics import render_metrics
+from core.observability.profiler import ProfilerBusyError, SamplingProfiler, format_collapsed
+from core.search_api.dependencies import get_settings, require_admin
+from core.search_api.settings import Settings
+
+router = APIRouter()
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Prometheus scrape endpoint"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+@router.post(
+    "/admin/profile",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(require_admin)],
+    include_in_schema=False
+)
+async def profile(
+    seconds: float = Query(default=10.0, gt=0, description="Profile duration"),
+    interval_ms: float = Query(default=5.0, ge=1.0, le=1000.0, description="Sampling interval"),
+    slow_ms: Optional[float] = Query(
+        default=None, gt=0,
+        description="Only keep samples taken while a request slower than this was in flight"
+    ),
+    include_idle: bool = Query(default=False, description="Keep samples of threads blocked in select/wait"),
+    settings: Settings = Depends(get_settings)
+) -> PlainTextResponse:
+    """
+    Sample every thread of this worker for `seconds` and return collapsed stacks
+    (flamegraph.pl / speedscope format), e.g.:
+
+        curl -X POST -H "X-Admin-Token: $TOKEN" "http://host:2345/admin/profile?seconds=30" > profile.folded
+    """
+    if seconds > settings.profile_max_seconds:
+        raise HTTPException(status_code=422, detail=f"seconds must be <= {settings.profile_max_seconds}")
+
+    profiler = SamplingProfiler(
+        interval=interval_ms / 1000,
+        slow_request_threshold=slow_ms / 1000 if slow_ms else None,
+        include_idle=include_idle
+    )
+    try:
+        profiler.start()
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        stacks = profiler.stop()
+
+    return PlainTextResponse(
+        format_collapsed(stacks),
+        headers={"X-Profile-Samples": str(profiler.samples)}
+    )
@@ -0,0 +1,254 @@
+"""
+Admission control in front of the search pipeline.
+
+`AdaptiveLimiter` caps how many pipeline executions run at once, with the
+cap adjusted by AIMD on observed latency: while requests finish under
+`target_latency` and the cap is actually in use it grows by ~1 per cap's
+worth of completions; a slow or failed request shrinks it by `backoff`
+(at most once per `target_latency`, so a burst of slow completions counts
+as one congestion signal). Requests over the cap wait in a bounded queue
+with two lanes; the cheap lane (plain text search) is always served first,
+and a cheap arrival at a full queue evicts the newest expensive waiter.
+Requests that find the queue full, or wait longer than `max_queue_wait`,
+are rejected with `Overloaded` (served as 503 + Retry-After) instead of
+piling up on the backends.
+
+A batch of searches is admitted with a `weight` (its number of searches):
+it takes one slot per search, but batches together never hold more than
+`batch_share` of the limit, so the rest stays open to interactive traffic;
+its latency counts
+per search in the AIMD update. Waiters are served in order within a lane,
+except that one that needs more slots than are free does not hold back
+smaller waiters (or new arrivals) that fit; it is shed by
+`max_queue_wait` if the slots never come free.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, List, Tuple
+
+from core.observability.metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_LIMIT,
+    ADMISSION_QUEUE_WAIT,
+    ADMISSION_REQUESTS,
+)
+
+logger = logging.getLogger(__name__)
+
+CHEAP = 0
+EXPENSIVE = 1
+PRIORITY_NAMES = ("cheap", "expensive")
+
+
+class Overloaded(Exception):
+    """A request was shed; the client should retry after `retry_after` seconds"""
+
+    def __init__(self, reason: str, retry_after: int = 1):
+        super().__init__(f"Search service overloaded ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Permit:
+    """One admitted execution; release it exactly once with its outcome"""
+
+    def __init__(self, limiter: "AdaptiveLimiter", slots: int = 1, weight: int = 1):
+        """
+        Args:
+            limiter: Limiter the slots are returned to
+            slots: Slots held
+            weight: Searches the execution runs (its latency is divided by it)
+        """
+        self.limiter = limiter
+        self.slots = slots
+        self.weight = weight
+        self.started = time.perf_counter()
+        self._released = False
+
+    def release(self, ok: bool = True) -> None:
+        if not self._released:
+            self._released = True
+            self.limiter._on_release(self, time.perf_counter() - self.started, ok)
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        initial_limit: int = 32,
+        min_limit: int = 4,
+        max_limit: int = 256,
+        target_latency: float = 0.5,
+        backoff: float = 0.9,
+        max_queue: int = 64,
+        max_queue_wait: float = 0.25,
+        retry_after: int = 1,
+        batch_share: float = 0.25
+    ):
+        """
+        Args:
+            initial_limit: Concurrent executions allowed at start
+            min_limit: Floor of the adaptive limit
+            max_limit: Ceiling of the adaptive limit
+            target_latency: Seconds above which an execution counts as congestion
+            backoff: Multiplicative decrease applied on congestion
+            max_queue: Requests allowed to wait for a slot (both lanes together)
+            max_queue_wait: Seconds a request may wait before it is shed
+            retry_after: Retry-After hint (seconds) for shed requests
+            batch_share: Fraction of the limit weighted executions may hold together
+        """
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.max_queue = max_queue
+        self.max_queue_wait = max_queue_wait
+        self.retry_after = retry_after
+        self.batch_share = batch_share
+        self.inflight = 0
+        # Slots held by weighted executions (batches)
+        self.batch_inflight = 0
+        # Waiters per lane with the slots they need
+        self._queues: List[Deque[Tuple[asyncio.Future, int]]] = [deque(), deque()]
+        self._last_decrease = 0.0
+        ADMISSION_LIMIT.set(self.limit)
+
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._queues)
+
+    def _batch_slots(self) -> int:
+        """Slots batches may hold together"""
+        return max(1, int(self.limit * self.batch_share))
+
+    def _slots(self, weight: int) -> int:
+        """Slots an execution of `weight` searches takes: one per search, at most the batches' share"""
+        return min(weight, self._batch_slots())
+
+    def _fits(self, weight: int) -> bool:
+        slots = self._slots(weight)
+        if weight > 1 and self.batch_inflight + slots > self._batch_slots():
+            return False
+        return self.inflight + slots <= int(self.limit)
+
+    def _grant(self, slots: int, weight: int) -> None:
+        self.inflight += slots
+        if weight > 1:
+            self.batch_inflight += slots
+        ADMISSION_IN_FLIGHT.inc(slots)
+
+    def _return(self, slots: int, weight: int) -> None:
+        self.inflight -= slots
+        if weight > 1:
+            self.batch_inflight -= slots
+        ADMISSION_IN_FLIGHT.dec(slots)
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiters, cheap lane first, in order within a lane, skipping ones that don't fit"""
+        for queue in self._queues:
+            for entry in list(queue):
+                if self.inflight >= int(self.limit):
+                    return
+                waiter, weight = entry
+                if waiter.done():
+                    queue.remove(entry)
+                elif self._fits(weight):
+                    queue.remove(entry)
+                    slots = self._slots(weight)
+                    self._grant(slots, weight)
+                    waiter.set_result(slots)
+
+    def _on_release(self, permit: Permit, latency: float, ok: bool) -> None:
+        saturated = self.inflight >= int(self.limit)
+        self._return(permit.slots, permit.weight)
+        now = time.perf_counter()
+        if not ok or latency / permit.weight > self.target_latency:
+            if now - self._last_decrease > self.target_latency:
+                self._last_decrease = now
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+        elif saturated or self.queued:
+            # Only grow while the limit is what holds requests back
+            self.limit = min(self.max_limit, self.limit + permit.slots / self.limit)
+        ADMISSION_LIMIT.set(self.limit)
+        self._dispatch()
+
+    def _reject(self, priority: int, reason: str) -> Overloaded:
+        ADMISSION_REQUESTS.labels(priority=PRIORITY_NAMES[priority], outcome=reason).inc()
+        return Overloaded(reason, self.retry_after)
+
+    async def acquire(self, priority: int = EXPENSIVE, weight: int = 1) -> Permit:
+        """
+        Wait for execution slots.
+
+        Args:
+            priority: CHEAP or EXPENSIVE lane
+            weight: Searches the execution runs (a batch takes one slot per search)
+
+        Raises:
+            Overloaded: If the queue is full or the wait exceeds `max_queue_wait`
+        """
+        lane = PRIORITY_NAMES[priority]
+        weight = max(1, weight)
+        # Every change in free slots dispatches the queue, so whatever is
+        # still queued needs more slots than are free and is not overtaken
+        # unfairly by an arrival that fits
+        if self._fits(weight):
+            slots = self._slots(weight)
+            self._grant(slots, weight)
+            ADMISSION_REQUESTS.labels(priority=lane, outcome="admitted").inc()
+            return Permit(self, slots, weight)
+
+        if self.queued >= self.max_queue:
+            expensive = self._queues[EXPENSIVE]
+            if priority == CHEAP and expensive:
+                # Make room by shedding the most recently queued expensive request
+                evicted, _ = expensive.pop()
+                if not evicted.done():
+                    evicted.set_exception(self._reject(EXPENSIVE, "evicted"))
+            else:
+                raise self._reject(priority, "queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (waiter, weight)
+        self._queues[priority].append(entry)
+        start = time.perf_counter()
+        try:
+            slots = await asyncio.wait_for(asyncio.shield(waiter), self.max_queue_wait)
+        except asyncio.TimeoutError:
+            self._abandon(entry, priority)
+            raise self._reject(priority, "timeout")
+        except asyncio.CancelledError:
+            self._abandon(entry, priority)
+            raise
+        finally:
+            ADMISSION_QUEUE_WAIT.labels(priority=lane).observe(time.perf_counter() - start)
+        ADMISSION_REQUESTS.labels(priority=lane, outcome="admitted").inc()
+        return Permit(self, slots, weight)
+
+    def _abandon(self, entry: Tuple[asyncio.Future, int], priority: int) -> None:
+        """Give up a queued request; slots it was granted in the meantime are passed on"""
+        waiter, weight = entry
+        if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+            self._return(waiter.result(), weight)
+            self._dispatch()
+            return
+        if not waiter.done():
+            waiter.cancel()
+        try:
+            self._queues[priority].remove(entry)
+        except ValueError:
+            pass
+
+    @asynccontextmanager
+    async def admit(self, priority: int = EXPENSIVE, weight: int = 1) -> AsyncIterator[Permit]:
+        """`async with limiter.admit(priority, weight):` around one pipeline execution"""
+        permit = await self.acquire(priority, weight)
+        ok = False
+        try:
+            yield permit
+            ok = True
+        finally:
+            permit.release(ok)
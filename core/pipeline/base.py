@@ -1,10 +1,36 @@
 """Base classes and interfaces for the search pipeline"""
 
+import asyncio
+import logging
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, List
+
+logger = logging.getLogger(__name__)
 
 class PipelineStep(ABC):
+    # Optional steps only improve results; the pipeline skips them when the deadline is near
+    optional: bool = False
+
+    def is_optional(self, context: Any) -> bool:
+        """Whether this step may be skipped for `context` when time runs short"""
+        return self.optional
+
     @abstractmethod
     async def process(self, context: Any) -> Any:
         """Process the search context and return updated context"""
-        pass
\ No newline at end of file
+        pass
+
+    async def process_many(self, contexts: List[Any]) -> List[Any]:
+        """
+        Process a batch of independent contexts.
+        Steps that can batch backend calls (e.g. `_msearch`) override this;
+        the default processes each context concurrently. A context that
+        fails gets `error` set instead of failing the batch.
+        """
+        results = await asyncio.gather(*(self.process(context) for context in contexts), return_exceptions=True)
+        for i, result in enumerate(results):
+            if isinstance(result, Exception):
+                logger.error(f"{type(self).__name__} failed for query '{contexts[i].original_query}': {result}")
+                contexts[i].error = contexts[i].error or str(result)
+                results[i] = contexts[i]
+        return results
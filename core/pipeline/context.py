@@ -1,14 +1,32 @@
 """SearchContext for maintaining state between pipeline steps"""
 
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 
 @dataclass
 class SearchContext:
     """Holds the state and data passed between pipeline steps"""
     original_query: str
+    search_type: str = "hybrid"
+    filters: Optional[Dict[str, Any]] = None  # Normalized, see core/processing/filters.py
     parsed_query: Optional[str] = None
     enriched_query: Optional[Dict[str, Any]] = None
     text_results: Optional[List[Dict[str, Any]]] = None
     semantic_results: Optional[List[Dict[str, Any]]] = None
-    final_results: Optional[List[Dict[str, Any]]] = None 
\ No newline at end of file
+    final_results: Optional[List[Dict[str, Any]]] = None
+    error: Optional[str] = None
+    deadline: Optional[float] = None  # time.monotonic() by which the response is due; None = unbounded
+    degraded: List[str] = field(default_factory=list)  # Steps skipped or cut short, e.g. "RerankerStep: timed out"
+
+    @property
+    def partial(self) -> bool:
+        """True if the results may differ from what the full pipeline would return"""
+        return bool(self.degraded)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (negative once past it), None without a deadline"""
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def degrade(self, reason: str) -> None:
+        self.degraded.append(reason)
@@ -1,15 +1,126 @@
 """Pipeline orchestration and execution"""
 
-from typing import List
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from core.observability.metrics import PIPELINE_DEGRADED, PIPELINE_STEP_LATENCY
 from .base import PipelineStep
 from .context import SearchContext
 
 class SearchPipeline:
-    def __init__(self, steps: List[PipelineStep]):
+    def __init__(self, steps: List[PipelineStep], timeout: Optional[float] = None, min_step_budget: float = 0.0):
+        """
+        Args:
+            steps: Steps run in order
+            timeout: End-to-end budget in seconds for contexts created without
+                a deadline; None leaves requests unbounded
+            min_step_budget: Optional steps are skipped when less than this
+                many seconds remain
+        """
         self.steps = steps
-    
-    async def execute(self, query: str) -> SearchContext:
-        context = SearchContext(original_query=query)
+        self.timeout = timeout
+        self.min_step_budget = min_step_budget
+
+    def _new_context(self, query: str, search_type: str, filters: Optional[Dict[str, Any]]) -> SearchContext:
+        context = SearchContext(original_query=query, search_type=search_type, filters=filters)
+        self._set_deadline(context)
+        return context
+
+    def _set_deadline(self, context: SearchContext) -> None:
+        if context.deadline is None and self.timeout is not None:
+            context.deadline = time.monotonic() + self.timeout
+
+    def _should_skip(self, step: PipelineStep, context: SearchContext, remaining: Optional[float]) -> bool:
+        """Past the deadline every step is skipped; close to it, the optional ones"""
+        if remaining is None:
+            return False
+        return remaining <= 0 or (step.is_optional(context) and remaining < self.min_step_budget)
+
+    @staticmethod
+    def _degrade(contexts: List[SearchContext], step: PipelineStep, reason: str) -> None:
+        name = type(step).__name__
+        PIPELINE_DEGRADED.labels(step=name, reason=reason).inc()
+        for context in contexts:
+            context.degrade(f"{name}: {reason}")
+
+    async def execute(
+        self,
+        query: str,
+        search_type: str = "hybrid",
+        filters: Optional[Dict[str, Any]] = None
+    ) -> SearchContext:
+        context = self._new_context(query, search_type, filters)
+        async for _, context in self._run(context):
+            pass
+        return self._finish(context)
+
+    @staticmethod
+    def _finish(context: SearchContext) -> SearchContext:
+        """A request cut off before any step produced results answers with none"""
+        if context.final_results is None and context.partial:
+            context.final_results = []
+        return context
+
+    async def stream(
+        self,
+        query: str,
+        search_type: str = "hybrid",
+        filters: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Tuple[PipelineStep, SearchContext]]:
+        """Run the pipeline, yielding the context after each step so callers can act on intermediate results"""
+        async for step, context in self._run(self._new_context(query, search_type, filters)):
+            yield step, context
+
+    async def _run(self, context: SearchContext) -> AsyncIterator[Tuple[PipelineStep, SearchContext]]:
+        """
+        Run the steps on one context within its deadline. A step that would
+        overrun it is cancelled and the pipeline continues with the results
+        so far; skipped and cancelled steps are recorded in `degraded`.
+        """
+        for step in self.steps:
+            remaining = context.remaining()
+            if self._should_skip(step, context, remaining):
+                self._degrade([context], step, "skipped")
+                continue
+            start = time.perf_counter()
+            try:
+                if remaining is None:
+                    context = await step.process(context)
+                else:
+                    context = await asyncio.wait_for(step.process(context), remaining)
+            except asyncio.TimeoutError:
+                self._degrade([context], step, "timed out")
+            PIPELINE_STEP_LATENCY.labels(step=type(step).__name__).observe(time.perf_counter() - start)
+            yield step, context
+
+    async def execute_many(
+        self,
+        queries: List[str],
+        search_type: str = "hybrid",
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[SearchContext]:
+        """Run a batch of queries through the pipeline, one step at a time for the whole batch"""
+        return await self.process_many([self._new_context(query, search_type, filters) for query in queries])
+
+    async def process_many(self, contexts: List[SearchContext]) -> List[SearchContext]:
+        """
+        Run prepared contexts (which may differ in search type and filters)
+        through the pipeline as one batch, bounded by the earliest deadline
+        """
+        for context in contexts:
+            self._set_deadline(context)
         for step in self.steps:
-            context = await step.process(context)
-        return context 
\ No newline at end of file
+            remaining = min((context.remaining() for context in contexts if context.deadline is not None), default=None)
+            if any(self._should_skip(step, context, remaining) for context in contexts):
+                self._degrade(contexts, step, "skipped")
+                continue
+            start = time.perf_counter()
+            try:
+                if remaining is None:
+                    contexts = await step.process_many(contexts)
+                else:
+                    contexts = await asyncio.wait_for(step.process_many(contexts), remaining)
+            except asyncio.TimeoutError:
+                self._degrade(contexts, step, "timed out")
+            PIPELINE_STEP_LATENCY.labels(step=type(step).__name__).observe(time.perf_counter() - start)
+        return [self._finish(context) for context in contexts]
@@ -1 +1,133 @@
-"""Query enrichment and expansion""" 
\ No newline at end of file
+"""Query enrichment and expansion"""
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from core.pipeline.base import PipelineStep
+from core.pipeline.context import SearchContext
+from core.processing.synonyms import SynonymTable
+import logging
+
+logger = logging.getLogger(__name__)
+
+class EnricherStep(PipelineStep):
+    """
+    Expands parsed keywords and detected phrases with related terms from the
+    precomputed synonym table and builds the structured Elasticsearch query
+    in `context.enriched_query`.
+
+    The query keeps the original match as the required clause; exact
+    (quoted) phrases become required phrase clauses, detected phrases
+    boosted phrase should-clauses, and expansions low-boost should-clauses,
+    so expansions only re-rank and never widen the match set. The
+    number of expansions is capped per term and per query to keep ES cost
+    bounded, and whole-query results are kept in an LRU.
+    """
+
+    FIELDS = ["title^2", "body"]
+    optional = True
+
+    def __init__(
+        self,
+        table: Optional[SynonymTable],
+        max_expansions_per_term: int = 2,
+        max_expansions: int = 8,
+        expansion_boost: float = 0.3,
+        phrase_boost: float = 2.0,
+        cache_size: int = 10_000
+    ):
+        """
+        Args:
+            table: Expansion table; None builds the structured query without expansions
+            max_expansions_per_term: Related terms added per keyword/phrase
+            max_expansions: Related terms added per query in total
+            expansion_boost: Boost of expansion clauses relative to the original query
+            phrase_boost: Boost of detected-phrase clauses
+            cache_size: Number of enriched queries kept in the LRU (0 disables it)
+        """
+        self.table = table
+        self.max_expansions_per_term = max_expansions_per_term
+        self.max_expansions = max_expansions
+        self.expansion_boost = expansion_boost
+        self.phrase_boost = phrase_boost
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def _expansions(self, keywords: List[str], phrases: List[str]) -> Dict[str, List[str]]:
+        """Related terms per source term, phrases first, within the per-query cap"""
+        if self.table is None:
+            return {}
+        seen = set(keywords) | set(phrases)
+        expansions: Dict[str, List[str]] = {}
+        budget = self.max_expansions
+        for term in [*phrases, *keywords]:
+            if budget <= 0:
+                break
+            related = [
+                expansion for expansion, _ in self.table.expand(term, self.max_expansions_per_term)
+                if expansion not in seen
+            ][:budget]
+            if related:
+                expansions[term] = related
+                seen.update(related)
+                budget -= len(related)
+        return expansions
+
+    def _build_query(self, query_text: str, parsed: Any, expansions: Dict[str, List[str]]) -> Dict[str, Any]:
+        must: List[Dict[str, Any]] = [{
+            "multi_match": {
+                "query": query_text,
+                "fields": self.FIELDS,
+                "type": "best_fields",
+                "boost": 2.0
+            }
+        }]
+        must.extend(
+            {"multi_match": {"query": phrase, "fields": self.FIELDS, "type": "phrase"}}
+            for phrase in parsed.exact_phrases
+        )
+        should: List[Dict[str, Any]] = [
+            {"multi_match": {"query": phrase, "fields": self.FIELDS, "type": "phrase", "boost": self.phrase_boost}}
+            for phrase in parsed.detected_phrases or []
+        ]
+        related = [term for terms in expansions.values() for term in terms]
+        if related:
+            should.append({
+                "multi_match": {
+                    "query": " ".join(related),
+                    "fields": self.FIELDS,
+                    "type": "best_fields",
+                    "boost": self.expansion_boost
+                }
+            })
+
+        query: Dict[str, Any] = {"bool": {"must": must}}
+        if should:
+            query["bool"]["should"] = should
+        return query
+
+    def _enrich(self, context: SearchContext) -> Dict[str, Any]:
+        parsed = context.parsed_query
+        key = parsed.cleaned
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        expansions = self._expansions(parsed.keywords, parsed.detected_phrases or [])
+        enriched = {
+            "query": self._build_query(parsed.cleaned, parsed, expansions),
+            "expansions": expansions,
+        }
+        if self.cache_size > 0:
+            self._cache[key] = enriched
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return enriched
+
+    async def process(self, context: SearchContext) -> SearchContext:
+        """Fill context.enriched_query from the parsed query"""
+        if not context.parsed_query or context.search_type == "semantic":
+            return context
+
+        context.enriched_query = self._enrich(context)
+        logger.debug(f"Enriched query '{context.original_query}': expansions={context.enriched_query['expansions']}")
+        return context
@@ -0,0 +1,167 @@
+"""
+Hybrid fusion of text and semantic results.
+
+The fusion itself works on NumPy arrays: every candidate list is reduced to
+an int64 array of document keys (position in a per-request docid table) and
+a float array of scores. Contributions from all lists are concatenated,
+summed per document with `np.bincount` and the top k picked with
+`np.argpartition`, so fusing two 1000-candidate lists is a handful of
+vectorized calls rather than a Python loop over dicts.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from core.pipeline.base import PipelineStep
+from core.pipeline.context import SearchContext
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+FUSION_METHODS = ("rrf", "weighted")
+
+def _top_k(keys: np.ndarray, fused: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Best k (keys, scores), highest first; ties keep key order"""
+    if len(fused) > k:
+        top = np.argpartition(-fused, k - 1)[:k]
+        keys, fused = keys[top], fused[top]
+    order = np.lexsort((keys, -fused))
+    return keys[order], fused[order]
+
+def _accumulate(
+    keys: Sequence[np.ndarray],
+    contributions: Sequence[np.ndarray],
+    k: int,
+    num_keys: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Sum contributions per key and select the top k"""
+    all_keys = np.concatenate(keys)
+    if not len(all_keys):
+        return np.array([], dtype=np.int64), np.array([], dtype=np.float64)
+    all_contributions = np.concatenate(contributions)
+    if num_keys is not None:
+        # Dense keys in [0, num_keys): sum directly, no sort needed
+        fused = np.bincount(all_keys, weights=all_contributions, minlength=num_keys)
+        return _top_k(np.arange(num_keys), fused, k)
+    unique_keys, inverse = np.unique(all_keys, return_inverse=True)
+    fused = np.bincount(inverse, weights=all_contributions, minlength=len(unique_keys))
+    return _top_k(unique_keys, fused, k)
+
+def reciprocal_rank_fusion(
+    keys: Sequence[np.ndarray],
+    k: int = 100,
+    rrf_k: int = 60,
+    weights: Optional[Sequence[float]] = None,
+    num_keys: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reciprocal rank fusion: score(d) = sum_i w_i / (rrf_k + rank_i(d)).
+
+    Args:
+        keys: One array of document keys per result list, best first
+        k: Number of fused results
+        rrf_k: Rank offset; larger values flatten the contribution of top ranks
+        weights: Optional per-list weights (default 1.0 each)
+        num_keys: If keys are dense in [0, num_keys), pass it to skip deduplication
+
+    Returns:
+        (keys, scores) of the fused top k, best first
+    """
+    weights = weights or [1.0] * len(keys)
+    contributions = [
+        weight / (rrf_k + np.arange(1, len(list_keys) + 1, dtype=np.float64))
+        for list_keys, weight in zip(keys, weights)
+    ]
+    return _accumulate(keys, contributions, k, num_keys)
+
+def weighted_score_fusion(
+    keys: Sequence[np.ndarray],
+    scores: Sequence[np.ndarray],
+    weights: Sequence[float],
+    k: int = 100,
+    num_keys: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Weighted sum of min-max normalized scores; a document missing from a list gets 0 from it.
+
+    Args:
+        keys: One array of document keys per result list
+        scores: Matching raw scores (any scale; BM25 and cosine can be mixed)
+        weights: Per-list weights
+        k: Number of fused results
+        num_keys: If keys are dense in [0, num_keys), pass it to skip deduplication
+
+    Returns:
+        (keys, scores) of the fused top k, best first
+    """
+    contributions = []
+    for list_scores, weight in zip(scores, weights):
+        list_scores = np.asarray(list_scores, dtype=np.float64)
+        if not len(list_scores):
+            contributions.append(list_scores)
+            continue
+        low, high = list_scores.min(), list_scores.max()
+        normalized = (list_scores - low) / (high - low) if high > low else np.ones_like(list_scores)
+        contributions.append(weight * normalized)
+    return _accumulate(keys, contributions, k, num_keys)
+
+class HybridFusionStep(PipelineStep):
+    """Merges `text_results` and `semantic_results` into `final_results` for hybrid searches"""
+
+    def __init__(
+        self,
+        method: str = "rrf",
+        size: int = 100,
+        rrf_k: int = 60,
+        text_weight: float = 0.5
+    ):
+        """
+        Args:
+            method: "rrf" (rank based) or "weighted" (normalized score sum)
+            size: Number of fused results to keep
+            rrf_k: Rank offset for RRF
+            text_weight: Weight of the text list; the semantic list gets 1 - text_weight
+        """
+        if method not in FUSION_METHODS:
+            raise ValueError(f"Unknown fusion method '{method}', expected one of {FUSION_METHODS}")
+        self.method = method
+        self.size = size
+        self.rrf_k = rrf_k
+        self.weights = [text_weight, 1.0 - text_weight]
+
+    def _fuse(self, result_lists: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        # Per-request docid -> key table; the first list a document appears in supplies its fields
+        key_of: Dict[str, int] = {}
+        documents: List[Dict[str, Any]] = []
+        keys = []
+        scores = []
+        for results in result_lists:
+            for doc in results:
+                if doc["id"] not in key_of:
+                    key_of[doc["id"]] = len(documents)
+                    documents.append(doc)
+            keys.append(np.fromiter((key_of[doc["id"]] for doc in results), dtype=np.int64, count=len(results)))
+            scores.append(np.fromiter((doc["score"] for doc in results), dtype=np.float64, count=len(results)))
+
+        if self.method == "rrf":
+            fused_keys, fused_scores = reciprocal_rank_fusion(
+                keys, self.size, self.rrf_k, self.weights, num_keys=len(documents)
+            )
+        else:
+            fused_keys, fused_scores = weighted_score_fusion(
+                keys, scores, self.weights, self.size, num_keys=len(documents)
+            )
+
+        return [
+            {**documents[key], "score": float(score), "source": "hybrid"}
+            for key, score in zip(fused_keys.tolist(), fused_scores.tolist())
+        ]
+
+    async def process(self, context: SearchContext) -> SearchContext:
+        """Fuse text and semantic results when both are available"""
+        if context.search_type != "hybrid" or not context.semantic_results:
+            return context
+        if not context.text_results:
+            context.final_results = context.semantic_results
+            return context
+
+        context.final_results = self._fuse([context.text_results, context.semantic_results])
+        return context
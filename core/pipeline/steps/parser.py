@@ -4,10 +4,13 @@ Handles basic text processing and structure analysis of search queries.
 """
 
 import re
-from typing import List, Tuple, Set, Dict
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Set, Dict, Optional, Sequence
+from dataclasses import dataclass, field
 from core.pipeline.base import PipelineStep
 from core.pipeline.context import SearchContext
+from core.processing.spelling import SpellingCorrector
+from core.processing.unicode import combining_marks
 import logging
 import unicodedata
 import json
@@ -15,6 +18,9 @@ from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+SPECIAL_CHARS_PATTERN = re.compile(r'[^\w\s":,.!?]')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
 @dataclass
 class ParsedQuery:
     """
@@ -22,16 +28,18 @@ class ParsedQuery:
     
     Attributes:
         original: The original unmodified query
-        cleaned: Basic cleaned version (lowercase, normalized spaces)
+        cleaned: Basic cleaned version (lowercase, normalized spaces, spelling corrected)
         exact_phrases: List of phrases that should be matched exactly (from quotes)
         keywords: Individual keywords after removing exact phrases and cleaning
         detected_phrases: List of phrases detected in the query
+        corrections: Misspelled words mapped to their corrections
     """
     original: str
     cleaned: str
     exact_phrases: List[str]
     keywords: List[str]
     detected_phrases: List[str] = None
+    corrections: Dict[str, str] = field(default_factory=dict)
 
 class QueryParser(PipelineStep):
     """
@@ -48,15 +56,24 @@ class QueryParser(PipelineStep):
 
     # Common English contractions to handle specially in phrase contexts
     CONTRACTIONS: Dict[str, str] = {
-        r"\bcan't\b": "cannot", r"\bwon't\b": "will not", r"\bit's\b": "it is",
-        r"\bI'm\b": "I am", r"\byou're\b": "you are", r"\bthey're\b": "they are",
-        r"\bhe's\b": "he is", r"\bshe's\b": "she is", r"\bwe're\b": "we are",
-        r"\bdoesn't\b": "does not", r"\bisn't\b": "is not"
+        "can't": "cannot", "won't": "will not", "it's": "it is",
+        "i'm": "i am", "you're": "you are", "they're": "they are",
+        "he's": "he is", "she's": "she is", "we're": "we are",
+        "doesn't": "does not", "isn't": "is not"
     }
+    # All contractions in one pass (the text is lowercased before this runs)
+    CONTRACTION_PATTERN = re.compile(r"\b(?:" + "|".join(map(re.escape, CONTRACTIONS)) + r")\b")
 
-    def __init__(self):
+    def __init__(self, spelling: Optional[SpellingCorrector] = None):
+        """
+        Args:
+            spelling: Corrector applied to the cleaned query; None leaves spelling as typed
+        """
         self.exact_phrase_pattern = re.compile(r'"([^"]*)"')
         self.key_phrases = self._load_key_phrases()
+        # Longest first, so a phrase is never detected inside a longer one
+        self._phrases_by_length = sorted(self.key_phrases, key=len, reverse=True)
+        self.spelling = spelling
     
     def _load_key_phrases(self) -> List[str]:
         """Load precomputed key phrases from file"""
@@ -109,23 +126,38 @@ class QueryParser(PipelineStep):
         # Convert to lowercase
         cleaned = text.lower()
         
-        # Remove diacritical marks
-        cleaned = ''.join(
-            c for c in unicodedata.normalize('NFKD', text.lower())
-            if unicodedata.category(c) != 'Mn'
-        )
+        # Remove diacritical marks (ASCII has none, and NFKD leaves it unchanged)
+        if not cleaned.isascii():
+            cleaned = unicodedata.normalize('NFKD', cleaned).translate(combining_marks())
         
         # Replace common contractions
-        for pattern, replacement in self.CONTRACTIONS.items():
-            cleaned = re.sub(pattern, replacement, cleaned)
+        cleaned = self.CONTRACTION_PATTERN.sub(lambda match: self.CONTRACTIONS[match.group(0)], cleaned)
         
         # Remove special characters except quotes
-        cleaned = re.sub(r'[^\w\s":,.!?]', ' ', cleaned)
+        cleaned = SPECIAL_CHARS_PATTERN.sub(' ', cleaned)
         
         # Normalize spaces again after special char removal
-        cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+        cleaned = WHITESPACE_PATTERN.sub(' ', cleaned).strip()
         
         return cleaned
+
+    def _correct_spelling(self, text: str) -> Tuple[str, Dict[str, str]]:
+        """Correct misspelled words outside of quoted (exact) phrases"""
+        if self.spelling is None:
+            return text, {}
+        corrections: Dict[str, str] = {}
+        parts = re.split(r'("[^"]*")', text)
+        for i in range(0, len(parts), 2):
+            parts[i], corrected = self.spelling.correct(parts[i])
+            corrections.update(corrected)
+        return ''.join(parts), corrections
+
+    def canonical_query(self, query: str) -> str:
+        """
+        Cleaned and spelling-corrected form of a raw query, so that variants
+        of the same query (case, accents, typos) map to one cache entry.
+        """
+        return self._correct_spelling(self._clean_text(query))[0]
     
     def _extract_keywords(self, text: str) -> List[str]:
         """
@@ -164,7 +196,7 @@ class QueryParser(PipelineStep):
         remaining_text = text.lower()
         
         # Check phrases in descending order of length
-        for phrase in sorted(self.key_phrases, key=len, reverse=True):
+        for phrase in self._phrases_by_length:
             if phrase in remaining_text:
                 detected.append(phrase)
                 # Remove found phrase to prevent substring matches
@@ -172,23 +204,18 @@ class QueryParser(PipelineStep):
                 
         return detected
 
-    async def process(self, context: SearchContext) -> SearchContext:
+    def parse(self, query: str) -> ParsedQuery:
         """
-        Process the search query through parsing and cleaning steps.
+        Parse a single raw query.
         
         Args:
-            context: Search context containing original query
+            query: Raw query string
             
         Returns:
-            Updated context with parsed query
+            Structured parsed query
         """
-        if not context.original_query:
-            logger.warning("Received empty query")
-            context.parsed_query = ""
-            return context
-            
-        # Clean the original query
-        cleaned_query = self._clean_text(context.original_query)
+        # Clean the original query and fix misspellings
+        cleaned_query, corrections = self._correct_spelling(self._clean_text(query))
         
         # Extract exact phrases
         exact_phrases, remaining_text = self._extract_exact_phrases(cleaned_query)
@@ -199,25 +226,88 @@ class QueryParser(PipelineStep):
         # Detect common phrases from corpus
         detected_phrases = self._detect_common_phrases(cleaned_query)
         
-        # Create structured parsed query
-        parsed_query = ParsedQuery(
-            original=context.original_query,
-            cleaned=cleaned_query,
-            exact_phrases=exact_phrases,
-            keywords=keywords,
-            detected_phrases=detected_phrases
-        )
-        
         # Log parsing results
-        logger.info(
-            f"Parsed query: original='{context.original_query}' -> "
+        logger.debug(
+            f"Parsed query: original='{query}' -> "
             f"cleaned='{cleaned_query}', "
             f"phrases={exact_phrases}, "
             f"keywords={keywords}, "
-            f"detected_phrases={detected_phrases}"
+            f"detected_phrases={detected_phrases}, "
+            f"corrections={corrections}"
+        )
+        
+        return ParsedQuery(
+            original=query,
+            cleaned=cleaned_query,
+            exact_phrases=exact_phrases,
+            keywords=keywords,
+            detected_phrases=detected_phrases,
+            corrections=corrections
         )
+
+    def parse_many(self, queries: Sequence[str], workers: int = 0, chunk_size: int = 2000) -> List[ParsedQuery]:
+        """
+        Parse a batch of raw queries (e.g. for offline evaluation or cache warming).
+        
+        Repeated queries are parsed once and share the same ParsedQuery. With
+        `workers` > 1, large batches are split into chunks parsed in a process
+        pool; each worker receives a copy of this parser once, not per chunk.
         
-        # Update context
-        context.parsed_query = parsed_query
+        Args:
+            queries: Raw query strings
+            workers: Worker processes; 0 or 1 parses in this process
+            chunk_size: Queries per task sent to a worker
+            
+        Returns:
+            Parsed queries, in the order of `queries`
+        """
+        unique = list(dict.fromkeys(queries))
+        if workers > 1 and len(unique) > chunk_size:
+            chunks = [unique[i:i + chunk_size] for i in range(0, len(unique), chunk_size)]
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,)) as pool:
+                parsed = [result for chunk in pool.map(_parse_chunk, chunks) for result in chunk]
+        else:
+            parsed = [self.parse(query) for query in unique]
+        by_query = dict(zip(unique, parsed))
+        return [by_query[query] for query in queries]
+
+    async def process(self, context: SearchContext) -> SearchContext:
+        """
+        Process the search query through parsing and cleaning steps.
         
-        return context 
\ No newline at end of file
+        Args:
+            context: Search context containing original query
+            
+        Returns:
+            Updated context with parsed query
+        """
+        if not context.original_query:
+            logger.warning("Received empty query")
+            context.parsed_query = ""
+            return context
+            
+        context.parsed_query = self.parse(context.original_query)
+        return context
+
+    async def process_many(self, contexts: List[SearchContext]) -> List[SearchContext]:
+        """Parse the whole batch in one pass; parsing is CPU-only, so there is nothing to await"""
+        queries = [context.original_query for context in contexts if context.original_query]
+        parsed = iter(self.parse_many(queries))
+        for context in contexts:
+            if context.original_query:
+                context.parsed_query = next(parsed)
+            else:
+                logger.warning("Received empty query")
+                context.parsed_query = ""
+        return contexts
+
+
+# Process-pool workers for QueryParser.parse_many
+_worker_parser: Optional[QueryParser] = None
+
+def _init_worker(parser: QueryParser) -> None:
+    global _worker_parser
+    _worker_parser = parser
+
+def _parse_chunk(queries: List[str]) -> List[ParsedQuery]:
+    return [_worker_parser.parse(query) for query in queries]
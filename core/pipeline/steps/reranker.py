@@ -1 +1,230 @@
-"""Result reranking""" 
\ No newline at end of file
+"""Result reranking"""
+import asyncio
+import logging
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from core.features.store import FeatureStore
+from core.observability.metrics import RERANK_LATENCY, RERANK_REQUESTS
+from core.pipeline.base import PipelineStep
+from core.pipeline.context import SearchContext
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class Reranker(ABC):
+    """Scores (query, document) pairs; higher is more relevant"""
+
+    @abstractmethod
+    def score(self, query: str, documents: List[Dict[str, Any]], static: Optional[np.ndarray] = None) -> np.ndarray:
+        """Score one batch of candidate documents for a query"""
+        pass
+
+    def document_features(self, documents: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Query-independent features for all candidates at once; None if the model uses none"""
+        return None
+
+
+class LexicalFeatureReranker(Reranker):
+    """
+    Linear model over cheap query/document match features:
+    query-term coverage of title and body, exact phrase match and bigram
+    overlap, plus the first-stage score rank. Needs no model download.
+    With a feature store, static per-document features (quality prior,
+    key phrase hits) are gathered for the whole batch in one call and added.
+    """
+
+    WEIGHTS = np.array([1.5, 1.0, 0.75, 0.5, 0.5])
+    STATIC_COLUMNS = ["quality_prior", "phrase_hits"]
+    STATIC_WEIGHTS = np.array([0.5, 0.05])
+
+    def __init__(self, max_body_chars: int = 2000, feature_store: Optional[FeatureStore] = None):
+        """
+        Args:
+            max_body_chars: Only the start of the body is scored
+            feature_store: Optional precomputed per-document features
+        """
+        self.max_body_chars = max_body_chars
+        self.feature_store = feature_store
+
+    def _features(self, terms: List[str], bigrams: set, phrase: str, doc: Dict[str, Any], rank: int) -> List[float]:
+        title = doc.get("title", "").lower()
+        body = doc.get("body", "")[:self.max_body_chars].lower()
+        title_terms = set(TOKEN_PATTERN.findall(title))
+        body_tokens = TOKEN_PATTERN.findall(body)
+        body_terms = set(body_tokens)
+        body_bigrams = set(zip(body_tokens, body_tokens[1:]))
+        n = len(terms) or 1
+        return [
+            sum(term in title_terms for term in terms) / n,
+            sum(term in body_terms for term in terms) / n,
+            float(bool(phrase) and (phrase in title or phrase in body)),
+            len(bigrams & body_bigrams) / (len(bigrams) or 1),
+            1.0 / (1.0 + rank),
+        ]
+
+    def document_features(self, documents: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+        if self.feature_store is None:
+            return None
+        return self.feature_store.features_for([doc["id"] for doc in documents], self.STATIC_COLUMNS)
+
+    def score(self, query: str, documents: List[Dict[str, Any]], static: Optional[np.ndarray] = None) -> np.ndarray:
+        tokens = TOKEN_PATTERN.findall(query.lower())
+        terms = list(dict.fromkeys(tokens))
+        bigrams = set(zip(tokens, tokens[1:]))
+        phrase = " ".join(tokens) if len(tokens) > 1 else ""
+        features = np.array([
+            self._features(terms, bigrams, phrase, doc, doc.get("_rank", rank))
+            for rank, doc in enumerate(documents)
+        ])
+        scores = features @ self.WEIGHTS
+        if static is None:
+            static = self.document_features(documents)
+        if static is not None:
+            scores += static @ self.STATIC_WEIGHTS
+        return scores
+
+
+class CrossEncoderReranker(Reranker):
+    """sentence-transformers cross-encoder (optional dependency)"""
+
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2", max_body_chars: int = 2000):
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError as e:
+            raise ImportError("CrossEncoderReranker requires the sentence-transformers package") from e
+        self.model = CrossEncoder(model_name)
+        self.max_body_chars = max_body_chars
+
+    def score(self, query: str, documents: List[Dict[str, Any]], static: Optional[np.ndarray] = None) -> np.ndarray:
+        pairs = [
+            (query, f"{doc.get('title', '')} {doc.get('body', '')[:self.max_body_chars]}")
+            for doc in documents
+        ]
+        return np.asarray(self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False))
+
+
+def load_reranker(
+    backend: str = "lexical",
+    model_name: Optional[str] = None,
+    feature_store: Optional[FeatureStore] = None
+) -> Reranker:
+    """Build the configured reranker ("lexical" or "cross_encoder")"""
+    if backend == "lexical":
+        return LexicalFeatureReranker(feature_store=feature_store)
+    if backend == "cross_encoder":
+        return CrossEncoderReranker(model_name) if model_name else CrossEncoderReranker()
+    raise ValueError(f"Unknown reranker backend: {backend}")
+
+
+class RerankerStep(PipelineStep):
+    """
+    Reorders the top of `final_results` with a CPU-heavy reranker.
+
+    Scoring runs in a dedicated thread pool in batches, never on the event
+    loop. Two guards keep it from hurting retrieval:
+      - admission: at most `max_inflight` requests rerank at once; beyond
+        that, requests skip reranking instead of queueing for the pool
+      - deadline: if scoring takes longer than `timeout`, the first-stage
+        order is returned and the remaining batches are abandoned
+    Both are also capped by the request deadline and flagged on the context.
+    """
+
+    optional = True
+
+    def __init__(
+        self,
+        reranker: Reranker,
+        depths: Optional[Dict[str, int]] = None,
+        timeout: float = 0.1,
+        workers: int = 2,
+        max_inflight: int = 4,
+        batch_size: int = 32
+    ):
+        """
+        Args:
+            reranker: Model used to score candidates
+            depths: Candidates reranked per search_type (0 disables reranking for it)
+            timeout: Seconds allowed for reranking one request
+            workers: Threads in the reranking pool
+            max_inflight: Requests allowed to rerank concurrently
+            batch_size: Candidates scored per model call
+        """
+        self.reranker = reranker
+        self.depths = depths if depths is not None else {"text": 50, "semantic": 50, "hybrid": 100}
+        self.timeout = timeout
+        self.max_inflight = max_inflight
+        self.batch_size = batch_size
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reranker")
+        self._inflight = 0
+
+    def _score(self, query: str, candidates: List[Dict[str, Any]], cancelled: threading.Event) -> Optional[np.ndarray]:
+        """Worker: score candidates batch by batch, giving up once the request has timed out"""
+        # Store-backed features for every candidate in one vectorized gather
+        static = self.reranker.document_features(candidates)
+        scores = []
+        for start in range(0, len(candidates), self.batch_size):
+            if cancelled.is_set():
+                return None
+            end = start + self.batch_size
+            batch = [{**doc, "_rank": rank} for rank, doc in enumerate(candidates[start:end], start=start)]
+            scores.append(self.reranker.score(query, batch, None if static is None else static[start:end]))
+        return np.concatenate(scores)
+
+    async def process(self, context: SearchContext) -> SearchContext:
+        """Rerank the top candidates of final_results within the deadline"""
+        depth = self.depths.get(context.search_type, 0)
+        if depth <= 0 or not context.final_results or len(context.final_results) < 2:
+            return context
+
+        if self._inflight >= self.max_inflight:
+            RERANK_REQUESTS.labels(outcome="rejected").inc()
+            context.degrade("RerankerStep: skipped (busy)")
+            return context
+
+        candidates = context.final_results[:depth]
+        parsed = context.parsed_query
+        query = getattr(parsed, "cleaned", None) or context.original_query
+        cancelled = threading.Event()
+        remaining = context.remaining()
+        timeout = self.timeout if remaining is None else max(0.0, min(self.timeout, remaining))
+
+        self._inflight += 1
+        start = time.perf_counter()
+        try:
+            future = asyncio.get_running_loop().run_in_executor(
+                self.executor, self._score, query, candidates, cancelled
+            )
+            scores = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            RERANK_REQUESTS.labels(outcome="timeout").inc()
+            context.degrade("RerankerStep: timed out")
+            logger.debug(f"Reranking timed out after {timeout:.3f}s for query '{context.original_query}'")
+            return context
+        except Exception as e:
+            RERANK_REQUESTS.labels(outcome="error").inc()
+            logger.error(f"Reranking failed for query '{context.original_query}': {e}")
+            return context
+        finally:
+            # Stops the worker after its current batch whenever we stopped waiting for it:
+            # timeout, or the request itself cancelled (pipeline deadline, client gone)
+            cancelled.set()
+            self._inflight -= 1
+        RERANK_LATENCY.observe(time.perf_counter() - start)
+        RERANK_REQUESTS.labels(outcome="reranked").inc()
+
+        order = np.argsort(-scores, kind="stable")
+        reranked = [{**candidates[i], "score": float(scores[i])} for i in order]
+        context.final_results = reranked + context.final_results[depth:]
+        return context
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
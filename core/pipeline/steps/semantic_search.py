@@ -1 +1,101 @@
-"""Semantic search implementation""" 
\ No newline at end of file
+"""Semantic search implementation"""
+import asyncio
+from typing import Any, Dict, List, Optional
+from core.pipeline.base import PipelineStep
+from core.pipeline.context import SearchContext
+from core.documents.store import DocumentStore
+from core.embeddings.batching import BatchingQueryEncoder
+from core.processing.filters import matches_filters
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SemanticSearchStep(PipelineStep):
+    """
+    Dense retrieval against the local IVF index or Qdrant.
+    Query vectors come from the batching encoder (cached, micro-batched off
+    the event loop); the index scan is CPU-bound too, so it runs in a worker
+    thread (NumPy releases the GIL).
+
+    Optional in hybrid searches (text results alone still answer them), so
+    it is skipped or cut short when the request deadline is near.
+    """
+
+    def __init__(
+        self,
+        index: Any,
+        encoder: BatchingQueryEncoder,
+        top_k: int = 100,
+        nprobe: Optional[int] = None,
+        document_client: Optional[Any] = None,
+        document_store: Optional[DocumentStore] = None
+    ):
+        """
+        Args:
+            index: `IVFIndex` (searched in a worker thread) or an async
+                backend such as `QdrantClient` with the same `search` signature
+            encoder: Query encoder (must match the index)
+            top_k: Number of results to retrieve
+            nprobe: Clusters to scan per query; defaults to the index setting
+            document_client: Optional client with `get_documents(doc_ids)` used
+                to fill in title/body for the hits
+            document_store: Local store used instead of `document_client`
+        """
+        self.index = index
+        self.encoder = encoder
+        self.top_k = top_k
+        self.nprobe = nprobe
+        self.document_client = document_client
+        self.document_store = document_store
+
+    def is_optional(self, context: SearchContext) -> bool:
+        return context.search_type == "hybrid"
+
+    async def _hydrate(self, doc_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        if self.document_store is not None:
+            # Slices of the mapped blobs: cheaper than a thread hop
+            return self.document_store.get_many(doc_ids)
+        if self.document_client is None:
+            return {}
+        try:
+            return await self.document_client.get_documents(doc_ids)
+        except Exception as e:
+            logger.error(f"Failed to fetch documents for semantic hits: {e}")
+            return {}
+
+    async def process(self, context: SearchContext) -> SearchContext:
+        """Execute semantic search and update context"""
+        if context.search_type == "text" or not context.original_query:
+            return context
+
+        parsed = context.parsed_query
+        query_text = getattr(parsed, "cleaned", None) or context.original_query
+        vector = await self.encoder.encode(query_text)
+        if asyncio.iscoroutinefunction(self.index.search):
+            doc_ids, scores = await self.index.search(vector, self.top_k, self.nprobe)
+        else:
+            doc_ids, scores = await asyncio.to_thread(self.index.search, vector, self.top_k, self.nprobe)
+
+        doc_ids = [str(doc_id) for doc_id in doc_ids]
+        documents = await self._hydrate(doc_ids)
+        if context.filters:
+            # The vector index has no payload to filter on; check the fetched documents
+            kept = [
+                (doc_id, score) for doc_id, score in zip(doc_ids, scores)
+                if matches_filters(documents.get(doc_id), context.filters)
+            ]
+            doc_ids, scores = [doc_id for doc_id, _ in kept], [score for _, score in kept]
+        context.semantic_results = [
+            {
+                "id": doc_id,
+                "title": documents.get(doc_id, {}).get("title", ""),
+                "body": documents.get(doc_id, {}).get("body", ""),
+                "score": float(score),
+                "source": "vector",
+            }
+            for doc_id, score in zip(doc_ids, scores)
+        ]
+
+        if context.search_type == "semantic":
+            context.final_results = context.semantic_results
+        return context
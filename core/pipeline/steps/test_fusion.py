@@ -0,0 +1,120 @@
+"""
+Vectorized fusion kernels against straightforward dict-based reference
+implementations, and the hybrid fusion step around them.
+"""
+import asyncio
+from collections import defaultdict
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pytest
+
+from core.pipeline.context import SearchContext
+from core.pipeline.steps.fusion import HybridFusionStep, reciprocal_rank_fusion, weighted_score_fusion
+
+
+def _reference_rrf(lists: Sequence[Sequence[int]], rrf_k: int, weights: Sequence[float]) -> Dict[int, float]:
+    fused = defaultdict(float)
+    for keys, weight in zip(lists, weights):
+        for rank, key in enumerate(keys, start=1):
+            fused[key] += weight / (rrf_k + rank)
+    return dict(fused)
+
+
+def _reference_weighted(lists, scores, weights) -> Dict[int, float]:
+    fused = defaultdict(float)
+    for keys, list_scores, weight in zip(lists, scores, weights):
+        if not len(list_scores):
+            continue
+        low, high = min(list_scores), max(list_scores)
+        for key, score in zip(keys, list_scores):
+            fused[key] += weight * ((score - low) / (high - low) if high > low else 1.0)
+    return dict(fused)
+
+
+def _assert_top_k(keys: np.ndarray, scores: np.ndarray, reference: Dict[int, float], k: int) -> None:
+    expected = sorted(reference.items(), key=lambda item: (-item[1], item[0]))[:k]
+    assert keys.tolist() == [key for key, _ in expected]
+    np.testing.assert_allclose(scores, [score for _, score in expected])
+
+
+def _random_lists(rng: np.random.Generator, universe: int, lengths: Sequence[int]) -> List[np.ndarray]:
+    return [rng.choice(universe, size=length, replace=False).astype(np.int64) for length in lengths]
+
+
+@pytest.mark.parametrize("dense", [False, True])
+@pytest.mark.parametrize("k", [1, 10, 1000])
+def test_rrf_matches_reference(dense, k):
+    rng = np.random.default_rng(1)
+    lists = _random_lists(rng, 500, [300, 200, 0])
+    weights = [0.7, 0.3, 1.0]
+    keys, scores = reciprocal_rank_fusion(lists, k, rrf_k=60, weights=weights, num_keys=500 if dense else None)
+    reference = _reference_rrf(lists, 60, weights)
+    if dense:
+        # Dense keys that appear in no list score 0 and may fill a large k
+        reference.update({key: 0.0 for key in range(500) if key not in reference})
+    _assert_top_k(keys, scores, reference, k)
+
+
+@pytest.mark.parametrize("dense", [False, True])
+def test_weighted_matches_reference(dense):
+    rng = np.random.default_rng(2)
+    lists = _random_lists(rng, 400, [150, 150])
+    scores = [rng.uniform(0, 30, 150), rng.uniform(-1, 1, 150)]
+    keys, fused = weighted_score_fusion(lists, scores, [0.5, 0.5], k=50, num_keys=400 if dense else None)
+    _assert_top_k(keys, fused, _reference_weighted(lists, scores, [0.5, 0.5]), 50)
+
+
+def test_weighted_constant_scores_count_fully():
+    keys, fused = weighted_score_fusion(
+        [np.array([3, 1]), np.array([1])], [np.array([2.0, 2.0]), np.array([0.4])], [0.5, 0.5], k=10
+    )
+    assert keys.tolist() == [1, 3]
+    np.testing.assert_allclose(fused, [1.0, 0.5])
+
+
+def test_ties_keep_key_order():
+    keys, _ = reciprocal_rank_fusion([np.array([9, 4]), np.array([4, 9])], k=2)
+    assert keys.tolist() == [4, 9]
+
+
+def test_empty_lists():
+    keys, scores = reciprocal_rank_fusion([np.array([], dtype=np.int64)] * 2, k=10)
+    assert len(keys) == 0 and len(scores) == 0
+
+
+def _hits(ids: Sequence[str], source: str) -> List[dict]:
+    return [{"id": doc_id, "title": doc_id, "body": "", "score": 10.0 - rank, "source": source} for rank, doc_id in enumerate(ids)]
+
+
+@pytest.mark.parametrize("method", ["rrf", "weighted"])
+def test_step_fuses_hybrid_results(method):
+    context = SearchContext(original_query="q", search_type="hybrid")
+    context.text_results = context.final_results = _hits(["a", "c", "b"], "elasticsearch")
+    context.semantic_results = _hits(["c", "d"], "vector")
+    asyncio.run(HybridFusionStep(method=method, size=3).process(context))
+
+    assert [hit["id"] for hit in context.final_results][0] == "c"
+    assert len(context.final_results) == 3
+    assert all(hit["source"] == "hybrid" for hit in context.final_results)
+
+
+def test_step_leaves_other_search_types_alone():
+    context = SearchContext(original_query="q", search_type="text")
+    context.text_results = context.final_results = _hits(["a"], "elasticsearch")
+    context.semantic_results = _hits(["b"], "vector")
+    asyncio.run(HybridFusionStep().process(context))
+    assert context.final_results == context.text_results
+
+
+def test_step_falls_back_to_semantic_results():
+    context = SearchContext(original_query="q", search_type="hybrid")
+    context.text_results = []
+    context.semantic_results = _hits(["b"], "vector")
+    asyncio.run(HybridFusionStep().process(context))
+    assert context.final_results == context.semantic_results
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        HybridFusionStep(method="borda")
@@ -1,15 +1,52 @@
 """Text-based search implementation"""
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from core.pipeline.base import PipelineStep
 from core.pipeline.context import SearchContext
 from core.clients.elasticsearch.client import ElasticsearchClient
+from core.documents.store import DocumentStore
+from core.processing.filters import matches_filters, with_filters
 import logging
 
 logger = logging.getLogger(__name__)
 
 class TextSearchStep(PipelineStep):
-    def __init__(self, search_engine: ElasticsearchClient):
+    def __init__(
+        self,
+        search_engine: ElasticsearchClient,
+        size: int = 100,
+        index: str = "msmarco-docs",
+        source_fields: Optional[List[str]] = None,
+        document_store: Optional[DocumentStore] = None,
+        filter_overfetch: int = 5,
+        semantic_fallback: bool = False
+    ):
+        """
+        Args:
+            search_engine: Client used to run the queries
+            size: Number of results to retrieve per query
+            index: Index to search
+            source_fields: Restrict `_source` to these fields (e.g. ["docid"]
+                for evaluation runs that don't need title/body)
+            document_store: Local store to take title/body from instead of
+                `_source`; pair it with source_fields=["docid"]
+            filter_overfetch: With an engine that can't filter (no
+                `supports_filters`), filtered searches fetch this many times
+                `size` hits and keep those whose stored document matches
+            semantic_fallback: Also answer semantic searches (flagged as
+                degraded), for pipelines without a semantic search step
+        """
         self.search_engine = search_engine
+        self.size = size
+        self.index = index
+        self.source_fields = source_fields
+        self.document_store = document_store
+        self.filter_overfetch = filter_overfetch
+        self.post_filter = not getattr(search_engine, "supports_filters", True)
+        self.semantic_fallback = semantic_fallback
+
+    def _skips(self, context: SearchContext) -> bool:
+        """Semantic searches are left to the semantic step, when there is one"""
+        return context.search_type == "semantic" and not self.semantic_fallback
 
     def _build_query(self, query_text: str) -> Dict[str, Any]:
         """Build Elasticsearch query"""
@@ -22,22 +59,49 @@ class TextSearchStep(PipelineStep):
             }
         }
 
-    async def process(self, context: SearchContext) -> SearchContext:
-        """Execute text search and update context"""
-        query = self._build_query(context.original_query)
-        
-        results = await self.search_engine.search(
-            query=query,
-            size=100,
-            index="msmarco-docs"
-        )
-        
-        # Transform results
+    def _query_for(self, context: SearchContext) -> Dict[str, Any]:
+        """
+        Structured query from the enricher if it ran, else the plain
+        multi_match; request filters are pushed down into its filter context
+        unless the engine can't apply them
+        """
+        if context.enriched_query:
+            query = context.enriched_query["query"]
+        else:
+            query = self._build_query(context.original_query)
+        return query if self.post_filter else with_filters(query, context.filters)
+
+    def _size_for(self, contexts: List[SearchContext]) -> int:
+        """Hits to fetch: over-fetched when some of them will be filtered out here"""
+        if self.post_filter and any(context.filters for context in contexts):
+            return self.size * self.filter_overfetch
+        return self.size
+
+    def _apply_results(self, context: SearchContext, results: List[Dict[str, Any]]) -> SearchContext:
+        """Transform engine results and store them on the context"""
+        if context.search_type == "semantic":
+            context.degrade("SemanticSearchStep: no vector index, answered by text search")
+        if getattr(results, "missing", None):
+            context.degrade(f"TextSearchStep: no results from shards {', '.join(results.missing)}")
+        elif getattr(results, "timed_out", False):
+            context.degrade("TextSearchStep: timed out (Elasticsearch returned partial hits)")
+        if self.document_store is not None:
+            documents = self.document_store.get_many([doc["docid"] for doc in results])
+            if self.post_filter and context.filters:
+                fetched = len(results)
+                results = [doc for doc in results if matches_filters(documents.get(doc["docid"]), context.filters)][:self.size]
+                if len(results) < self.size and fetched >= self.size * self.filter_overfetch:
+                    # Matches ranked below the over-fetched window were never seen
+                    context.degrade(f"TextSearchStep: filters matched {len(results)} of the top {fetched} hits")
+            results = [{**documents.get(doc["docid"], {}), **doc} for doc in results]
+        elif self.post_filter and context.filters:
+            # Nothing to check the filters against
+            results = []
         transformed_hits = [
             {
                 "id": doc["docid"],
-                "title": doc["title"],
-                "body": doc["body"],
+                "title": doc.get("title", ""),
+                "body": doc.get("body", ""),
                 "score": doc["score"],
                 "source": "elasticsearch",
             }
@@ -46,4 +110,42 @@ class TextSearchStep(PipelineStep):
         
         context.text_results = transformed_hits
         context.final_results = transformed_hits  # For now, text results are final results
-        return context 
\ No newline at end of file
+        return context
+
+    async def process(self, context: SearchContext) -> SearchContext:
+        """Execute text search and update context"""
+        if self._skips(context):
+            return context
+
+        query = self._query_for(context)
+        
+        results = await self.search_engine.search(
+            query=query,
+            size=self._size_for([context]),
+            index=self.index,
+            source_includes=self.source_fields,
+            timeout=context.remaining()
+        )
+        return self._apply_results(context, results)
+
+    async def process_many(self, contexts: List[SearchContext]) -> List[SearchContext]:
+        """Execute the text searches for a batch of contexts in one `_msearch`"""
+        text_contexts = [context for context in contexts if not self._skips(context)]
+        queries = [self._query_for(context) for context in text_contexts]
+        
+        budgets = [context.remaining() for context in text_contexts if context.deadline is not None]
+        responses = await self.search_engine.msearch(
+            queries,
+            size=self._size_for(text_contexts),
+            index=self.index,
+            source_includes=self.source_fields,
+            timeout=min(budgets, default=None)
+        )
+        
+        for context, results in zip(text_contexts, responses):
+            if isinstance(results, Exception):
+                logger.error(f"Text search failed for query '{context.original_query}': {results}")
+                context.error = str(results)
+                results = []
+            self._apply_results(context, results)
+        return contexts
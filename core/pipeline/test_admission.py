@@ -0,0 +1,243 @@
+"""
+AdaptiveLimiter: weighted admission of batches, lane order and eviction,
+slots handed back by waiters that time out or are cancelled, and the AIMD
+limit update.
+"""
+import asyncio
+import time
+from typing import List
+
+import pytest
+
+from core.pipeline.admission import CHEAP, EXPENSIVE, AdaptiveLimiter, Overloaded, Permit
+
+
+async def _fill(limiter: AdaptiveLimiter, count: int) -> List[Permit]:
+    return [await limiter.acquire(CHEAP) for _ in range(count)]
+
+
+async def _settle() -> None:
+    """Let woken waiters run to the end of `acquire`"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def _queue(limiter: AdaptiveLimiter, priority: int, weight: int = 1) -> asyncio.Task:
+    task = asyncio.create_task(limiter.acquire(priority, weight))
+    await _settle()
+    return task
+
+
+def test_batches_hold_at_most_their_share_of_the_limit():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial_limit=16, batch_share=0.5, max_queue_wait=1.0)
+        batch = await limiter.acquire(EXPENSIVE, weight=100)
+        assert (batch.slots, batch.weight) == (8, 100)
+
+        # The batches' share is taken, the rest of the limit is not
+        small = await _queue(limiter, EXPENSIVE, weight=2)
+        singles = await _fill(limiter, 8)
+        assert not small.done() and limiter.inflight == 16
+
+        batch.release()
+        await _settle()
+        small = await small
+        assert small.slots == 2 and limiter.batch_inflight == 2
+        for permit in [small, *singles]:
+            permit.release()
+        assert limiter.inflight == limiter.batch_inflight == 0
+    asyncio.run(scenario())
+
+
+def test_queued_batch_does_not_block_smaller_requests():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial_limit=8, batch_share=0.5, max_queue_wait=1.0)
+        permits = await _fill(limiter, 7)
+        batch = await _queue(limiter, EXPENSIVE, weight=4)
+        assert limiter.queued == 1
+
+        # A new arrival takes the free slot the batch can't use yet, and one
+        # queued behind the batch gets the next
+        single = await limiter.acquire(EXPENSIVE)
+        waiting = await _queue(limiter, EXPENSIVE)
+        permits[0].release()
+        await _settle()
+        assert waiting.done() and not batch.done()
+
+        for permit in permits[1:5]:
+            permit.release()
+        await _settle()
+        assert (await batch).slots == 4
+        assert limiter.inflight == 8
+    asyncio.run(scenario())
+
+
+def test_cheap_lane_is_served_first():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial_limit=4, max_queue_wait=1.0)
+        permits = await _fill(limiter, 4)
+        expensive = await _queue(limiter, EXPENSIVE)
+        cheap = await _queue(limiter, CHEAP)
+        permits[0].release()
+        await _settle()
+        assert cheap.done() and not expensive.done()
+        permits[1].release()
+        await _settle()
+        assert expensive.done()
+    asyncio.run(scenario())
+
+
+def test_cheap_arrival_evicts_newest_expensive_waiter():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial_limit=4, max_queue=2, max_queue_wait=1.0)
+        await _fill(limiter, 4)
+        older = await _queue(limiter, EXPENSIVE)
+        newer = await _queue(limiter, EXPENSIVE)
+
+        with pytest.raises(Overloaded) as full:
+            await limiter.acquire(EXPENSIVE)
+        assert full.value.reason == "queue_full"
+
+        cheap = await _queue(limiter, CHEAP)
+        with pytest.raises(Overloaded) as evicted:
+            await newer
+        assert evicted.value.reason == "evicted"
+        assert not older.done() and not cheap.done()
+        assert limiter.queued == 2
+        for task in (older, cheap):
+            task.cancel()
+        await asyncio.gather(older, cheap, return_exceptions=True)
+    asyncio.run(scenario())
+
+
+def test_waiter_times_out():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial_limit=4, max_queue_wait=0.01, retry_after=3)
+        await _fill(limiter, 4)
+        with pytest.raises(Overloaded) as shed:
+            await limiter.acquire(EXPENSIVE)
+        assert (shed.value.reason, shed.value.retry_after) == ("timeout", 3)
+        assert limiter.queued == 0 and limiter.inflight == 4
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial_limit=4, max_queue_wait=1.0)
+        permits = await _fill(limiter, 4)
+        waiter = await _queue(limiter, EXPENSIVE)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert limiter.queued == 0
+        permits[0].release()
+        assert limiter.inflight == 3
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_hands_granted_slots_on():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial_limit=4, batch_share=0.5, max_queue_wait=1.0)
+        permits = await _fill(limiter, 4)
+        first = await _queue(limiter, EXPENSIVE, weight=2)
+        second = await _queue(limiter, EXPENSIVE, weight=2)
+
+        # The slots reach `first` after it was cancelled but before it resumed
+        permits[0].release()
+        permits[1].release()
+        first.cancel()
+        outcome, = await asyncio.gather(first, return_exceptions=True)
+        if isinstance(outcome, Permit):
+            # asyncio.wait_for may let a completed wait win over the cancellation
+            outcome.release()
+        await _settle()
+        assert (await second).slots == 2
+        assert limiter.inflight == 4 and limiter.batch_inflight == 2
+    asyncio.run(scenario())
+
+
+def test_abandoned_grant_is_passed_on():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial_limit=4, max_queue_wait=1.0)
+        permits = await _fill(limiter, 4)
+        raced = (asyncio.get_running_loop().create_future(), 1)
+        limiter._queues[EXPENSIVE].append(raced)
+        waiting = await _queue(limiter, EXPENSIVE)
+
+        permits[0].release()
+        assert raced[0].result() == 1 and not waiting.done()
+        # Its wait timed out just as the slot arrived
+        limiter._abandon(raced, EXPENSIVE)
+        await _settle()
+        assert waiting.done() and limiter.inflight == 4
+    asyncio.run(scenario())
+
+
+def test_limit_grows_only_while_saturated():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial_limit=4, target_latency=1.0)
+        (await limiter.acquire()).release()
+        assert limiter.limit == 4
+
+        permits = await _fill(limiter, 4)
+        permits[0].release()
+        assert limiter.limit == pytest.approx(4.25)
+        for permit in permits[1:]:
+            permit.release()
+        assert limiter.limit == pytest.approx(4.25)
+    asyncio.run(scenario())
+
+
+def test_slow_or_failed_executions_shrink_the_limit_once_per_window():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial_limit=10, min_limit=8, target_latency=0.5, backoff=0.9)
+        permits = await _fill(limiter, 3)
+        permits[0].release(ok=False)
+        assert limiter.limit == pytest.approx(9)
+        # A burst of slow completions within `target_latency` is one signal
+        permits[1].started -= 1
+        permits[1].release()
+        assert limiter.limit == pytest.approx(9)
+
+        limiter._last_decrease -= 1
+        permits[2].release(ok=False)
+        assert limiter.limit == pytest.approx(8.1)
+        limiter._last_decrease -= 1
+        (await limiter.acquire()).release(ok=False)
+        assert limiter.limit == 8
+    asyncio.run(scenario())
+
+
+def test_batch_latency_counts_per_search():
+    async def scenario():
+        limiter = AdaptiveLimiter(initial_limit=10, target_latency=0.5)
+        batch = await limiter.acquire(EXPENSIVE, weight=10)
+        batch.started = time.perf_counter() - 2.0
+        batch.release()
+        assert limiter.limit == 10
+
+        batch = await limiter.acquire(EXPENSIVE, weight=2)
+        batch.started = time.perf_counter() - 2.0
+        batch.release()
+        assert limiter.limit == 9
+    asyncio.run(scenario())
+
+
+def test_interactive_traffic_survives_a_stream_of_batches():
+    """Singles arriving while batches run are neither shed nor stuck behind them"""
+    async def scenario():
+        limiter = AdaptiveLimiter(initial_limit=16, max_queue_wait=0.05, target_latency=10.0)
+
+        async def run(weight: int, seconds: float) -> None:
+            async with limiter.admit(EXPENSIVE, weight):
+                await asyncio.sleep(seconds)
+
+        batches = [asyncio.create_task(run(200, 0.05)) for _ in range(6)]
+        singles = []
+        for _ in range(100):
+            singles.append(asyncio.create_task(run(1, 0.005)))
+            await asyncio.sleep(0.001)
+        results = await asyncio.gather(*singles, return_exceptions=True)
+        await asyncio.gather(*batches, return_exceptions=True)
+        assert not [result for result in results if isinstance(result, Overloaded)]
+        assert limiter.inflight == limiter.queued == 0
+    asyncio.run(scenario())
@@ -0,0 +1,140 @@
+"""
+SearchPipeline deadlines: steps that would overrun the budget are cancelled,
+later and optional steps are skipped, and batches run through
+`process_many` are bounded by their earliest deadline.
+"""
+import asyncio
+import time
+from typing import List, Optional
+
+import pytest
+
+from core.pipeline.base import PipelineStep
+from core.pipeline.context import SearchContext
+from core.pipeline.executor import SearchPipeline
+
+
+class Step(PipelineStep):
+    """Sleeps, then appends its name to the results; records whether it was cancelled"""
+
+    def __init__(self, name: str, seconds: float = 0.0, optional: bool = False, fail_on: Optional[str] = None):
+        self.name = name
+        self.seconds = seconds
+        self.optional = optional
+        self.fail_on = fail_on
+        self.calls = 0
+        self.cancelled = False
+
+    async def process(self, context: SearchContext) -> SearchContext:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.seconds)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.fail_on and self.fail_on in context.original_query:
+            raise RuntimeError(f"{self.name} failed")
+        context.final_results = (context.final_results or []) + [{"id": self.name}]
+        return context
+
+
+def _ids(context: SearchContext) -> List[str]:
+    return [hit["id"] for hit in context.final_results]
+
+
+def test_unbounded_pipeline_runs_every_step():
+    steps = [Step("a"), Step("b", optional=True)]
+    context = asyncio.run(SearchPipeline(steps).execute("q"))
+    assert _ids(context) == ["a", "b"]
+    assert context.deadline is None and not context.partial
+
+
+def test_overrunning_step_is_cancelled_and_later_steps_skipped():
+    slow, after = Step("slow", seconds=1.0), Step("after")
+    pipeline = SearchPipeline([Step("first"), slow, after], timeout=0.05)
+    start = time.perf_counter()
+    context = asyncio.run(pipeline.execute("q"))
+
+    assert time.perf_counter() - start < 0.5
+    assert slow.cancelled and after.calls == 0
+    assert _ids(context) == ["first"]
+    assert context.degraded == ["Step: timed out", "Step: skipped"]
+    assert context.partial
+
+
+def test_request_cut_off_before_any_results_answers_with_none():
+    context = asyncio.run(SearchPipeline([Step("slow", seconds=1.0)], timeout=0.01).execute("q"))
+    assert context.final_results == [] and context.partial
+
+
+def test_optional_steps_are_skipped_near_the_deadline():
+    optional, required = Step("optional", optional=True), Step("required")
+    pipeline = SearchPipeline([optional, required], timeout=0.5, min_step_budget=1.0)
+    context = asyncio.run(pipeline.execute("q"))
+    assert optional.calls == 0
+    assert _ids(context) == ["required"]
+    assert context.degraded == ["Step: skipped"]
+
+
+def test_existing_deadline_is_kept():
+    pipeline = SearchPipeline([Step("a", seconds=0.05)], timeout=0.01)
+    context = SearchContext(original_query="q", deadline=time.monotonic() + 1.0)
+
+    async def run():
+        return [ctx async for _, ctx in pipeline._run(context)]
+
+    [context] = asyncio.run(run())
+    assert _ids(context) == ["a"] and not context.partial
+
+
+def test_stream_yields_after_each_step():
+    async def run():
+        pipeline = SearchPipeline([Step("a"), Step("b")])
+        return [(step.name, _ids(context)) async for step, context in pipeline.stream("q")]
+
+    assert asyncio.run(run()) == [("a", ["a"]), ("b", ["a", "b"])]
+
+
+def _contexts(*deadlines) -> List[SearchContext]:
+    now = time.monotonic()
+    return [
+        SearchContext(original_query=f"q{i}", deadline=None if deadline is None else now + deadline)
+        for i, deadline in enumerate(deadlines)
+    ]
+
+
+def test_batch_is_bounded_by_its_earliest_deadline():
+    slow, after = Step("slow", seconds=1.0), Step("after")
+    pipeline = SearchPipeline([Step("first"), slow, after])
+    start = time.perf_counter()
+    contexts = asyncio.run(pipeline.process_many(_contexts(None, 0.05, 5.0)))
+
+    assert time.perf_counter() - start < 0.5
+    assert slow.cancelled and after.calls == 0
+    for context in contexts:
+        assert _ids(context) == ["first"]
+        assert context.degraded == ["Step: timed out", "Step: skipped"]
+
+
+def test_batch_skips_optional_step_for_everyone():
+    optional = Step("optional", optional=True)
+    pipeline = SearchPipeline([optional, Step("required")], min_step_budget=1.0)
+    contexts = asyncio.run(pipeline.process_many(_contexts(None, 0.5)))
+    assert optional.calls == 0
+    assert all(_ids(context) == ["required"] and context.partial for context in contexts)
+
+
+def test_batch_without_deadlines_gets_the_pipeline_timeout():
+    pipeline = SearchPipeline([Step("slow", seconds=1.0)], timeout=0.05)
+    contexts = asyncio.run(pipeline.execute_many(["a", "b"], search_type="text"))
+    assert all(context.deadline is not None for context in contexts)
+    assert all(context.final_results == [] and context.degraded == ["Step: timed out"] for context in contexts)
+
+
+@pytest.mark.parametrize("timeout", [None, 1.0])
+def test_batch_step_failure_stays_with_its_context(timeout):
+    pipeline = SearchPipeline([Step("a", fail_on="bad"), Step("b")], timeout=timeout)
+    good, bad = asyncio.run(pipeline.execute_many(["good", "bad"]))
+    assert good.error is None and _ids(good) == ["a", "b"]
+    assert bad.error == "a failed" and _ids(bad) == ["b"]
+    assert not good.partial and not bad.partial
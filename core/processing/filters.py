@@ -0,0 +1,140 @@
+"""
+Structured search filters.
+
+A filter maps a field to one value (term), a list of values (terms) or a
+dict of range bounds (gt/gte/lt/lte). Only fields mapped with a non-text
+type in `es_mappings` can be filtered on. Filters are normalized (fields
+and values sorted, duplicates dropped, keyword values as strings) so that
+equivalent filters produce the same ES clauses and the same cache key.
+They run in the `bool.filter` context: unscored and cached per segment by
+the node query cache.
+
+A field only matches once documents were indexed with it: indices created
+before `url` was mapped as keyword (and indexed by DataProcessor) have to be
+deleted and re-indexed, or filters on it match nothing.
+
+In the web UI filters come from query parameters:
+    filter.<field>=<value>          (repeat for several values)
+    filter.<field>.<op>=<bound>     (op is gt, gte, lt or lte)
+"""
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+RANGE_OPERATORS = ("gt", "gte", "lt", "lte")
+# Mapping types that have exact values (text fields are analyzed)
+FILTERABLE_TYPES = frozenset({
+    "keyword", "constant_keyword", "boolean", "date", "ip",
+    "long", "integer", "short", "byte", "double", "float", "half_float", "scaled_float",
+})
+
+def filterable_fields(es_mappings: Dict[str, Any]) -> Dict[str, str]:
+    """Field name -> mapping type of the fields filters may use"""
+    properties = es_mappings.get("mappings", {}).get("properties", {})
+    return {
+        field: spec["type"] for field, spec in properties.items()
+        if spec.get("type") in FILTERABLE_TYPES
+    }
+
+def _normalize_value(value: Any, field_type: str) -> Any:
+    if isinstance(value, (dict, list, tuple)) or value is None:
+        raise ValueError(f"Invalid filter value: {value!r}")
+    return str(value) if field_type == "keyword" else value
+
+def normalize_filters(filters: Optional[Dict[str, Any]], allowed: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Canonical form of request filters.
+
+    Args:
+        filters: Raw filters from the request
+        allowed: Filterable fields and their types (see `filterable_fields`)
+
+    Returns:
+        Normalized filters, or None if there are none
+
+    Raises:
+        ValueError: For unknown fields, unknown range operators or empty values
+    """
+    if not filters:
+        return None
+    normalized = {}
+    for field in sorted(filters):
+        if field not in allowed:
+            raise ValueError(f"Cannot filter on '{field}'; filterable fields: {sorted(allowed)}")
+        value, field_type = filters[field], allowed[field]
+        if isinstance(value, dict):
+            unknown = set(value) - set(RANGE_OPERATORS)
+            if unknown or not value:
+                raise ValueError(f"Range filter on '{field}' takes {list(RANGE_OPERATORS)}, got {sorted(value)}")
+            normalized[field] = {op: _normalize_value(value[op], field_type) for op in RANGE_OPERATORS if op in value}
+        elif isinstance(value, (list, tuple)):
+            values = sorted({_normalize_value(item, field_type) for item in value}, key=str)
+            if not values:
+                raise ValueError(f"Empty value list for filter '{field}'")
+            normalized[field] = values[0] if len(values) == 1 else values
+        else:
+            normalized[field] = _normalize_value(value, field_type)
+    return normalized
+
+def filters_from_params(params: Iterable[Tuple[str, str]]) -> Dict[str, Any]:
+    """Raw filters from `filter.`-prefixed query parameters (in request order)"""
+    filters: Dict[str, Any] = {}
+    for key, value in params:
+        if not key.startswith("filter."):
+            continue
+        field, _, op = key[len("filter."):].partition(".")
+        if op:
+            filters.setdefault(field, {})[op] = value
+        elif field in filters:
+            filters[field] = [*filters[field], value] if isinstance(filters[field], list) else [filters[field], value]
+        else:
+            filters[field] = value
+    return filters
+
+def filter_clauses(filters: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """ES filter-context clauses of normalized filters"""
+    clauses = []
+    for field, value in (filters or {}).items():
+        if isinstance(value, dict):
+            clauses.append({"range": {field: value}})
+        elif isinstance(value, list):
+            clauses.append({"terms": {field: value}})
+        else:
+            clauses.append({"term": {field: value}})
+    return clauses
+
+def with_filters(query: Dict[str, Any], filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Wrap a scoring query so the filters restrict it without affecting scores"""
+    if not filters:
+        return query
+    return {"bool": {"must": query, "filter": filter_clauses(filters)}}
+
+def matches_filters(document: Optional[Dict[str, Any]], filters: Optional[Dict[str, Any]]) -> bool:
+    """
+    Evaluate normalized filters against a fetched document, for hits that
+    don't come from Elasticsearch (vector search); a missing field fails.
+    """
+    if not filters:
+        return True
+    if document is None:
+        return False
+    for field, expected in filters.items():
+        if field not in document or document[field] is None:
+            return False
+        value = document[field]
+        if isinstance(expected, dict):
+            bounds = {"gt": value.__gt__, "gte": value.__ge__, "lt": value.__lt__, "lte": value.__le__}
+            try:
+                if not all(bounds[op](type(value)(bound)) for op, bound in expected.items()):
+                    return False
+            except (TypeError, ValueError):
+                return False
+        elif isinstance(expected, list):
+            if str(value) not in {str(item) for item in expected}:
+                return False
+        elif str(value) != str(expected):
+            return False
+    return True
+
+def filters_cache_key(filters: Optional[Dict[str, Any]]) -> str:
+    """Stable string form of normalized filters for result-cache keys ("" if none)"""
+    return json.dumps(filters, sort_keys=True, separators=(",", ":")) if filters else ""
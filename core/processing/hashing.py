@@ -0,0 +1,104 @@
+"""
+Docid and term hashing shared by the memory-mapped stores (features,
+documents) and the spelling index: 64-bit FNV-1a over fixed-width byte
+keys, and open-addressing (linear probing) tables from hash to row.
+"""
+from typing import Sequence
+
+import numpy as np
+
+FNV_OFFSET = np.uint64(0xcbf29ce484222325)
+FNV_PRIME = np.uint64(0x100000001b3)
+
+
+def encode_docids(docids: Sequence[str]) -> np.ndarray:
+    """Fixed-width bytes array of docids (fast path for ASCII ids)"""
+    try:
+        return np.array(docids, dtype="S")
+    except UnicodeEncodeError:
+        return np.char.encode(np.asarray(docids, dtype=str), "utf-8")
+
+
+def fnv1a_hash(keys: np.ndarray) -> np.ndarray:
+    """
+    64-bit FNV-1a of each key (docid, term, ...), vectorized over the byte columns.
+
+    Zero (padding) bytes are skipped, so the hash doesn't depend on the
+    fixed width the keys were stored with. 0 is reserved for empty slots.
+    """
+    keys = np.asarray(keys)
+    if keys.dtype.kind != "S":
+        keys = encode_docids(keys.tolist())
+    width = keys.dtype.itemsize
+    data = np.ascontiguousarray(keys).view(np.uint8).reshape(len(keys), width)
+    hashes = np.full(len(keys), FNV_OFFSET, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for column in data.T:
+            mixed = (hashes ^ column.astype(np.uint64)) * FNV_PRIME
+            hashes = np.where(column != 0, mixed, hashes)
+    hashes[hashes == 0] = 1
+    return hashes
+
+
+def build_hash_table(hashes: np.ndarray, load_factor: float = 0.5):
+    """Open-addressing (linear probing) table mapping docid hash -> row"""
+    table_size = 1 << int(np.ceil(np.log2(max(2, len(hashes) / load_factor))))
+    mask = np.uint64(table_size - 1)
+    keys = np.zeros(table_size, dtype=np.uint64)
+    rows = np.full(table_size, -1, dtype=np.int32)
+
+    pending = np.arange(len(hashes))
+    slots = hashes & mask
+    while len(pending):
+        # First claimant of each free slot wins; the rest probe the next slot
+        free = keys[slots] == 0
+        candidate_slots, first = np.unique(slots[free], return_index=True)
+        winners = pending[free][first]
+        keys[candidate_slots] = hashes[winners]
+        rows[candidate_slots] = winners
+        placed = np.zeros(len(pending), dtype=bool)
+        placed[np.flatnonzero(free)[first]] = True
+        pending = pending[~placed]
+        slots = (slots[~placed] + np.uint64(1)) & mask
+    return keys, rows
+
+
+def lookup_rows(
+    docids: Sequence[str],
+    stored_docids: np.ndarray,
+    hash_keys: np.ndarray,
+    hash_rows: np.ndarray
+) -> np.ndarray:
+    """Probe a table from `build_hash_table` for each docid; row index, -1 if unknown"""
+    encoded = encode_docids(docids)
+    hashes = fnv1a_hash(encoded)
+    mask = np.uint64(len(hash_keys) - 1)
+    result = np.full(len(hashes), -1, dtype=np.int64)
+    pending = np.arange(len(hashes))
+    slots = hashes & mask
+    while len(pending):
+        slot_keys = hash_keys[slots]
+        found = slot_keys == hashes[pending]
+        result[pending[found]] = hash_rows[slots[found]]
+        unresolved = ~found & (slot_keys != 0)
+        pending, slots = pending[unresolved], (slots[unresolved] + np.uint64(1)) & mask
+
+    # Guard against 64-bit hash collisions
+    hit = result >= 0
+    mismatched = stored_docids[result[hit]] != encoded[hit]
+    result[np.flatnonzero(hit)[mismatched]] = -1
+    return result
+
+
+_FNV_OFFSET_INT = int(FNV_OFFSET)
+_FNV_PRIME_INT = int(FNV_PRIME)
+_MASK64 = (1 << 64) - 1
+
+
+def fnv1a(key: bytes) -> int:
+    """Scalar `fnv1a_hash`, cheaper than the vectorized one for a single key"""
+    h = _FNV_OFFSET_INT
+    for byte in key:
+        if byte:
+            h = ((h ^ byte) * _FNV_PRIME_INT) & _MASK64
+    return h or 1
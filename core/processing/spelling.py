@@ -0,0 +1,227 @@
+"""
+SymSpell-style spelling correction.
+
+Instead of comparing a misspelled word against the whole vocabulary, every
+vocabulary term is indexed offline under all strings obtainable from (the
+first `prefix_length` characters of) it by deleting up to
+`max_edit_distance` characters. At query time the same deletes are generated
+for the input word; any term sharing a delete is a candidate, and only those
+few candidates are checked with a real edit distance. A lookup therefore
+touches a few dozen index entries regardless of vocabulary size.
+
+The index is stored as flat NumPy arrays in one directory:
+
+    meta.json           max_edit_distance, prefix_length
+    terms.npy           (n,) sorted fixed-width bytes vocabulary
+    counts.npy          (n,) int64 corpus frequency of each term
+    delete_hashes.npy   (m,) uint64 FNV-1a hash of each delete, sorted
+    delete_terms.npy    (m,) int32 term index of each delete
+
+Deletes are stored as hashes, so a collision can only add a candidate,
+which the edit-distance check then rejects.
+"""
+import json
+import re
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+
+import numpy as np
+
+from core.processing.hashing import fnv1a_hash
+
+WORD_PATTERN = re.compile(r"[a-z]+")
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """All strings reachable from `word` by deleting up to `max_distance` characters"""
+    result = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {candidate[:i] + candidate[i + 1:] for candidate in frontier for i in range(len(candidate))}
+        frontier -= result
+        result |= frontier
+    return result
+
+
+def _edit_distances(word: bytes, terms: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    Optimal string alignment distance from `word` to each of `terms`
+    (fixed-width bytes), computed for all terms at once.
+
+    The DP rows are stored shifted by the column index (D[i][j] - j). In that
+    form insertions, the only dependency along a row, become a plain running
+    minimum, so each row is a handful of array operations.
+    """
+    a = np.frombuffer(word, dtype=np.uint8)
+    b = np.ascontiguousarray(terms).view(np.uint8).reshape(len(terms), -1)
+    num_terms, width = b.shape
+    matches = b[:, :, None] == a
+    # Substitution cost minus the one column of shift
+    substitution = (~matches).astype(np.int16) - 1
+    # Transposition of a[i-2:i] with b[j-2:j] costs 1, again minus the two columns of shift
+    transposition = np.where(matches[:, :-1, 1:] & matches[:, 1:, :-1], np.int16(-1), np.int16(width + len(a)))
+
+    previous_previous = None
+    previous = np.zeros((num_terms, width + 1), dtype=np.int16)
+    for i in range(1, len(a) + 1):
+        current = np.empty_like(previous)
+        current[:, 0] = i
+        np.minimum(previous[:, 1:] + 1, previous[:, :-1] + substitution[:, :, i - 1], out=current[:, 1:])
+        if i > 1:
+            np.minimum(current[:, 2:], previous_previous[:, :-2] + transposition[:, :, i - 2], out=current[:, 2:])
+        np.minimum.accumulate(current, axis=1, out=current)
+        previous_previous, previous = previous, current
+    return previous[np.arange(num_terms), lengths] + lengths
+
+
+class SpellingCorrector:
+    def __init__(
+        self,
+        terms: np.ndarray,
+        counts: np.ndarray,
+        delete_hashes: np.ndarray,
+        delete_terms: np.ndarray,
+        max_edit_distance: int = 2,
+        prefix_length: int = 7,
+        min_word_length: int = 3,
+        cache_size: int = 50_000
+    ):
+        """
+        Args:
+            terms: Sorted vocabulary (bytes)
+            counts: Frequency of each term
+            delete_hashes: Sorted hashes of the indexed deletes
+            delete_terms: Term index of each delete
+            max_edit_distance: Largest correction considered
+            prefix_length: Characters of each word that are indexed
+            min_word_length: Shorter words are never corrected
+            cache_size: Words whose correction is memoized
+        """
+        self.terms = terms
+        self.counts = counts
+        self.delete_hashes = delete_hashes
+        self.delete_terms = delete_terms
+        self.max_edit_distance = max_edit_distance
+        self.prefix_length = prefix_length
+        self.min_word_length = min_word_length
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lengths = np.char.str_len(terms).astype(np.int16)
+
+    @classmethod
+    def build(
+        cls,
+        term_counts: Dict[str, int],
+        max_edit_distance: int = 2,
+        prefix_length: int = 7
+    ) -> "SpellingCorrector":
+        """Index a vocabulary of {term: count}"""
+        vocabulary = sorted(term_counts)
+        deletes: List[str] = []
+        owners: List[int] = []
+        for i, term in enumerate(vocabulary):
+            term_deletes = _deletes(term[:prefix_length], max_edit_distance)
+            deletes.extend(term_deletes)
+            owners.extend([i] * len(term_deletes))
+
+        delete_hashes = fnv1a_hash(np.array(deletes, dtype="S")) if deletes else np.array([], dtype=np.uint64)
+        delete_terms = np.array(owners, dtype=np.int32)
+        order = np.argsort(delete_hashes, kind="stable")
+        return cls(
+            np.array(vocabulary, dtype="S"),
+            np.array([term_counts[term] for term in vocabulary], dtype=np.int64),
+            delete_hashes[order],
+            delete_terms[order],
+            max_edit_distance,
+            prefix_length
+        )
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "SpellingCorrector":
+        index_dir = Path(path)
+        with open(index_dir / "meta.json") as f:
+            meta = json.load(f)
+        arrays = [
+            np.load(index_dir / f"{name}.npy", mmap_mode="r")
+            for name in ("terms", "counts", "delete_hashes", "delete_terms")
+        ]
+        return cls(*arrays, meta["max_edit_distance"], meta["prefix_length"], **kwargs)
+
+    def save(self, path: str) -> None:
+        index_dir = Path(path)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        for name in ("terms", "counts", "delete_hashes", "delete_terms"):
+            np.save(index_dir / f"{name}.npy", getattr(self, name))
+        with open(index_dir / "meta.json", "w") as f:
+            json.dump({"max_edit_distance": self.max_edit_distance, "prefix_length": self.prefix_length}, f)
+
+    def __contains__(self, word: str) -> bool:
+        key = word.encode("utf-8")
+        i = int(np.searchsorted(self.terms, key))
+        return i < len(self.terms) and self.terms[i] == key
+
+    def _candidates(self, word: str) -> np.ndarray:
+        """Terms sharing a delete with `word` whose length is within the edit distance"""
+        deletes = np.array(list(_deletes(word[:self.prefix_length], self.max_edit_distance)), dtype="S")
+        hashes = fnv1a_hash(deletes)
+        starts = np.searchsorted(self.delete_hashes, hashes, side="left")
+        ends = np.searchsorted(self.delete_hashes, hashes, side="right")
+        hit = ends > starts
+        if not hit.any():
+            return np.array([], dtype=np.int32)
+        starts, ends = starts[hit], ends[hit]
+        # Flatten the matching [start, end) ranges without a Python loop
+        sizes = ends - starts
+        positions = np.repeat(starts - np.cumsum(sizes) + sizes, sizes) + np.arange(sizes.sum())
+        candidates = np.unique(self.delete_terms[positions])
+        # Short deletes are shared by many terms; most are ruled out by length alone
+        close = np.abs(self._lengths[candidates] - len(word)) <= self.max_edit_distance
+        return candidates[close]
+
+    def _lookup(self, word: str) -> str:
+        if len(word) < self.min_word_length or word in self:
+            return word
+        candidates = self._candidates(word)
+        if not len(candidates):
+            return word
+        distances = _edit_distances(word.encode("utf-8"), self.terms[candidates], self._lengths[candidates])
+        close = distances <= self.max_edit_distance
+        if not close.any():
+            return word
+        candidates, distances = candidates[close], distances[close]
+        # Closest first, then most frequent
+        best = np.lexsort((-self.counts[candidates], distances))[0]
+        return self.terms[candidates[best]].decode("utf-8")
+
+    def correct_word(self, word: str) -> str:
+        """Most likely intended term for `word` (unchanged if known or no close term exists)"""
+        corrected = self._cache.get(word)
+        if corrected is None:
+            corrected = self._lookup(word)
+            if self.cache_size > 0:
+                self._cache[word] = corrected
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return corrected
+
+    def correct(self, text: str) -> Tuple[str, Dict[str, str]]:
+        """Correct every lowercase word in `text`; returns (corrected text, {original: correction})"""
+        corrections: Dict[str, str] = {}
+
+        def replace(match: "re.Match") -> str:
+            word = match.group(0)
+            corrected = self.correct_word(word)
+            if corrected != word:
+                corrections[word] = corrected
+            return corrected
+
+        return WORD_PATTERN.sub(replace, text), corrections
+
+
+def count_terms(texts: Iterable[str]) -> Dict[str, int]:
+    """Corpus term frequencies over lowercase alphabetic words"""
+    counts: Counter = Counter()
+    for text in texts:
+        counts.update(WORD_PATTERN.findall(text.lower()))
+    return counts
@@ -0,0 +1,135 @@
+"""
+Compact term -> related-terms table for query expansion.
+
+The table is built offline (data_processing/build_synonyms.py) from corpus
+co-occurrence statistics, optionally merged with a hand-curated list, and
+stored as flat arrays in CSR layout:
+
+    terms.npy       (n,) sorted fixed-width bytes keys (terms or phrases)
+    offsets.npy     (n + 1,) int32; expansions of term i are [offsets[i], offsets[i+1])
+    targets.npy     (m,) int32 index into terms.npy of each expansion
+    weights.npy     (m,) float16 expansion weight in (0, 1], best first
+
+All four arrays are memory-mapped; a lookup is a binary search over the
+sorted keys, so nothing per-term is materialized in Python at load time.
+"""
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+
+
+class SynonymTable:
+    def __init__(self, terms: np.ndarray, offsets: np.ndarray, targets: np.ndarray, weights: np.ndarray):
+        self.terms = terms
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    @classmethod
+    def load(cls, path: str) -> "SynonymTable":
+        table_dir = Path(path)
+        return cls(*(np.load(table_dir / f"{name}.npy", mmap_mode="r") for name in ("terms", "offsets", "targets", "weights")))
+
+    def save(self, path: str) -> None:
+        table_dir = Path(path)
+        table_dir.mkdir(parents=True, exist_ok=True)
+        for name in ("terms", "offsets", "targets", "weights"):
+            np.save(table_dir / f"{name}.npy", getattr(self, name))
+
+    def expand(self, term: str, limit: int = 3) -> List[Tuple[str, float]]:
+        """Up to `limit` (expansion, weight) pairs for a term or phrase, best first"""
+        key = term.encode("utf-8")
+        if len(key) > self.terms.dtype.itemsize:
+            return []
+        i = int(np.searchsorted(self.terms, key))
+        if i >= len(self.terms) or self.terms[i] != key:
+            return []
+        start = int(self.offsets[i])
+        end = min(int(self.offsets[i + 1]), start + limit)
+        return [
+            (self.terms[target].decode("utf-8"), float(weight))
+            for target, weight in zip(self.targets[start:end], self.weights[start:end])
+        ]
+
+    @classmethod
+    def from_mapping(cls, mapping: Dict[str, Sequence[Tuple[str, float]]]) -> "SynonymTable":
+        """Build a table from {term: [(expansion, weight), ...]}"""
+        vocabulary = sorted(set(mapping) | {target for expansions in mapping.values() for target, _ in expansions})
+        terms = np.array([term.encode("utf-8") for term in vocabulary], dtype="S")
+        index = {term: i for i, term in enumerate(vocabulary)}
+
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int32)
+        targets: List[int] = []
+        weights: List[float] = []
+        for i, term in enumerate(vocabulary):
+            expansions = sorted(mapping.get(term, ()), key=lambda pair: -pair[1])
+            targets.extend(index[target] for target, _ in expansions)
+            weights.extend(weight for _, weight in expansions)
+            offsets[i + 1] = len(targets)
+        return cls(terms, offsets, np.array(targets, dtype=np.int32), np.array(weights, dtype=np.float16))
+
+
+def cooccurrence_expansions(
+    documents: Sequence[str],
+    max_terms: int = 50_000,
+    top_k: int = 5,
+    min_df: int = 5,
+    min_cooccurrence: int = 3,
+    min_pmi: float = 1.0
+) -> Dict[str, List[Tuple[str, float]]]:
+    """
+    Related terms by document co-occurrence (positive PMI).
+
+    Args:
+        documents: Texts to count co-occurrences in
+        max_terms: Vocabulary size (most frequent terms)
+        top_k: Expansions kept per term
+        min_df: Minimum document frequency of a term
+        min_cooccurrence: Minimum number of documents two terms must share
+        min_pmi: Minimum pointwise mutual information of a kept pair
+
+    Returns:
+        {term: [(related term, weight in (0, 1]), ...]}, best first
+    """
+    vectorizer = CountVectorizer(
+        binary=True,
+        stop_words='english',
+        token_pattern=r'(?u)\b[a-z][a-z-]{2,}\b',
+        lowercase=True,
+        max_features=max_terms,
+        min_df=min_df,
+        dtype=np.float32
+    )
+    X = vectorizer.fit_transform(documents).tocsc()
+    vocabulary = vectorizer.get_feature_names_out()
+    num_docs = X.shape[0]
+    df = np.asarray(X.sum(axis=0)).ravel()
+
+    cooccurrence = (X.T @ X).tocsr()
+    cooccurrence.setdiag(0)
+    cooccurrence.eliminate_zeros()
+
+    expansions: Dict[str, List[Tuple[str, float]]] = {}
+    for i in range(len(vocabulary)):
+        start, end = cooccurrence.indptr[i], cooccurrence.indptr[i + 1]
+        neighbours = cooccurrence.indices[start:end]
+        counts = cooccurrence.data[start:end]
+        keep = counts >= min_cooccurrence
+        neighbours, counts = neighbours[keep], counts[keep]
+        if not len(neighbours):
+            continue
+        pmi = np.log(counts * num_docs / (df[i] * df[neighbours]))
+        keep = pmi >= min_pmi
+        neighbours, pmi = neighbours[keep], pmi[keep]
+        if not len(neighbours):
+            continue
+        top = np.argsort(-pmi, kind="stable")[:top_k]
+        # Normalize so the strongest expansion of each term has weight 1
+        weights = pmi[top] / pmi[top[0]]
+        expansions[vocabulary[i]] = [(vocabulary[j], float(w)) for j, w in zip(neighbours[top], weights)]
+    return expansions
@@ -0,0 +1,22 @@
+"""
+Unicode tables shared by the query parser and the embedded analyzer.
+"""
+import sys
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Optional
+
+
+@lru_cache(maxsize=None)
+def combining_marks() -> Dict[int, Optional[str]]:
+    """
+    str.translate table deleting every combining mark (category Mn).
+
+    Scanning all of Unicode takes a noticeable fraction of a second, so the
+    table is built once per process, on first use (or by `preload_shared_data`
+    before workers fork). Callers must not modify it; copy it to extend it.
+    """
+    return {
+        codepoint: None for codepoint in range(sys.maxunicode + 1)
+        if unicodedata.category(chr(codepoint)) == 'Mn'
+    }
@@ -1,40 +1,323 @@
-from fastapi import Depends
+from fastapi import Depends, Header, HTTPException
 from functools import lru_cache
-from typing import AsyncGenerator, List
+import hmac
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, List, Optional
+import asyncio
+import logging
+from core.clients.bm25_client import EmbeddedSearchClient
 from core.clients.elasticsearch.client import ElasticsearchClient
+from core.clients.federated_client import FederatedSearchClient, SearchShard
+from core.clients.qdrant_client import QdrantClient
+from core.clients.redis_client import RedisClient
+from core.documents.store import DocumentStore
+from core.features.store import FeatureStore
+from core.embeddings.batching import BatchingQueryEncoder
+from core.embeddings.encoder import load_encoder
+from core.pipeline.admission import AdaptiveLimiter
 from core.pipeline.executor import SearchPipeline
 from core.pipeline.base import PipelineStep
+from core.pipeline.steps.enricher import EnricherStep
+from core.pipeline.steps.fusion import HybridFusionStep
+from core.pipeline.steps.reranker import RerankerStep, load_reranker
+from core.pipeline.steps.semantic_search import SemanticSearchStep
 from core.pipeline.steps.text_search import TextSearchStep
 from core.search_api.settings import Settings
 from core.pipeline.steps.parser import QueryParser
+from core.lexical.analyzer import folding_table
+from core.processing.filters import filterable_fields
+from core.processing.spelling import SpellingCorrector
+from core.processing.synonyms import SynonymTable
+from core.processing.unicode import combining_marks
+from core.vector.ivf import IVFIndex
+
+logger = logging.getLogger(__name__)
 
 @lru_cache()
 def get_settings() -> Settings:
     """Get cached search settings"""
     return Settings()
 
+def require_admin(
+    x_admin_token: str = Header(default=""),
+    settings: Settings = Depends(get_settings)
+) -> None:
+    """Guard for admin endpoints: they don't exist unless an admin token is configured"""
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@lru_cache()
+def get_result_cache() -> RedisClient:
+    """Process-wide Redis result cache for routes that cache results themselves (batch search)"""
+    settings = get_settings()
+    return RedisClient(redis_url=settings.redis_url, max_queries=settings.max_cache_queries, ttl=settings.cache_ttl)
+
+@lru_cache()
+def get_admission_limiter() -> Optional[AdaptiveLimiter]:
+    """Process-wide concurrency limiter for pipeline executions; None if admission control is disabled"""
+    settings = get_settings()
+    if not settings.admission_enabled:
+        return None
+    return AdaptiveLimiter(
+        initial_limit=settings.admission_initial_limit,
+        min_limit=settings.admission_min_limit,
+        max_limit=settings.admission_max_limit,
+        target_latency=settings.admission_target_latency_ms / 1000,
+        max_queue=settings.admission_max_queue,
+        max_queue_wait=settings.admission_max_queue_wait_ms / 1000,
+        retry_after=settings.admission_retry_after_s,
+        batch_share=settings.admission_batch_share
+    )
+
+@lru_cache()
+def get_filterable_fields() -> Dict[str, str]:
+    """Fields request filters may use, as declared in es_mappings"""
+    return filterable_fields(get_settings().es_mappings)
+
+@lru_cache()
+def get_vector_index() -> Optional[Any]:
+    """
+    Get the configured vector backend once per process: the local IVF index
+    (None if it hasn't been built) or a pooled Qdrant client
+    """
+    settings = get_settings()
+    if settings.vector_backend == "qdrant":
+        return QdrantClient(
+            base_url=settings.qdrant_url,
+            collection=settings.qdrant_collection,
+            api_key=settings.qdrant_api_key,
+            pool_size=settings.qdrant_pool_size,
+            hnsw_ef=settings.qdrant_hnsw_ef
+        )
+    if not (Path(settings.vector_index_path) / "meta.json").exists():
+        logger.warning(f"No vector index at {settings.vector_index_path}, semantic search disabled")
+        return None
+    return IVFIndex.load(settings.vector_index_path, nprobe=settings.vector_nprobe)
+
+@lru_cache()
+def get_query_encoder() -> BatchingQueryEncoder:
+    """Get the process-wide batching query encoder matching the vector index"""
+    settings = get_settings()
+    return BatchingQueryEncoder(
+        load_encoder(settings.encoder_backend, settings.encoder_model, settings.embedding_dim),
+        max_batch_size=settings.query_encoder_batch_size,
+        max_wait=settings.query_encoder_max_wait_ms / 1000,
+        cache_size=settings.query_embedding_cache_size
+    )
+
+@lru_cache()
+def get_feature_store() -> Optional[FeatureStore]:
+    """Open the per-document feature store once per process; None if it hasn't been built"""
+    settings = get_settings()
+    if not (Path(settings.feature_store_path) / "meta.json").exists():
+        logger.warning(f"No feature store at {settings.feature_store_path}, reranking without static features")
+        return None
+    return FeatureStore(settings.feature_store_path)
+
+@lru_cache()
+def get_document_store() -> Optional[DocumentStore]:
+    """Open the local document store once per process; None if it hasn't been built"""
+    settings = get_settings()
+    if not (Path(settings.document_store_path) / "meta.json").exists():
+        logger.warning(f"No document store at {settings.document_store_path}, hits are hydrated from the search engine")
+        return None
+    return DocumentStore(settings.document_store_path)
+
+@lru_cache()
+def get_spelling_corrector() -> Optional[SpellingCorrector]:
+    """Open the spelling index once per process; None if disabled or not built"""
+    settings = get_settings()
+    if not settings.spelling_enabled:
+        return None
+    if not (Path(settings.spelling_index_path) / "meta.json").exists():
+        logger.warning(f"No spelling index at {settings.spelling_index_path}, queries won't be corrected")
+        return None
+    return SpellingCorrector.load(settings.spelling_index_path)
+
+@lru_cache()
+def get_query_parser() -> QueryParser:
+    """Process-wide query parser, shared by the pipeline and the cache key"""
+    return QueryParser(spelling=get_spelling_corrector())
+
+@lru_cache()
+def get_enricher_step() -> EnricherStep:
+    """Process-wide enricher, so the expansion table is loaded once and its LRU is shared"""
+    settings = get_settings()
+    table = None
+    if (Path(settings.synonyms_path) / "terms.npy").exists():
+        table = SynonymTable.load(settings.synonyms_path)
+    else:
+        logger.warning(f"No synonym table at {settings.synonyms_path}, queries won't be expanded")
+    return EnricherStep(
+        table,
+        max_expansions_per_term=settings.max_expansions_per_term,
+        max_expansions=settings.max_query_expansions,
+        expansion_boost=settings.expansion_boost,
+        cache_size=settings.enrichment_cache_size
+    )
+
+@lru_cache()
+def get_reranker_step() -> RerankerStep:
+    """Process-wide reranker step, so its worker pool and admission limit are shared by all requests"""
+    settings = get_settings()
+    return RerankerStep(
+        load_reranker(settings.reranker_backend, settings.reranker_model, get_feature_store()),
+        depths=settings.rerank_depths,
+        timeout=settings.rerank_timeout_ms / 1000,
+        workers=settings.rerank_workers,
+        max_inflight=settings.rerank_max_inflight,
+        batch_size=settings.rerank_batch_size
+    )
+
+@lru_cache()
+def get_embedded_search_client() -> EmbeddedSearchClient:
+    """Open the embedded BM25 index once per process"""
+    return EmbeddedSearchClient.from_path(get_settings().bm25_index_path, get_document_store())
+
+@lru_cache()
+def get_shared_elasticsearch_client() -> ElasticsearchClient:
+    """
+    Process-wide Elasticsearch client, so connections are pooled and the
+    latency windows and circuit breakers see all traffic (closed at shutdown)
+    """
+    settings = get_settings()
+    return ElasticsearchClient(hosts=settings.elasticsearch_hosts or [settings.elasticsearch_url], settings=settings)
+
+@lru_cache()
+def get_federated_search_client() -> FederatedSearchClient:
+    """Process-wide scatter-gather client, one Elasticsearch client (and pool) per shard"""
+    settings = get_settings()
+    if not settings.federated_shards:
+        raise ValueError('text_backend is "federated" but no federated_shards are configured')
+    shards = [
+        SearchShard(
+            spec["name"],
+            ElasticsearchClient(hosts=spec["hosts"], settings=settings),
+            index=spec.get("index", "msmarco-docs"),
+            timeout=spec["timeout_ms"] / 1000 if spec.get("timeout_ms") else None
+        )
+        for spec in settings.federated_shards
+    ]
+    return FederatedSearchClient(shards, normalization=settings.federated_normalization)
+
 async def get_elasticsearch_client(
     settings: Settings = Depends(get_settings)
 ) -> AsyncGenerator[ElasticsearchClient, None]:
-    """Get Elasticsearch client instance"""
-    client = ElasticsearchClient(hosts=[settings.elasticsearch_url], settings=settings)
-    try:
-        yield client
-    finally:
-        await client.close()
+    """
+    Get the text search client: Elasticsearch, the embedded BM25 engine
+    (text_backend "embedded") or scatter-gather over shards ("federated")
+    """
+    yield _text_search_client(settings)
+
+def _text_search_client(settings: Settings) -> Any:
+    if settings.text_backend == "embedded":
+        return get_embedded_search_client()
+    if settings.text_backend == "federated":
+        return get_federated_search_client()
+    return get_shared_elasticsearch_client()
 
 def get_pipeline_steps(
     elasticsearch_client: ElasticsearchClient = Depends(get_elasticsearch_client),
+    settings: Settings = Depends(get_settings),
 ) -> List[PipelineStep]:
     """Get configured pipeline steps"""
-    return [
-        QueryParser(),
-        TextSearchStep(elasticsearch_client),
-        # Add more steps here later
+    document_store = get_document_store()
+    vector_index = get_vector_index()
+    steps = [
+        get_query_parser(),
+        get_enricher_step(),
+        # With a local document store only docids need to come back from the engine
+        TextSearchStep(
+            elasticsearch_client,
+            source_fields=["docid"] if document_store is not None else None,
+            document_store=document_store,
+            # Without a vector index, semantic searches are answered by text search
+            semantic_fallback=vector_index is None
+        ),
     ]
+    if vector_index is not None:
+        steps.append(SemanticSearchStep(
+            vector_index,
+            get_query_encoder(),
+            top_k=settings.semantic_top_k,
+            document_client=elasticsearch_client,
+            document_store=document_store
+        ))
+        steps.append(HybridFusionStep(
+            method=settings.fusion_method,
+            size=settings.search_result_limit,
+            rrf_k=settings.rrf_k,
+            text_weight=settings.hybrid_text_weight
+        ))
+    if settings.rerank_enabled:
+        steps.append(get_reranker_step())
+    return steps
 
 async def get_search_pipeline(
     steps: List[PipelineStep] = Depends(get_pipeline_steps),
+    settings: Settings = Depends(get_settings),
 ) -> SearchPipeline:
     """Get configured search pipeline"""
-    return SearchPipeline(steps)
\ No newline at end of file
+    return SearchPipeline(
+        steps,
+        timeout=settings.request_timeout_ms / 1000 if settings.request_timeout_ms else None,
+        min_step_budget=settings.optional_step_min_budget_ms / 1000
+    )
+
+def preload_shared_data() -> None:
+    """
+    Load the process-wide read-only structures (key phrases, spelling and
+    synonym tables, Unicode folding tables, vector and BM25 indices,
+    feature and document stores, encoder and reranker models). The pre-fork server calls this before
+    forking so workers share them instead of each loading a copy.
+    Nothing here opens connections or starts threads.
+    """
+    settings = get_settings()
+    get_query_parser()
+    get_enricher_step()
+    get_filterable_fields()
+    # Otherwise each worker builds them on its first non-ASCII query
+    combining_marks()
+    folding_table()
+    get_document_store()
+    get_feature_store()
+    if get_vector_index() is not None:
+        get_query_encoder()
+    if settings.text_backend == "embedded":
+        get_embedded_search_client()
+    if settings.rerank_enabled:
+        get_reranker_step()
+
+async def warm_connection_pools() -> None:
+    """
+    Open each worker's backend connections (text search, Qdrant, result
+    cache) before it takes traffic; failures are logged, not raised
+    """
+    settings = get_settings()
+    clients = {"text search": _text_search_client(settings), "result cache": get_result_cache()}
+    vector_index = get_vector_index()
+    if isinstance(vector_index, QdrantClient):
+        clients["qdrant"] = vector_index
+    results = await asyncio.gather(
+        *(client.warm_up(settings.warmup_connections) for client in clients.values()),
+        return_exceptions=True
+    )
+    for name, result in zip(clients, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Could not warm up {name} connections: {result}")
+
+async def close_shared_clients() -> None:
+    """Close the process-wide clients that were created (sessions, pools, the encoder's batching task)"""
+    closeable = [
+        get_shared_elasticsearch_client,
+        get_federated_search_client,
+        get_result_cache,
+        get_query_encoder,
+    ]
+    for get_client in closeable:
+        if get_client.cache_info().currsize:
+            await get_client().close()
+    if get_vector_index.cache_info().currsize and isinstance(get_vector_index(), QdrantClient):
+        await get_vector_index().close()
@@ -24,3 +24,21 @@ class SearchResponse(BaseModel):
     total: int
     page: int
     page_size: int
+    partial: bool = Field(default=False, description="Some pipeline steps were skipped or cut short by the request deadline")
+    degraded: List[str] = Field(default_factory=list, description="The steps that were skipped or cut short")
+
+class BatchSearchRequest(BaseModel):
+    searches: List[SearchRequest] = Field(..., min_length=1, description="Independent searches, answered in order")
+
+class BatchSearchResult(BaseModel):
+    results: List[SearchResult] = Field(default_factory=list)
+    total: int = 0
+    page: int
+    page_size: int
+    cached: bool = Field(default=False, description="Served from the result cache")
+    partial: bool = Field(default=False, description="Some pipeline steps were skipped or cut short by the request deadline")
+    degraded: List[str] = Field(default_factory=list)
+    error: Optional[str] = Field(default=None, description="Set if this search failed; the others are unaffected")
+
+class BatchSearchResponse(BaseModel):
+    results: List[BatchSearchResult]
@@ -1,10 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from fastapi.templating import Jinja2Templates
-from core.search_api.models import SearchRequest, SearchResponse
+from core.search_api.models import (
+    BatchSearchRequest, BatchSearchResponse, BatchSearchResult, SearchRequest, SearchResponse, SearchResult
+)
+from core.clients.redis_client import RedisClient
+from core.middleware.cache import results_cache_key
+from core.observability.metrics import CACHE_LOOKUPS
+from core.pipeline.admission import CHEAP, EXPENSIVE, AdaptiveLimiter
+from core.pipeline.context import SearchContext
 from core.pipeline.executor import SearchPipeline
-from core.search_api.dependencies import get_search_pipeline
+from core.search_api.dependencies import (
+    get_admission_limiter, get_filterable_fields, get_result_cache, get_search_pipeline, get_settings
+)
+from core.search_api.settings import Settings
+from core.processing.filters import filters_from_params, normalize_filters
+from contextlib import nullcontext
 from math import ceil
+from typing import Any, AsyncIterator, Dict, List, Optional
+import json
 import time
 import logging
 
@@ -17,43 +32,257 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
 
+def _priority(search_type: str, settings: Settings) -> int:
+    """Admission lane: plain text search is cheap; dense retrieval or reranking makes a request expensive"""
+    reranked = settings.rerank_enabled and settings.rerank_depths.get(search_type, 0) > 0
+    return CHEAP if search_type == "text" and not reranked else EXPENSIVE
+
+def _admission(limiter: Optional[AdaptiveLimiter], priority: int, weight: int = 1):
+    """Slots for one pipeline execution of `weight` searches (raises Overloaded -> 503); a no-op without admission control"""
+    return limiter.admit(priority, weight) if limiter is not None else nullcontext()
+
+def _normalized_filters(filters: Optional[dict]) -> Optional[dict]:
+    """Validate request filters against the mapping; 422 for fields that can't be filtered"""
+    try:
+        return normalize_filters(filters, get_filterable_fields())
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
 @router.post("/api/search", response_model=SearchResponse)
 async def search_api(
     search_request: SearchRequest,
-    search_pipeline: SearchPipeline = Depends(get_search_pipeline)
+    response: Response,
+    search_pipeline: SearchPipeline = Depends(get_search_pipeline),
+    cache: RedisClient = Depends(get_result_cache),
+    limiter: Optional[AdaptiveLimiter] = Depends(get_admission_limiter),
+    settings: Settings = Depends(get_settings)
 ) -> SearchResponse:
     """
-    API endpoint for programmatic search requests.
+    API endpoint for programmatic search requests. The full result list is
+    cached under the same key as the batch route's, so every page (and a
+    batched copy of the search) is served from one entry.
     """
-    context = await search_pipeline.execute(search_request.query)
+    filters = _normalized_filters(search_request.filters)
+    key = results_cache_key(search_request.query, search_request.search_type, filters)
+    results = await cache.get(key)
+    CACHE_LOOKUPS.labels(result="hit" if results is not None else "miss").inc()
+    response.headers["X-Cache"] = "HIT" if results is not None else "MISS"
+    partial, degraded = False, []
+    if results is None:
+        async with _admission(limiter, _priority(search_request.search_type, settings)):
+            context = await search_pipeline.execute(search_request.query, search_request.search_type, filters)
+        results, partial, degraded = context.final_results or [], context.partial, context.degraded
+        # Results cut short by the request deadline aren't worth keeping
+        if not partial:
+            await cache.set(key, results, ttl=settings.cache_ttl)
     
     # Paginate results
     start_idx = (search_request.page - 1) * search_request.page_size
     end_idx = start_idx + search_request.page_size
     
     data = {
-        "results": context.final_results[start_idx:end_idx],
-        "total": len(context.final_results),
+        "results": results[start_idx:end_idx],
+        "total": len(results),
         "page": search_request.page,
-        "page_size": search_request.page_size
+        "page_size": search_request.page_size,
+        "partial": partial,
+        "degraded": degraded
     }
     return SearchResponse(**data)
 
+def _result_fields(result: Dict[str, Any]) -> Dict[str, Any]:
+    """The fields of a pipeline hit that SearchResult exposes"""
+    return {field: result.get(field) for field in SearchResult.model_fields}
+
+def _ndjson(event: Dict[str, Any]) -> bytes:
+    return json.dumps(event, separators=(",", ":")).encode("utf-8") + b"\n"
+
+@router.post("/api/search/stream")
+async def search_stream_api(
+    search_request: SearchRequest,
+    search_pipeline: SearchPipeline = Depends(get_search_pipeline),
+    limiter: Optional[AdaptiveLimiter] = Depends(get_admission_limiter),
+    settings: Settings = Depends(get_settings)
+) -> StreamingResponse:
+    """
+    Streaming variant of /api/search, as NDJSON (one JSON event per line).
+    The requested page is sent as soon as the first stage produces results,
+    and again as a revision whenever a later stage (fusion, reranking)
+    changes them:
+    
+        {"event": "results", "stage": "TextSearchStep", "total": 100}
+        {"event": "hit", "rank": 0, "result": {...}}             one per hit on the page
+        {"event": "revision", "stage": "RerankerStep", "total": 100, "results": [...]}
+        {"event": "done", "took_ms": 42.0, "partial": false, "degraded": []}
+    
+    Revisions list the page in its new order; hits that were already sent
+    appear as just {"id", "score"}. A failure ends the stream with
+    {"event": "error", "detail": ...}.
+    """
+    filters = _normalized_filters(search_request.filters)
+    # Admitted before the response starts, so an overloaded service can still answer 503
+    permit = await limiter.acquire(_priority(search_request.search_type, settings)) if limiter is not None else None
+    start_idx = (search_request.page - 1) * search_request.page_size
+    end_idx = start_idx + search_request.page_size
+
+    async def events() -> AsyncIterator[bytes]:
+        started = time.perf_counter()
+        sent = set()
+        first = True
+        last_results = None
+        context = None
+        ok = False
+        try:
+            async for step, context in search_pipeline.stream(search_request.query, search_request.search_type, filters):
+                if context.final_results is None or context.final_results is last_results:
+                    continue
+                last_results = context.final_results
+                page = last_results[start_idx:end_idx]
+                stage = type(step).__name__
+                if first:
+                    first = False
+                    yield _ndjson({"event": "results", "stage": stage, "total": len(last_results)})
+                    for rank, result in enumerate(page, start=start_idx):
+                        yield _ndjson({"event": "hit", "rank": rank, "result": _result_fields(result)})
+                else:
+                    yield _ndjson({
+                        "event": "revision",
+                        "stage": stage,
+                        "total": len(last_results),
+                        "results": [
+                            {"id": result["id"], "score": result["score"]} if result["id"] in sent
+                            else _result_fields(result)
+                            for result in page
+                        ]
+                    })
+                sent.update(result["id"] for result in page)
+            if last_results is None:
+                yield _ndjson({"event": "results", "stage": None, "total": 0})
+            ok = True
+            yield _ndjson({
+                "event": "done",
+                "took_ms": round((time.perf_counter() - started) * 1000, 2),
+                "partial": context is not None and context.partial,
+                "degraded": context.degraded if context is not None else []
+            })
+        except Exception as e:
+            logger.error(f"Streaming search failed for '{search_request.query}': {e}")
+            yield _ndjson({"event": "error", "detail": str(e)})
+        finally:
+            if permit is not None:
+                permit.release(ok)
+
+    # The background release covers a stream that never started (release is idempotent)
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(permit.release, False) if permit is not None else None
+    )
+
+@router.post("/api/search/batch", response_model=BatchSearchResponse)
+async def search_batch_api(
+    batch_request: BatchSearchRequest,
+    search_pipeline: SearchPipeline = Depends(get_search_pipeline),
+    cache: RedisClient = Depends(get_result_cache),
+    limiter: Optional[AdaptiveLimiter] = Depends(get_admission_limiter),
+    settings: Settings = Depends(get_settings)
+) -> BatchSearchResponse:
+    """
+    Run many independent searches in one request. Cached results are
+    resolved with a single MGET; the misses (each distinct search once) go
+    through the pipeline as one batch, so their text searches share one
+    `_msearch`. A failing search is reported in its slot; when the service
+    is overloaded, cached searches are still answered and the rest are
+    reported as failed.
+    """
+    searches = batch_request.searches
+    if len(searches) > settings.max_batch_searches:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(searches)} searches exceeds the limit of {settings.max_batch_searches}"
+        )
+
+    keys: List[Optional[str]] = []
+    errors: Dict[int, str] = {}
+    filters_by_key: Dict[str, Optional[dict]] = {}
+    for i, search in enumerate(searches):
+        try:
+            filters = normalize_filters(search.filters, get_filterable_fields())
+        except ValueError as e:
+            errors[i] = str(e)
+            keys.append(None)
+            continue
+        key = results_cache_key(search.query, search.search_type, filters)
+        filters_by_key[key] = filters
+        keys.append(key)
+
+    unique_keys = list(filters_by_key)
+    results: Dict[str, List[Dict[str, Any]]] = {
+        key: value for key, value in zip(unique_keys, await cache.mget(unique_keys)) if value is not None
+    }
+    cached = set(results)
+
+    contexts: Dict[str, SearchContext] = {}
+    for i, key in enumerate(keys):
+        if key is not None and key not in cached and key not in contexts:
+            contexts[key] = SearchContext(
+                original_query=searches[i].query,
+                search_type=searches[i].search_type,
+                filters=filters_by_key[key]
+            )
+    if contexts:
+        try:
+            # Charged one slot per search it runs, not as one request
+            async with _admission(limiter, EXPENSIVE, len(contexts)):
+                await search_pipeline.process_many(list(contexts.values()))
+        except Exception as e:
+            logger.error(f"Batch search failed: {e}")
+            for context in contexts.values():
+                context.error = str(e)
+        fresh = {key: context.final_results or [] for key, context in contexts.items() if not context.error}
+        results.update(fresh)
+        await cache.set_many(
+            {key: value for key, value in fresh.items() if not contexts[key].partial},
+            ttl=settings.cache_ttl
+        )
+
+    items = []
+    for i, (search, key) in enumerate(zip(searches, keys)):
+        item = {"page": search.page, "page_size": search.page_size}
+        if key is None or key in contexts and contexts[key].error:
+            items.append(BatchSearchResult(**item, error=errors.get(i) or contexts[key].error))
+            continue
+        CACHE_LOOKUPS.labels(result="hit" if key in cached else "miss").inc()
+        start_idx = (search.page - 1) * search.page_size
+        items.append(BatchSearchResult(
+            **item,
+            results=results[key][start_idx:start_idx + search.page_size],
+            total=len(results[key]),
+            cached=key in cached,
+            partial=key in contexts and contexts[key].partial,
+            degraded=contexts[key].degraded if key in contexts else []
+        ))
+    return BatchSearchResponse(results=items)
+
 @router.get("/search")
 async def search_web(
     request: Request,
     q: str,
     doc_id: str = None,
     page: int = 1,
-    search_pipeline: SearchPipeline = Depends(get_search_pipeline)
+    search_pipeline: SearchPipeline = Depends(get_search_pipeline),
+    limiter: Optional[AdaptiveLimiter] = Depends(get_admission_limiter),
+    settings: Settings = Depends(get_settings)
 ):
-    """Web interface search endpoint that renders HTML"""
+    """Web interface search endpoint that renders HTML (filters as `filter.<field>` parameters)"""
     start_time = time.time()
+    filters = _normalized_filters(filters_from_params(request.query_params.multi_items()))
     
     data = request.state.cached_data
     if data is None:
-        logger.info(f"Cache miss for search request: {q}")
-        context = await search_pipeline.execute(q)
+        logger.debug(f"Cache miss for search request: {q}")
+        async with _admission(limiter, _priority("hybrid", settings)):
+            context = await search_pipeline.execute(q, filters=filters)
         
         # Store full results in context
         full_results = context.final_results
@@ -68,17 +297,18 @@ async def search_web(
             "results": full_results[start_idx:end_idx],  # Store paginated results
             "total": len(full_results),
             "page": page,
-            "page_size": page_size
+            "page_size": page_size,
+            "partial": context.partial
         }
         request.state.cached_data = data
     else:
-        logger.info(f"Cache hit for search request: {q}")
+        logger.debug(f"Cache hit for search request: {q}")
 
     if doc_id:
         # Search in full results instead of paginated results
         doc = next((d for d in data["full_results"] if d["id"] == doc_id), None)
         if doc:
-            logger.info(f"Found document with ID: {doc_id}")
+            logger.debug(f"Found document with ID: {doc_id}")
             return templates.TemplateResponse(
                 "search.html",
                 {
@@ -89,6 +319,7 @@ async def search_web(
                     "page": page,
                     "total_pages": ceil(data["total"] / 10),
                     "query_time_ms": (time.time() - start_time) * 1000,
+                    "partial": data.get("partial", False),
                     "selected_doc": doc
                 }
             )
@@ -105,7 +336,8 @@ async def search_web(
             "total": data["total"],
             "page": page,
             "total_pages": ceil(data["total"] / 10),
-            "query_time_ms": (time.time() - start_time) * 1000
+            "query_time_ms": (time.time() - start_time) * 1000,
+            "partial": data.get("partial", False)
         }
     )
 
@@ -0,0 +1,182 @@
+"""
+Production server: pre-forked uvicorn workers sharing read-only data.
+
+    python -m core.search_api.serve --workers 8 --port 2345
+
+The parent process imports the app, loads the read-only structures once
+(`preload_shared_data`: key phrases, spelling and synonym tables, indices,
+stores, models), freezes the garbage collector so collections don't write
+to those objects' pages, binds the listening socket and forks the workers.
+Workers share that memory copy-on-write, and the memory-mapped indices
+through the page cache, so each extra worker costs little more than its
+own request-time state. (uvicorn's `--workers` spawns fresh interpreters,
+which would each load their own copy.) Each worker then opens its own
+connection pools and warms them at startup, since sockets can't be shared
+across a fork.
+
+A worker that dies is replaced; SIGTERM or SIGINT stops all of them
+gracefully. With several workers, metrics are aggregated through
+PROMETHEUS_MULTIPROC_DIR (a fresh temporary directory unless one is set).
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# A worker dying sooner than this after its start is considered crash-looping
+MIN_WORKER_UPTIME = 5.0
+
+
+def _prepare_metrics_dir(workers: int) -> None:
+    """
+    Point prometheus_client at a shared directory for multi-worker runs.
+    Must run before anything imports prometheus_client.
+    """
+    if workers <= 1:
+        return
+    metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if metrics_dir is None:
+        metrics_dir = tempfile.mkdtemp(prefix="search-metrics-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+    # Samples of a previous run's workers would be aggregated too
+    for stale in Path(metrics_dir).glob("*.db"):
+        stale.unlink()
+
+
+def _bind(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket, log_level: str) -> None:
+    """Serve on the inherited socket until told to stop (runs in the forked child)"""
+    import uvicorn
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, signal.SIG_DFL)
+    config = uvicorn.Config(app, log_level=log_level, access_log=False, lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(host: str = "0.0.0.0", port: int = 2345, workers: int = 1, backlog: int = 2048, log_level: str = "info") -> None:
+    """
+    Preload shared data, then run `workers` forked uvicorn workers on one socket
+
+    Args:
+        host: Interface to listen on
+        port: Port to listen on
+        workers: Worker processes (one per core to use all of them)
+        backlog: Listen backlog of the shared socket
+        log_level: uvicorn log level
+    """
+    _prepare_metrics_dir(workers)
+
+    from main import app
+    from core.search_api.dependencies import preload_shared_data
+
+    start = time.perf_counter()
+    preload_shared_data()
+    # Move everything loaded so far out of the collector's reach, so its
+    # bookkeeping doesn't dirty (and copy) the shared pages in the workers
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Preloaded shared data in {time.perf_counter() - start:.2f}s")
+
+    sock = _bind(host, port, backlog)
+    logger.info(f"Listening on {host}:{port} with {workers} worker(s)")
+    if workers <= 1:
+        _run_worker(app, sock, log_level)
+        return
+
+    children: Dict[int, float] = {}
+    stopping = False
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(app, sock, log_level)
+            except BaseException:
+                logger.exception("Worker failed")
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = time.monotonic()
+        logger.info(f"Started worker {pid}")
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+
+    from prometheus_client import multiprocess
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = children.pop(pid, None)
+        if started is None:
+            continue
+        multiprocess.mark_process_dead(pid)
+        if stopping:
+            continue
+        logger.warning(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+        if time.monotonic() - started < MIN_WORKER_UPTIME:
+            time.sleep(1.0)
+        spawn()
+    sock.close()
+    logger.info("All workers stopped")
+
+
+def main() -> None:
+    from core.search_api.settings import Settings
+
+    settings = Settings()
+    parser = argparse.ArgumentParser(description="Serve the search API with pre-forked workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 2345)))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.web_concurrency or os.cpu_count() or 1,
+        help="Worker processes (default: WEB_CONCURRENCY, else one per CPU)"
+    )
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.backlog, args.log_level)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,29 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     # Search settings
     page_size: int = 10
     search_result_limit: int = 100
+    max_batch_searches: int = 500  # Per POST /api/search/batch request
+    request_timeout_ms: Optional[float] = 2000.0  # End-to-end pipeline budget; past it partial results are returned
+    optional_step_min_budget_ms: float = 50.0  # Enrich/semantic/rerank are skipped with less budget left
+    
+    # Admission control (adaptive concurrency limit in front of the pipeline)
+    admission_enabled: bool = True
+    admission_initial_limit: int = 32
+    admission_min_limit: int = 4
+    admission_max_limit: int = 256
+    admission_target_latency_ms: float = 500.0  # Slower executions shrink the limit
+    admission_max_queue: int = 64  # Waiting requests beyond this get 503
+    admission_max_queue_wait_ms: float = 250.0
+    admission_retry_after_s: int = 1
+    admission_batch_share: float = 0.25  # Most of the limit one batch of searches may hold
+    
+    # Serving settings (python -m core.search_api.serve)
+    web_concurrency: int = 0  # Pre-fork workers; 0 = one per CPU
+    warmup_enabled: bool = True  # Open backend connections in each worker before it takes traffic
+    warmup_connections: int = 4  # Per backend node
     
     # Cache settings
     max_cache_queries: int = 5
@@ -14,17 +33,79 @@ class Settings(BaseSettings):
     elasticsearch_url: str = "http://elasticsearch:9200"  # For local development
     elasticsearch_timeout: int = 30
     elasticsearch_retry_count: int = 3
+    elasticsearch_hosts: List[str] = []  # Nodes to spread and hedge reads over; elasticsearch_url alone if empty
+    es_hedge_enabled: bool = True
+    es_hedge_quantile: float = 0.95  # Reads outstanding past this latency quantile are hedged
+    es_hedge_min_delay_ms: float = 5.0
+    es_hedge_budget: float = 0.05  # Hedges allowed per read (on average)
+    es_breaker_failures: int = 5  # Consecutive node failures that open its circuit
+    es_breaker_reset_s: float = 10.0  # How long an open circuit fails fast before a probe
+    
+    # Semantic search settings
+    vector_index_path: str = "data/index/ivf"
+    vector_nprobe: int = 8  # Clusters scanned per query: higher = better recall, slower
+    semantic_top_k: int = 100
+    encoder_backend: str = "hashing"  # "hashing" or "sentence_transformers"
+    encoder_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_dim: int = 384  # Used by the hashing encoder
+    query_encoder_batch_size: int = 32
+    query_encoder_max_wait_ms: float = 2.0  # How long a query waits for others to share its batch
+    query_embedding_cache_size: int = 10000
+    fusion_method: str = "rrf"  # "rrf" or "weighted"
+    rrf_k: int = 60
+    hybrid_text_weight: float = 0.5  # Semantic weight is 1 - this
+    vector_backend: str = "local"  # "local" (IVF index) or "qdrant"
+    qdrant_url: str = "http://qdrant:6333"
+    qdrant_collection: str = "msmarco-docs"
+    qdrant_api_key: Optional[str] = None
+    qdrant_pool_size: int = 32
+    qdrant_hnsw_ef: Optional[int] = None
+    
+    # Text retrieval settings
+    text_backend: str = "elasticsearch"  # "elasticsearch", "embedded" (local BM25 index, no ES needed) or "federated"
+    # Backends of the federated text search, e.g.
+    # [{"name": "en-2024", "hosts": ["http://es-a:9200"], "index": "msmarco-docs-2024", "timeout_ms": 300}]
+    federated_shards: List[Dict[str, Any]] = []
+    federated_normalization: str = "max"  # Per-shard score normalization before merging: "max", "minmax" or "none"
+    bm25_index_path: str = "data/index/bm25"  # Built by data_processing/build_bm25_index.py
+    document_store_path: str = "data/documents"  # Built by data_processing/build_document_store.py; hits are hydrated from it when present
+    
+    # Query enrichment settings
+    spelling_enabled: bool = True
+    spelling_index_path: str = "data/processed/spelling"  # Built by data_processing/build_spelling_index.py
+    synonyms_path: str = "data/processed/synonyms"  # Built by data_processing/build_synonyms.py
+    max_expansions_per_term: int = 2
+    max_query_expansions: int = 8
+    expansion_boost: float = 0.3
+    enrichment_cache_size: int = 10000
+    
+    # Reranking settings
+    rerank_enabled: bool = False
+    reranker_backend: str = "lexical"  # "lexical" or "cross_encoder"
+    reranker_model: Optional[str] = None
+    rerank_depths: Dict[str, int] = {"text": 50, "semantic": 50, "hybrid": 100}  # 0 disables for that search_type
+    rerank_timeout_ms: float = 100.0  # Past this the first-stage order is returned
+    rerank_workers: int = 2
+    rerank_max_inflight: int = 4  # Requests beyond this skip reranking
+    rerank_batch_size: int = 32
+    feature_store_path: str = "data/features"  # Built by data_processing/build_feature_store.py
     
     # Redis settings
     redis_url: str = "redis://redis:6379"
     
+    # Observability settings
+    event_loop_lag_interval: float = 0.5
+    admin_token: Optional[str] = None  # Admin endpoints are disabled unless set
+    profile_max_seconds: int = 300
+    
     # Elasticsearch detailed settings
     es_username: Optional[str] = None
     es_password: Optional[str] = None
     es_verify_certs: bool = False
     batch_size: int = 1000
     max_retries: int = 3
-    retry_interval: int = 5
+    retry_interval: int = 5  # Cap on the backoff between indexing retries
+    retry_backoff_base: float = 0.1
     max_concurrent_batches: int = 5
     es_mappings: Dict[str, Any] = {
         "settings": {
@@ -64,7 +145,9 @@ class Settings(BaseSettings):
         },
         "mappings": {
             "properties": {
+                # Fields with exact-value types (keyword, numeric, date, ...) can be used in request filters
                 "docid": {"type": "keyword"},
+                "url": {"type": "keyword"},
                 "title": {
                     "type": "text",
                     "analyzer": "custom_baseline_analyzer",  # Use the custom analyzer
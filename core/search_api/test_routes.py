@@ -0,0 +1,166 @@
+"""
+JSON search routes over the in-process fakes: result-cache keys shared by
+/api/search and /api/search/batch, and the batch route's per-item errors.
+"""
+from typing import Any, Dict, List, Optional
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core.clients.elasticsearch.client import ElasticsearchClient
+from core.clients.fakes import FakeAsyncElasticsearch, FakeRedis, SimulatedLatency
+from core.clients.redis_client import RedisClient
+from core.middleware.cache import SearchCacheMiddleware
+from core.pipeline.base import PipelineStep
+from core.pipeline.context import SearchContext
+from core.pipeline.executor import SearchPipeline
+from core.pipeline.steps.parser import QueryParser
+from core.pipeline.steps.text_search import TextSearchStep
+from core.search_api.dependencies import get_admission_limiter, get_result_cache, get_search_pipeline, get_settings
+from core.search_api.routes import router
+from core.search_api.settings import Settings
+
+
+class CountingElasticsearch(FakeAsyncElasticsearch):
+    """Fake cluster that records each `_msearch` and fails searches containing "fail" """
+
+    def __init__(self):
+        super().__init__(num_docs=10_000, latency=SimulatedLatency(0, 0))
+        self.msearches: List[int] = []
+
+    async def search(self, **kwargs) -> Dict[str, Any]:
+        self.msearches.append(1)
+        return await super().search(**kwargs)
+
+    async def msearch(self, searches: List[Dict[str, Any]], index: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        self.msearches.append(len(searches) // 2)
+        response = await super().msearch(searches, index, **kwargs)
+        for i, body in enumerate(searches[1::2]):
+            if "fail" in str(body["query"]):
+                response["responses"][i] = {"error": {"type": "search_phase_execution_exception"}, "status": 400}
+        return response
+
+
+class DegradeStep(PipelineStep):
+    """Marks every search as cut short, like a step that ran out of time"""
+
+    async def process(self, context: SearchContext) -> SearchContext:
+        context.degrade("DegradeStep: timed out")
+        return context
+
+
+def _client(steps_after_search: List[PipelineStep] = (), max_batch_searches: int = 500):
+    fake = CountingElasticsearch()
+    settings = Settings(max_batch_searches=max_batch_searches, rerank_enabled=False)
+    es_client = ElasticsearchClient(hosts=[], settings=settings, client=fake, node_clients={"fake": fake})
+    pipeline = SearchPipeline([QueryParser(), TextSearchStep(es_client), *steps_after_search])
+    cache = RedisClient(redis=FakeRedis())
+
+    app = FastAPI()
+    app.include_router(router)
+    # In the stack, as in main.py: it must leave the JSON routes' caching to them
+    app.add_middleware(SearchCacheMiddleware, cache=cache)
+    app.dependency_overrides[get_search_pipeline] = lambda: pipeline
+    app.dependency_overrides[get_result_cache] = lambda: cache
+    app.dependency_overrides[get_admission_limiter] = lambda: None
+    app.dependency_overrides[get_settings] = lambda: settings
+    return TestClient(app), fake
+
+
+@pytest.fixture
+def client():
+    return _client()
+
+
+def _search(test_client: TestClient, **request):
+    response = test_client.post("/api/search", json={"search_type": "text", **request})
+    assert response.status_code == 200
+    return response.headers["X-Cache"], [hit["id"] for hit in response.json()["results"]], response.json()
+
+
+def test_distinct_queries_get_distinct_cache_entries(client):
+    test_client, fake = client
+    cache_state, solar, _ = _search(test_client, query="solar panel")
+    assert cache_state == "MISS"
+    cache_state, wind, _ = _search(test_client, query="wind turbine")
+    assert cache_state == "MISS"
+    assert solar != wind
+    assert len(fake.msearches) == 2
+
+
+def test_pages_and_query_variants_share_an_entry(client):
+    test_client, fake = client
+    _, first_page, body = _search(test_client, query="solar panel", page_size=5)
+    cache_state, second_page, _ = _search(test_client, query="Solar  PANEL", page=2, page_size=5)
+    assert cache_state == "HIT"
+    assert len(fake.msearches) == 1
+    assert not set(first_page) & set(second_page)
+    assert body["total"] == 100
+
+
+def test_filters_are_part_of_the_key(client):
+    test_client, fake = client
+    _search(test_client, query="solar panel")
+    cache_state, _, _ = _search(test_client, query="solar panel", filters={"docid": ["D1", "D2"]})
+    assert cache_state == "MISS"
+    assert len(fake.msearches) == 2
+
+
+def test_search_and_batch_share_entries(client):
+    test_client, fake = client
+    _, ids, _ = _search(test_client, query="solar panel")
+    response = test_client.post("/api/search/batch", json={"searches": [{"query": "solar panel", "search_type": "text"}]})
+    item = response.json()["results"][0]
+    assert item["cached"] and [hit["id"] for hit in item["results"]] == ids
+
+    test_client.post("/api/search/batch", json={"searches": [{"query": "wind turbine", "search_type": "text"}]})
+    cache_state, _, _ = _search(test_client, query="wind turbine")
+    assert cache_state == "HIT"
+    assert len(fake.msearches) == 2
+
+
+def test_partial_results_are_not_cached():
+    test_client, fake = _client([DegradeStep()])
+    cache_state, _, body = _search(test_client, query="solar panel")
+    assert body["partial"] and body["degraded"] == ["DegradeStep: timed out"]
+    cache_state, _, _ = _search(test_client, query="solar panel")
+    assert cache_state == "MISS"
+
+    searches = {"searches": [{"query": "wind turbine", "search_type": "text"}]}
+    test_client.post("/api/search/batch", json=searches)
+    item = test_client.post("/api/search/batch", json=searches).json()["results"][0]
+    assert item["partial"] and not item["cached"]
+
+
+def test_batch_reports_errors_per_item(client):
+    test_client, _ = client
+    response = test_client.post("/api/search/batch", json={"searches": [
+        {"query": "solar panel", "search_type": "text"},
+        {"query": "please fail", "search_type": "text"},
+        {"query": "wind turbine", "search_type": "text", "filters": {"title": "wind"}},
+    ]})
+    assert response.status_code == 200
+    ok, failed, invalid = response.json()["results"]
+    assert ok["error"] is None and len(ok["results"]) == 10
+    assert failed["error"] and failed["results"] == []
+    assert "title" in invalid["error"]
+
+
+def test_batch_runs_each_distinct_search_once(client):
+    test_client, fake = client
+    search = {"query": "solar panel", "search_type": "text"}
+    response = test_client.post("/api/search/batch", json={"searches": [
+        search, {**search, "page": 2}, {"query": "wind turbine", "search_type": "text"}
+    ]})
+    first, second, _ = response.json()["results"]
+    assert fake.msearches == [2]
+    assert first["total"] == second["total"] == 100
+    assert not {hit["id"] for hit in first["results"]} & {hit["id"] for hit in second["results"]}
+
+
+def test_batch_size_limit():
+    test_client, fake = _client(max_batch_searches=2)
+    response = test_client.post("/api/search/batch", json={"searches": [{"query": f"q{i}"} for i in range(3)]})
+    assert response.status_code == 413
+    assert fake.msearches == []
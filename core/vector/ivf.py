@@ -0,0 +1,190 @@
+"""
+IVF (inverted file) approximate nearest-neighbour index over NumPy.
+
+Vectors are clustered around `nlist` k-means centroids and stored contiguously
+per cluster, so a query scans only the `nprobe` clusters whose centroids are
+closest to it. Scores are inner products, i.e. cosine similarity for the
+unit vectors our encoders produce.
+
+On-disk layout (one directory):
+    meta.json          dim, nlist, count, dtype
+    centroids.npy      (nlist, dim) float32
+    list_offsets.npy   (nlist + 1,) int64; cluster i is rows [offsets[i], offsets[i+1])
+    vectors.npy        (count, dim) float16/float32, rows grouped by cluster
+    docids.npy         (count,) docid of each row
+
+`vectors.npy` and `docids.npy` are memory-mapped read-only, so every worker
+process on the host shares the same page-cache pages instead of holding its
+own copy. `nprobe` trades recall for latency: nprobe == nlist is an exact scan.
+"""
+import json
+import logging
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class IVFIndex:
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        list_offsets: np.ndarray,
+        vectors: np.ndarray,
+        docids: np.ndarray,
+        nprobe: int = 8
+    ):
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.vectors = vectors
+        self.docids = docids
+        self.nlist = len(centroids)
+        self.dim = centroids.shape[1]
+        self.nprobe = min(nprobe, self.nlist)
+        # k-means can leave clusters empty; never spend a probe on them
+        self._empty_lists = np.diff(list_offsets) == 0
+
+    def __len__(self) -> int:
+        return len(self.docids)
+
+    @classmethod
+    def load(cls, path: str, nprobe: int = 8) -> "IVFIndex":
+        """Open an index directory; vectors and docids are memory-mapped"""
+        index_dir = Path(path)
+        return cls(
+            centroids=np.load(index_dir / "centroids.npy"),
+            list_offsets=np.load(index_dir / "list_offsets.npy"),
+            vectors=np.load(index_dir / "vectors.npy", mmap_mode="r"),
+            docids=np.load(index_dir / "docids.npy", mmap_mode="r"),
+            nprobe=nprobe
+        )
+
+    def _probe(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """Ids of the `nprobe` clusters closest to the query"""
+        centroid_scores = self.centroids @ query
+        centroid_scores[self._empty_lists] = -np.inf
+        if nprobe >= self.nlist:
+            return np.arange(self.nlist)
+        return np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 100,
+        nprobe: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k nearest rows to a single query vector.
+
+        Args:
+            query: (dim,) query vector
+            k: Number of results
+            nprobe: Clusters to scan; defaults to the index's configured value
+
+        Returns:
+            (docids, scores), best first
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        lists = self._probe(query, min(nprobe or self.nprobe, self.nlist))
+
+        scores = []
+        rows = []
+        for list_id in lists:
+            start, end = self.list_offsets[list_id], self.list_offsets[list_id + 1]
+            if start == end:
+                continue
+            scores.append(self.vectors[start:end] @ query)
+            rows.append(np.arange(start, end))
+        if not scores:
+            return np.array([], dtype=self.docids.dtype), np.array([], dtype=np.float32)
+
+        scores = np.concatenate(scores).astype(np.float32, copy=False)
+        rows = np.concatenate(rows)
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            scores, rows = scores[top], rows[top]
+        order = np.argsort(-scores, kind="stable")
+        return self.docids[rows[order]], scores[order]
+
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        k: int = 100,
+        nprobe: Optional[int] = None
+    ) -> Tuple[list, list]:
+        """Search several query vectors; returns per-query lists of (docids, scores)"""
+        results = [self.search(query, k, nprobe) for query in np.atleast_2d(queries)]
+        return [docids for docids, _ in results], [scores for _, scores in results]
+
+
+def build_ivf_index(
+    vectors: np.ndarray,
+    docids: Sequence[str],
+    output_path: str,
+    nlist: Optional[int] = None,
+    dtype: str = "float16",
+    train_size: int = 100_000,
+    chunk_size: int = 100_000,
+    seed: int = 0
+) -> None:
+    """
+    Train centroids and write an IVF index directory.
+
+    Args:
+        vectors: (count, dim) unit vectors; may itself be a memmap
+        docids: Docid of each row, in the same order
+        output_path: Directory to write
+        nlist: Number of clusters (default ~4*sqrt(count))
+        dtype: Storage dtype for vectors ("float16" halves memory and I/O)
+        train_size: Rows sampled to train k-means
+        chunk_size: Rows assigned/copied at a time, bounding memory
+        seed: Random seed for sampling and k-means
+    """
+    from sklearn.cluster import MiniBatchKMeans
+
+    count, dim = vectors.shape
+    nlist = nlist or max(1, int(4 * np.sqrt(count)))
+    nlist = min(nlist, count)
+    rng = np.random.default_rng(seed)
+
+    logger.info(f"Training {nlist} centroids on up to {train_size} of {count} vectors")
+    sample = np.asarray(vectors[np.sort(rng.choice(count, size=min(train_size, count), replace=False))], dtype=np.float32)
+    kmeans = MiniBatchKMeans(n_clusters=nlist, random_state=seed, batch_size=4096, n_init=3)
+    kmeans.fit(sample)
+    centroids = kmeans.cluster_centers_.astype(np.float32)
+    centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-12
+
+    logger.info("Assigning vectors to clusters")
+    assignments = np.empty(count, dtype=np.int32)
+    for start in range(0, count, chunk_size):
+        chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+        assignments[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+
+    order = np.argsort(assignments, kind="stable")
+    list_offsets = np.zeros(nlist + 1, dtype=np.int64)
+    np.cumsum(np.bincount(assignments, minlength=nlist), out=list_offsets[1:])
+
+    out_dir = Path(output_path)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    docids = np.asarray(docids)
+    np.save(out_dir / "centroids.npy", centroids)
+    np.save(out_dir / "list_offsets.npy", list_offsets)
+    np.save(out_dir / "docids.npy", docids[order])
+
+    logger.info("Writing vectors grouped by cluster")
+    out_vectors = np.lib.format.open_memmap(out_dir / "vectors.npy", mode="w+", dtype=dtype, shape=(count, dim))
+    for start in range(0, count, chunk_size):
+        rows = order[start:start + chunk_size]
+        # Gather in ascending row order (sequential reads on a memmap), then scatter back
+        by_row = np.argsort(rows)
+        block = np.empty((len(rows), dim), dtype=dtype)
+        block[by_row] = vectors[rows[by_row]]
+        out_vectors[start:start + len(rows)] = block
+    out_vectors.flush()
+    del out_vectors
+
+    with open(out_dir / "meta.json", "w") as f:
+        json.dump({"dim": dim, "nlist": nlist, "count": count, "dtype": dtype}, f)
+    logger.info(f"Wrote IVF index with {count} vectors to {out_dir}")
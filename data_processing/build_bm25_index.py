@@ -0,0 +1,56 @@
+"""
+Builds the embedded BM25 index used when text_backend is "embedded".
+Run this during deployment/data preparation phase.
+
+Documents are read from the parquet corpus in batches and analyzed like
+`custom_baseline_analyzer`; see core/lexical/bm25.py for the index layout.
+"""
+import argparse
+import logging
+
+import pyarrow.parquet as pq
+
+from core.lexical.bm25 import write_bm25_index
+from core.search_api.settings import Settings
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def iter_batches(input_file: str, batch_size: int = 50_000, max_docs: int = None):
+    """Column batches of docid/title/body, stopping after `max_docs` documents"""
+    parquet_file = pq.ParquetFile(input_file)
+    seen = 0
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=["docid", "title", "body"]):
+        if max_docs:
+            batch = batch.slice(0, max_docs - seen)
+        yield batch.to_pydict()
+        seen += batch.num_rows
+        if max_docs and seen >= max_docs:
+            break
+
+def build_bm25_index(
+    input_file: str = "data/corpus/dataset.parquet",
+    output_dir: str = None,
+    max_docs: int = None,
+    k1: float = 1.2,
+    b: float = 0.75,
+    block_size: int = 128
+):
+    output_dir = output_dir or Settings().bm25_index_path
+    meta = write_bm25_index(iter_batches(input_file, max_docs=max_docs), output_dir, k1=k1, b=b, block_size=block_size)
+    logger.info(f"Saved BM25 index over {meta['num_docs']} documents ({meta['num_terms']} terms) to {output_dir}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the embedded BM25 index")
+    parser.add_argument("--input", default="data/corpus/dataset.parquet")
+    parser.add_argument("--output", default=None, help="Index directory (default: settings.bm25_index_path)")
+    parser.add_argument("--max-docs", type=int, default=None)
+    parser.add_argument("--k1", type=float, default=1.2)
+    parser.add_argument("--b", type=float, default=0.75)
+    parser.add_argument("--block-size", type=int, default=128)
+    args = parser.parse_args()
+
+    build_bm25_index(args.input, args.output, args.max_docs, args.k1, args.b, args.block_size)
@@ -0,0 +1,40 @@
+"""
+Builds the memory-mapped document store used to hydrate search hits locally.
+Run this during deployment/data preparation phase.
+
+Documents are streamed from the parquet corpus in batches; see
+core/documents/store.py for the layout.
+"""
+import argparse
+import logging
+
+import pyarrow.parquet as pq
+
+from core.documents.store import FIELDS, write_document_store
+from core.search_api.settings import Settings
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def build_document_store(
+    input_file: str = "data/corpus/dataset.parquet",
+    output_dir: str = None,
+    batch_size: int = 50_000
+):
+    output_dir = output_dir or Settings().document_store_path
+    parquet_file = pq.ParquetFile(input_file)
+    batches = parquet_file.iter_batches(batch_size=batch_size, columns=["docid", *FIELDS])
+    meta = write_document_store(batches, output_dir)
+    logger.info(f"Saved {meta['count']} documents to {output_dir}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the local document store")
+    parser.add_argument("--input", default="data/corpus/dataset.parquet")
+    parser.add_argument("--output", default=None, help="Store directory (default: settings.document_store_path)")
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    build_document_store(args.input, args.output, args.batch_size)
@@ -0,0 +1,132 @@
+"""
+Builds the per-document feature store used by the reranker.
+Run this during deployment/data preparation phase.
+
+Row groups of the parquet corpus are processed in a process pool. Lengths
+come from Arrow compute kernels; key phrase hits (phrases from
+generate_phrases.py) are counted by matching the document's word n-grams
+against the phrase set. A static quality prior is derived from these once
+all rows are known, and everything is written with `write_feature_store`.
+
+Features (one row per document, in corpus order):
+    doc_length      body length in words
+    title_length    title length in words
+    url_depth       number of path segments in the URL
+    phrase_hits     distinct key phrases occurring in title + body
+    quality_prior   static prior in [0, 1]
+"""
+import argparse
+import json
+import logging
+import re
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, FrozenSet, Optional
+
+import numpy as np
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from core.features.store import write_feature_store
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+_key_phrases: FrozenSet[str] = frozenset()
+_phrase_lengths = ()
+
+def _init_worker(phrases) -> None:
+    global _key_phrases, _phrase_lengths
+    _key_phrases = frozenset(phrases)
+    _phrase_lengths = tuple(sorted({len(phrase.split()) for phrase in phrases}))
+
+def _count_phrase_hits(text: str) -> int:
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    found = set()
+    for n in _phrase_lengths:
+        for i in range(len(tokens) - n + 1):
+            ngram = " ".join(tokens[i:i + n])
+            if ngram in _key_phrases:
+                found.add(ngram)
+    return len(found)
+
+def _word_counts(column) -> np.ndarray:
+    return pc.list_value_length(pc.utf8_split_whitespace(pc.fill_null(column, ""))).to_numpy(zero_copy_only=False)
+
+def _row_group_features(args) -> Dict[str, np.ndarray]:
+    """Worker: raw features of one row group"""
+    corpus_path, rg_idx = args
+    table = pq.ParquetFile(corpus_path).read_row_group(rg_idx, columns=["docid", "url", "title", "body"])
+    urls = pc.fill_null(table.column("url"), "")
+    # Segments after "scheme://host", ignoring a trailing slash
+    paths = pc.replace_substring_regex(urls, r"^[a-z]+://[^/]*/?|/$", "")
+    url_depth = np.where(
+        pc.utf8_length(paths).to_numpy(zero_copy_only=False) > 0,
+        pc.count_substring(paths, "/").to_numpy(zero_copy_only=False) + 1,
+        0
+    )
+    texts = pc.binary_join_element_wise(table.column("title"), table.column("body"), " ", null_handling="replace")
+    return {
+        "docids": np.asarray(table.column("docid").to_pylist()),
+        "doc_length": _word_counts(table.column("body")).astype(np.int32),
+        "title_length": _word_counts(table.column("title")).astype(np.int16),
+        "url_depth": url_depth.astype(np.int8),
+        "phrase_hits": np.array([_count_phrase_hits(text) for text in texts.to_pylist()], dtype=np.int16),
+    }
+
+def quality_prior(features: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Static prior: favours documents with a title, a body of reasonable
+    length, a shallow URL and topical key phrases.
+    """
+    length = np.log1p(features["doc_length"]) / np.log1p(2000)
+    score = (
+        0.4 * np.clip(length, 0, 1)
+        + 0.2 * (features["title_length"] > 0)
+        + 0.2 / (1 + features["url_depth"])
+        + 0.2 * np.clip(features["phrase_hits"] / 5, 0, 1)
+    )
+    return score.astype(np.float32)
+
+def build_feature_store(
+    input_file: str = "data/corpus/dataset.parquet",
+    output_dir: str = "data/features",
+    phrases_file: str = "data/processed/key_phrases.json",
+    processes: Optional[int] = None
+):
+    phrases = []
+    if Path(phrases_file).exists():
+        with open(phrases_file) as f:
+            phrases = json.load(f)
+    else:
+        logger.warning(f"{phrases_file} not found, phrase_hits will be 0")
+
+    num_row_groups = pq.ParquetFile(input_file).num_row_groups
+    tasks = [(input_file, rg_idx) for rg_idx in range(num_row_groups)]
+    parts = []
+    with Pool(processes=processes, initializer=_init_worker, initargs=(phrases,)) as pool:
+        for i, part in enumerate(pool.imap(_row_group_features, tasks), start=1):
+            parts.append(part)
+            logger.info(f"Row group {i}/{num_row_groups} done")
+
+    docids = np.concatenate([part.pop("docids") for part in parts])
+    features = {column: np.concatenate([part[column] for part in parts]) for column in parts[0]}
+    features["quality_prior"] = quality_prior(features)
+
+    write_feature_store(output_dir, docids, features)
+    logger.info(f"Wrote features for {len(docids)} documents to {output_dir}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the per-document feature store")
+    parser.add_argument("--input", default="data/corpus/dataset.parquet")
+    parser.add_argument("--output", default="data/features")
+    parser.add_argument("--phrases", default="data/processed/key_phrases.json")
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    build_feature_store(args.input, args.output, args.phrases, args.processes)
@@ -0,0 +1,67 @@
+"""
+Builds the spelling-correction index used by the query parser.
+Run this during deployment/data preparation phase.
+
+Term frequencies are counted over the parquet corpus (titles and bodies);
+terms seen at least --min-count times make up the vocabulary, which is then
+indexed by its symmetric deletes (see core/processing/spelling.py).
+"""
+import argparse
+import logging
+
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from tqdm import tqdm
+
+from core.processing.spelling import SpellingCorrector, count_terms
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def build_spelling_index(
+    input_file: str = "data/corpus/dataset.parquet",
+    output_dir: str = "data/processed/spelling",
+    min_count: int = 5,
+    max_terms: int = 500_000,
+    max_edit_distance: int = 2,
+    max_docs: int = None
+):
+    parquet_file = pq.ParquetFile(input_file)
+    total = min(parquet_file.metadata.num_rows, max_docs or parquet_file.metadata.num_rows)
+
+    counts = {}
+    seen = 0
+    with tqdm(total=total, desc="Counting terms", unit="doc") as pbar:
+        for batch in parquet_file.iter_batches(batch_size=20_000, columns=["title", "body"]):
+            texts = pc.binary_join_element_wise(batch.column("title"), batch.column("body"), " ", null_handling="replace")
+            for term, count in count_terms(texts.to_pylist()).items():
+                counts[term] = counts.get(term, 0) + count
+            seen += batch.num_rows
+            pbar.update(batch.num_rows)
+            if max_docs and seen >= max_docs:
+                break
+
+    vocabulary = sorted(
+        ((term, count) for term, count in counts.items() if count >= min_count),
+        key=lambda item: -item[1]
+    )[:max_terms]
+    logger.info(f"Indexing {len(vocabulary)} of {len(counts)} terms")
+
+    corrector = SpellingCorrector.build(dict(vocabulary), max_edit_distance=max_edit_distance)
+    corrector.save(output_dir)
+    logger.info(f"Saved {len(corrector.delete_hashes)} deletes to {output_dir}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the spelling-correction index")
+    parser.add_argument("--input", default="data/corpus/dataset.parquet")
+    parser.add_argument("--output", default="data/processed/spelling")
+    parser.add_argument("--min-count", type=int, default=5)
+    parser.add_argument("--max-terms", type=int, default=500_000)
+    parser.add_argument("--max-edit-distance", type=int, default=2)
+    parser.add_argument("--max-docs", type=int, default=None, help="Only count terms in the first N documents")
+    args = parser.parse_args()
+
+    build_spelling_index(args.input, args.output, args.min_count, args.max_terms, args.max_edit_distance, args.max_docs)
@@ -0,0 +1,80 @@
+"""
+Builds the query expansion table used by the enricher step.
+Run this during deployment/data preparation phase.
+
+Related terms are mined from document co-occurrence (PMI) over a sample of
+the corpus (titles plus the start of each body). A hand-curated synonyms
+file can be merged in; its entries take precedence over mined ones:
+
+    term<TAB>synonym one,synonym two,...
+"""
+import argparse
+import logging
+from typing import Dict, List, Tuple
+
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from core.processing.synonyms import SynonymTable, cooccurrence_expansions
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def load_sample(corpus_path: str, max_docs: int = 500_000, body_chars: int = 1000) -> List[str]:
+    """Title plus the first `body_chars` of the body for up to `max_docs` documents"""
+    documents = []
+    parquet_file = pq.ParquetFile(corpus_path)
+    for batch in parquet_file.iter_batches(batch_size=50_000, columns=["title", "body"]):
+        body = pc.utf8_slice_codeunits(pc.fill_null(batch.column("body"), ""), 0, body_chars)
+        texts = pc.binary_join_element_wise(pc.fill_null(batch.column("title"), ""), body, " ")
+        documents.extend(texts.to_pylist())
+        if len(documents) >= max_docs:
+            break
+    return documents[:max_docs]
+
+def load_manual_synonyms(path: str) -> Dict[str, List[Tuple[str, float]]]:
+    manual = {}
+    with open(path, 'r', encoding='utf8') as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            term, _, synonyms = line.rstrip("\n").partition("\t")
+            manual[term.strip().lower()] = [
+                (synonym.strip().lower(), 1.0) for synonym in synonyms.split(",") if synonym.strip()
+            ]
+    return manual
+
+def build_synonyms(
+    input_file: str = "data/corpus/dataset.parquet",
+    output_dir: str = "data/processed/synonyms",
+    manual_file: str = None,
+    max_docs: int = 500_000,
+    top_k: int = 5
+):
+    logger.info("Loading corpus sample...")
+    documents = load_sample(input_file, max_docs)
+
+    logger.info(f"Mining co-occurrence expansions from {len(documents)} documents...")
+    expansions = cooccurrence_expansions(documents, top_k=top_k)
+    if manual_file:
+        manual = load_manual_synonyms(manual_file)
+        logger.info(f"Merging {len(manual)} curated entries")
+        expansions.update(manual)
+
+    table = SynonymTable.from_mapping(expansions)
+    table.save(output_dir)
+    logger.info(f"Saved expansions for {len(expansions)} terms ({len(table.targets)} pairs) to {output_dir}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the query expansion table")
+    parser.add_argument("--input", default="data/corpus/dataset.parquet")
+    parser.add_argument("--output", default="data/processed/synonyms")
+    parser.add_argument("--manual", default=None, help="Curated synonyms TSV to merge in")
+    parser.add_argument("--max-docs", type=int, default=500_000)
+    parser.add_argument("--top-k", type=int, default=5, help="Expansions kept per term")
+    args = parser.parse_args()
+
+    build_synonyms(args.input, args.output, args.manual, args.max_docs, args.top_k)
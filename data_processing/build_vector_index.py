@@ -0,0 +1,118 @@
+"""
+Builds the local IVF vector index used by the semantic search step.
+Run this during deployment/data preparation phase.
+
+Document embeddings come from the sharded output of embed_corpus.py (which
+is run first if the shards are missing or incomplete). Shards are
+dequantized one at a time into a memory-mapped float32 matrix, from which
+the IVF index is trained and written.
+"""
+import argparse
+import json
+import logging
+from pathlib import Path
+
+import numpy as np
+
+from core.search_api.settings import Settings
+from core.vector.ivf import build_ivf_index
+from data_processing.embed_corpus import DTYPES, dequantize, embed_corpus, load_shards
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def gather_embeddings(embeddings_dir: str, output_path: Path):
+    """Concatenate the shards into one float32 (count, dim) memmap"""
+    shards = list(load_shards(embeddings_dir))
+    count = sum(len(docids) for _, docids, _ in shards)
+    dim = shards[0][0].shape[1]
+
+    embeddings = np.lib.format.open_memmap(output_path, mode="w+", dtype=np.float32, shape=(count, dim))
+    docids = []
+    offset = 0
+    for vectors, shard_docids, scales in shards:
+        embeddings[offset:offset + len(shard_docids)] = dequantize(vectors, scales)
+        docids.append(shard_docids)
+        offset += len(shard_docids)
+    embeddings.flush()
+    return embeddings, np.concatenate(docids)
+
+def shard_settings(embeddings_dir: str, embed_dtype: str = None, shard_size: int = None) -> dict:
+    """
+    dtype and shard_size to run embed_corpus with: the given ones, else
+    those of the shards already in embeddings_dir (so resuming a run made
+    with e.g. --dtype int8 doesn't clash with the defaults), else the defaults
+    """
+    manifest_path = Path(embeddings_dir) / "manifest.json"
+    manifest = {}
+    if manifest_path.exists():
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    return {
+        "dtype": embed_dtype or manifest.get("dtype", "float16"),
+        "shard_size": shard_size or manifest.get("shard_size", 100_000),
+    }
+
+def build_vector_index(
+    input_file: str = "data/corpus/dataset.parquet",
+    output_dir: str = None,
+    embeddings_dir: str = "data/embeddings",
+    nlist: int = None,
+    dtype: str = "float16",
+    processes: int = None,
+    embed_dtype: str = None,
+    shard_size: int = None
+):
+    """
+    Args:
+        dtype: Storage dtype of the IVF index vectors
+        embed_dtype: dtype of the embedding shards (default: the existing
+            shards', else float16)
+        shard_size: Rows per embedding shard (default: the existing shards', else 100k)
+    """
+    settings = Settings()
+    output_dir = Path(output_dir or settings.vector_index_path)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Resumable: finished shards are skipped
+    embed_corpus(
+        input_file,
+        embeddings_dir,
+        processes=processes,
+        settings=settings,
+        **shard_settings(embeddings_dir, embed_dtype, shard_size)
+    )
+
+    embeddings_path = output_dir / "embeddings.tmp.npy"
+    embeddings, docids = gather_embeddings(embeddings_dir, embeddings_path)
+
+    build_ivf_index(embeddings, docids, str(output_dir), nlist=nlist, dtype=dtype)
+    del embeddings
+    embeddings_path.unlink()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the local IVF vector index")
+    parser.add_argument("--input", default="data/corpus/dataset.parquet")
+    parser.add_argument("--output", default=None, help="Index directory (default: Settings.vector_index_path)")
+    parser.add_argument("--embeddings", default="data/embeddings", help="Shard directory from embed_corpus.py")
+    parser.add_argument("--nlist", type=int, default=None, help="Number of clusters (default ~4*sqrt(N))")
+    parser.add_argument("--dtype", choices=["float16", "float32"], default="float16", help="IVF index vector dtype")
+    parser.add_argument("--processes", type=int, default=None, help="Embedding worker processes")
+    parser.add_argument(
+        "--embed-dtype", choices=DTYPES, default=None,
+        help="Embedding shard dtype (default: that of existing shards, else float16)"
+    )
+    parser.add_argument(
+        "--shard-size", type=int, default=None,
+        help="Rows per embedding shard (default: that of existing shards, else 100000)"
+    )
+    args = parser.parse_args()
+
+    build_vector_index(
+        args.input, args.output, args.embeddings, args.nlist, args.dtype, args.processes,
+        embed_dtype=args.embed_dtype,
+        shard_size=args.shard_size
+    )
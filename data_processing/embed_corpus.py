@@ -0,0 +1,251 @@
+"""
+Offline embedding of the parquet corpus into quantized, memory-mapped shards.
+
+The corpus is split into fixed-size row ranges ("shards"). Each shard is
+encoded by a worker in a process pool: the worker reads only the row groups
+that overlap its range, slices them zero-copy with Arrow (as in
+`loading_corpus.load_corpus_parallel`), encodes `batch_size` rows at a time
+and writes straight into its own memory-mapped output files. Memory per
+worker is bounded by one row group plus one encode batch, so throughput
+scales with the number of processes and memory does not grow with the corpus.
+
+Output layout (one directory):
+    manifest.json               dim, dtype, shard_size, count, encoder, shards
+    shard-00000.vectors.npy     (rows, dim) float16 or int8
+    shard-00000.scales.npy      (rows,) float32 per-row scale (int8 only)
+    shard-00000.docids.npy      (rows,) docid of each row
+    shard-00000.json            completion marker with the shard's row range
+
+A shard is complete once its marker exists; the marker is written last, so
+re-running the job skips finished shards and redoes any that were cut off.
+
+Usage (from the project root):
+    python -m data_processing.embed_corpus --output data/embeddings --dtype int8
+"""
+import argparse
+import json
+import logging
+import time
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from core.embeddings.encoder import TextEncoder, load_encoder
+from core.search_api.settings import Settings
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DTYPES = ("float16", "int8")
+
+# Encoder loaded once per worker process by the pool initializer
+_worker_encoder: Optional[TextEncoder] = None
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization; returns (codes, scales)"""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+def dequantize(vectors: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """Float32 view of shard vectors (float16 rows, or int8 codes with their scales)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if scales is not None:
+        vectors *= np.asarray(scales)[:, None]
+    return vectors
+
+def _shard_prefix(output_dir: Path, shard_id: int) -> Path:
+    return output_dir / f"shard-{shard_id:05d}"
+
+def _iter_row_range(parquet_file: pq.ParquetFile, start: int, end: int, columns: List[str]) -> Iterator[pa.Table]:
+    """Yield zero-copy slices covering rows [start, end) of the file"""
+    metadata = parquet_file.metadata
+    rg_start = 0
+    for rg_idx in range(metadata.num_row_groups):
+        rg_rows = metadata.row_group(rg_idx).num_rows
+        rg_end = rg_start + rg_rows
+        if rg_end > start and rg_start < end:
+            table = parquet_file.read_row_group(rg_idx, columns=columns)
+            offset = max(start, rg_start) - rg_start
+            yield table.slice(offset, min(end, rg_end) - rg_start - offset)
+        if rg_end >= end:
+            break
+        rg_start = rg_end
+
+def _init_worker(backend: str, model_name: str, dim: int, threads: int) -> None:
+    global _worker_encoder
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _worker_encoder = load_encoder(backend, model_name, dim)
+
+def _embed_shard(args) -> Dict:
+    """Worker: encode one row range and write its shard files"""
+    corpus_path, output_dir, shard_id, start, end, dtype, batch_size = args
+    started = time.perf_counter()
+    encoder = _worker_encoder
+    prefix = _shard_prefix(Path(output_dir), shard_id)
+    rows = end - start
+
+    vectors = np.lib.format.open_memmap(f"{prefix}.vectors.npy", mode="w+", dtype=dtype, shape=(rows, encoder.dim))
+    scales = np.empty(rows, dtype=np.float32) if dtype == "int8" else None
+    docids = []
+
+    parquet_file = pq.ParquetFile(corpus_path)
+    written = 0
+    for table in _iter_row_range(parquet_file, start, end, ["docid", "title", "body"]):
+        for batch_start in range(0, table.num_rows, batch_size):
+            batch = table.slice(batch_start, batch_size)
+            texts = pc.binary_join_element_wise(
+                batch.column("title"), batch.column("body"), " ", null_handling="replace"
+            ).to_pylist()
+            embedded = encoder.encode(texts)
+            if dtype == "int8":
+                embedded, scales[written:written + batch.num_rows] = quantize_int8(embedded)
+            vectors[written:written + batch.num_rows] = embedded
+            docids.extend(batch.column("docid").to_pylist())
+            written += batch.num_rows
+
+    vectors.flush()
+    del vectors
+    np.save(f"{prefix}.docids.npy", np.asarray(docids))
+    if scales is not None:
+        np.save(f"{prefix}.scales.npy", scales)
+
+    shard = {"id": shard_id, "start": start, "end": end, "rows": written}
+    with open(f"{prefix}.json", "w") as f:
+        json.dump(shard, f)
+    return {**shard, "seconds": time.perf_counter() - started}
+
+def embed_corpus(
+    corpus_path: str,
+    output_dir: str,
+    dtype: str = "float16",
+    shard_size: int = 100_000,
+    batch_size: int = 256,
+    processes: Optional[int] = None,
+    threads_per_process: int = 1,
+    settings: Optional[Settings] = None
+) -> Dict:
+    """
+    Encode every document and write quantized shards, skipping shards that are already done.
+
+    Args:
+        corpus_path: Parquet corpus with docid, title and body
+        output_dir: Shard directory
+        dtype: "float16" or "int8" (per-row scaled)
+        shard_size: Rows per shard (the unit of parallelism and resume)
+        batch_size: Rows per encoder call
+        processes: Pool size (default: CPU count)
+        threads_per_process: Torch threads per worker for model encoders
+        settings: Encoder configuration; defaults to Settings()
+
+    Returns:
+        The manifest
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"dtype must be one of {DTYPES}")
+    settings = settings or Settings()
+    out_dir = Path(output_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    count = pq.ParquetFile(corpus_path).metadata.num_rows
+    dim = load_encoder(settings.encoder_backend, settings.encoder_model, settings.embedding_dim).dim
+    manifest = {
+        "dim": dim,
+        "dtype": dtype,
+        "shard_size": shard_size,
+        "count": count,
+        "encoder": {"backend": settings.encoder_backend, "model": settings.encoder_model},
+        "shards": [],
+    }
+
+    manifest_path = out_dir / "manifest.json"
+    if manifest_path.exists():
+        with open(manifest_path) as f:
+            previous = json.load(f)
+        previous.pop("shards", None)
+        manifest_config = {key: value for key, value in manifest.items() if key != "shards"}
+        if previous != manifest_config:
+            raise ValueError(f"{out_dir} holds shards built with different settings: {previous}")
+    else:
+        # Pin the configuration before any shard is written so a resume can't mix settings
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    tasks = []
+    for shard_id, start in enumerate(range(0, count, shard_size)):
+        if _shard_prefix(out_dir, shard_id).with_suffix(".json").exists():
+            continue
+        end = min(start + shard_size, count)
+        tasks.append((corpus_path, str(out_dir), shard_id, start, end, dtype, batch_size))
+
+    num_shards = -(-count // shard_size)
+    logger.info(f"{num_shards - len(tasks)}/{num_shards} shards already done, encoding {len(tasks)}")
+
+    started = time.perf_counter()
+    encoded = 0
+    if tasks:
+        init_args = (settings.encoder_backend, settings.encoder_model, settings.embedding_dim, threads_per_process)
+        with Pool(processes=processes, initializer=_init_worker, initargs=init_args) as pool:
+            for shard in pool.imap_unordered(_embed_shard, tasks):
+                encoded += shard["rows"]
+                elapsed = time.perf_counter() - started
+                logger.info(
+                    f"Shard {shard['id']} done: {shard['rows']} rows in {shard['seconds']:.1f}s "
+                    f"({encoded / elapsed:.0f} docs/s overall)"
+                )
+
+    for shard_id in range(num_shards):
+        with open(_shard_prefix(out_dir, shard_id).with_suffix(".json")) as f:
+            manifest["shards"].append(json.load(f))
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def load_shards(output_dir: str) -> Iterator[Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]]:
+    """Yield (vectors, docids, scales) per shard in corpus order; vectors are memory-mapped"""
+    out_dir = Path(output_dir)
+    with open(out_dir / "manifest.json") as f:
+        manifest = json.load(f)
+    for shard in manifest["shards"]:
+        prefix = _shard_prefix(out_dir, shard["id"])
+        scales_path = Path(f"{prefix}.scales.npy")
+        yield (
+            np.load(f"{prefix}.vectors.npy", mmap_mode="r"),
+            np.load(f"{prefix}.docids.npy"),
+            np.load(scales_path) if scales_path.exists() else None,
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embed the corpus into quantized mmap shards")
+    parser.add_argument("--input", default="data/corpus/dataset.parquet")
+    parser.add_argument("--output", default="data/embeddings")
+    parser.add_argument("--dtype", choices=DTYPES, default="float16")
+    parser.add_argument("--shard-size", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--threads-per-process", type=int, default=1)
+    args = parser.parse_args()
+
+    manifest = embed_corpus(
+        args.input,
+        args.output,
+        dtype=args.dtype,
+        shard_size=args.shard_size,
+        batch_size=args.batch_size,
+        processes=args.processes,
+        threads_per_process=args.threads_per_process
+    )
+    logger.info(f"{manifest['count']} documents in {len(manifest['shards'])} shards at {args.output}")
@@ -0,0 +1,264 @@
+"""
+Offline batch evaluation of the search pipeline on MS MARCO queries.
+
+Queries from prepare_queries.py are sent through `SearchPipeline.execute_many`
+in batches, so each batch becomes a single `_msearch` round trip, with a
+bounded number of batches in flight. Results are streamed to a TREC run file
+and MRR@depth / recall@depth are accumulated against the qrels as batches
+complete. After every batch the run file is flushed and a checkpoint is
+written, so an interrupted run resumes where it stopped with --resume.
+
+Usage (from the project root):
+    python -m data_processing.evaluate_queries --run data/runs/baseline.trec
+    python -m data_processing.evaluate_queries --run data/runs/baseline.trec --resume
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Dict, List, Set, Tuple
+
+from core.clients.elasticsearch.client import ElasticsearchClient
+from core.pipeline.context import SearchContext
+from core.pipeline.executor import SearchPipeline
+from core.pipeline.steps.parser import QueryParser
+from core.pipeline.steps.text_search import TextSearchStep
+from core.search_api.settings import Settings
+from data_processing.prepare_queries import load_queries
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+QUERIES_FILE = os.path.join(PROJECT_ROOT, "data", "processed", "queries.json")
+QRELS_FILE = os.path.join(PROJECT_ROOT, "data", "train", "msmarco-doctrain-qrels.tsv")
+RUN_FILE = os.path.join(PROJECT_ROOT, "data", "runs", "run.trec")
+
+def load_qrels(path: str) -> Dict[str, Set[str]]:
+    """Load relevant docids per query from a TREC qrels file (qid iter docid rel)"""
+    qrels: Dict[str, Set[str]] = {}
+    with open(path, 'r', encoding='utf8') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 4 or int(parts[3]) <= 0:
+                continue
+            qrels.setdefault(parts[0], set()).add(parts[2])
+    return qrels
+
+class RunningMetrics:
+    """Incrementally accumulated MRR@k and recall@k"""
+
+    def __init__(self, depth: int, state: Dict = None):
+        self.depth = depth
+        state = state or {}
+        self.evaluated = state.get("evaluated", 0)
+        self.unjudged = state.get("unjudged", 0)
+        self.failed = state.get("failed", 0)
+        self.rr_sum = state.get("rr_sum", 0.0)
+        self.recall_sum = state.get("recall_sum", 0.0)
+
+    def add(self, ranked_docids: List[str], relevant: Set[str]) -> None:
+        if not relevant:
+            self.unjudged += 1
+            return
+        ranked = ranked_docids[:self.depth]
+        first_hit = next((rank for rank, docid in enumerate(ranked, start=1) if docid in relevant), None)
+        self.rr_sum += 1.0 / first_hit if first_hit else 0.0
+        self.recall_sum += len(relevant.intersection(ranked)) / len(relevant)
+        self.evaluated += 1
+
+    def state(self) -> Dict:
+        return {
+            "evaluated": self.evaluated,
+            "unjudged": self.unjudged,
+            "failed": self.failed,
+            "rr_sum": self.rr_sum,
+            "recall_sum": self.recall_sum,
+        }
+
+    def summary(self) -> Dict:
+        n = self.evaluated
+        return {
+            f"mrr@{self.depth}": round(self.rr_sum / n, 4) if n else None,
+            f"recall@{self.depth}": round(self.recall_sum / n, 4) if n else None,
+            "evaluated": n,
+            "unjudged": self.unjudged,
+            "failed": self.failed,
+        }
+
+def _format_run_lines(qid: str, context: SearchContext, run_name: str) -> str:
+    return "".join(
+        f"{qid} Q0 {doc['id']} {rank} {doc['score']:.6f} {run_name}\n"
+        for rank, doc in enumerate(context.final_results or [], start=1)
+    )
+
+def _read_checkpoint(path: str) -> Dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf8') as f:
+        return json.load(f)
+
+def _write_checkpoint(path: str, checkpoint: Dict) -> None:
+    """Atomically replace the checkpoint file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf8') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+async def evaluate(
+    queries_path: str,
+    qrels_path: str,
+    run_path: str,
+    batch_size: int = 64,
+    concurrency: int = 4,
+    depth: int = 100,
+    run_name: str = "aips",
+    resume: bool = False,
+    limit: int = None,
+    es_client: ElasticsearchClient = None
+) -> Dict:
+    """
+    Evaluate the pipeline on a query set and write a TREC run file.
+
+    Args:
+        queries_path: queries.json (or queries TSV) with qid -> query
+        qrels_path: TREC qrels file; queries without judgments are run but not scored
+        run_path: Output run file; its checkpoint is stored next to it
+        batch_size: Queries per `_msearch` request
+        concurrency: Maximum number of batches in flight
+        depth: Results retrieved and evaluated per query
+        run_name: Run tag written in the last TREC column
+        resume: Continue from the checkpoint instead of starting over
+        limit: Only evaluate the first N queries
+        es_client: Client to use; defaults to one built from Settings
+
+    Returns:
+        Summary with metrics and throughput
+
+    Raises:
+        ValueError: If resuming a checkpoint written with different queries, depth, limit or run name
+    """
+    queries: List[Tuple[str, str]] = list(load_queries(queries_path).items())[:limit]
+    qrels = load_qrels(qrels_path) if qrels_path and os.path.exists(qrels_path) else {}
+    if not qrels:
+        logger.warning("No qrels loaded; writing the run file without metrics")
+
+    checkpoint_path = f"{run_path}.ckpt"
+    checkpoint = _read_checkpoint(checkpoint_path) if resume else {}
+    # Everything that shapes the run file and the metrics; a resume must not mix two runs
+    run_config = {"queries": queries_path, "depth": depth, "limit": limit, "run_name": run_name}
+    if checkpoint:
+        previous = {key: checkpoint.get(key) for key in run_config}
+        if previous != run_config:
+            raise ValueError(f"{checkpoint_path} belongs to a run with different settings: {previous}")
+    completed = checkpoint.get("completed", 0)
+    metrics = RunningMetrics(depth, checkpoint.get("metrics"))
+
+    os.makedirs(os.path.dirname(os.path.abspath(run_path)), exist_ok=True)
+    run_file = open(run_path, 'a+' if completed else 'w', encoding='utf8')
+    if completed:
+        # Drop anything written after the last checkpoint (a partially written batch)
+        run_file.truncate(checkpoint["offset"])
+        run_file.seek(checkpoint["offset"])
+        logger.info(f"Resuming after {completed} of {len(queries)} queries")
+
+    settings = Settings()
+    owns_client = es_client is None
+    es_client = es_client or ElasticsearchClient(hosts=[settings.elasticsearch_url], settings=settings)
+    pipeline = SearchPipeline([
+        QueryParser(),
+        TextSearchStep(es_client, size=depth, source_fields=["docid"]),
+    ])
+
+    pending: deque = deque()
+    processed = 0
+    start_time = time.perf_counter()
+
+    def write_batch(batch: List[Tuple[str, str]], contexts: List[SearchContext]) -> None:
+        nonlocal completed, processed
+        lines = []
+        for (qid, _), context in zip(batch, contexts):
+            if context.error:
+                metrics.failed += 1
+                continue
+            lines.append(_format_run_lines(qid, context, run_name))
+            metrics.add([doc["id"] for doc in context.final_results], qrels.get(qid, set()))
+        run_file.write("".join(lines))
+        run_file.flush()
+        os.fsync(run_file.fileno())
+
+        completed += len(batch)
+        processed += len(batch)
+        _write_checkpoint(checkpoint_path, {
+            "completed": completed,
+            "offset": run_file.tell(),
+            "metrics": metrics.state(),
+            **run_config,
+        })
+
+    async def drain_oldest() -> None:
+        batch, task = pending.popleft()
+        write_batch(batch, await task)
+        elapsed = time.perf_counter() - start_time
+        logger.info(
+            f"{completed}/{len(queries)} queries, {processed / elapsed:.1f} q/s, "
+            f"{json.dumps(metrics.summary())}"
+        )
+
+    try:
+        for offset in range(completed, len(queries), batch_size):
+            batch = queries[offset:offset + batch_size]
+            task = asyncio.create_task(pipeline.execute_many([query for _, query in batch]))
+            pending.append((batch, task))
+            # Results are written strictly in order so the checkpoint is a simple prefix
+            if len(pending) >= concurrency:
+                await drain_oldest()
+        while pending:
+            await drain_oldest()
+    finally:
+        for _, task in pending:
+            task.cancel()
+        run_file.close()
+        if owns_client:
+            await es_client.close()
+
+    elapsed = time.perf_counter() - start_time
+    return {
+        **metrics.summary(),
+        "queries": len(queries),
+        "queries_per_sec": round(processed / elapsed, 2) if elapsed > 0 else None,
+        "run_file": run_path,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch-evaluate the search pipeline on MS MARCO queries")
+    parser.add_argument("--queries", default=QUERIES_FILE, help="queries.json from prepare_queries.py")
+    parser.add_argument("--qrels", default=QRELS_FILE, help="TREC qrels file")
+    parser.add_argument("--run", default=RUN_FILE, help="Output TREC run file")
+    parser.add_argument("--run-name", default="aips")
+    parser.add_argument("--batch-size", type=int, default=64, help="Queries per _msearch request")
+    parser.add_argument("--concurrency", type=int, default=4, help="Batches in flight")
+    parser.add_argument("--depth", type=int, default=100, help="Results per query (MRR/recall cutoff)")
+    parser.add_argument("--limit", type=int, default=None, help="Only run the first N queries")
+    parser.add_argument("--resume", action="store_true", help="Resume from the run's checkpoint")
+    args = parser.parse_args()
+
+    summary = asyncio.run(evaluate(
+        args.queries,
+        args.qrels,
+        args.run,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        depth=args.depth,
+        run_name=args.run_name,
+        resume=args.resume,
+        limit=args.limit
+    ))
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,83 @@
+"""
+Loads the embedding shards written by embed_corpus.py into a Qdrant collection,
+for deployments using `vector_backend="qdrant"` instead of the local IVF index.
+
+Shards are dequantized one at a time and upserted in concurrent batches; the
+point id is the document's row number in the corpus and the docid goes in the
+payload. Upserts are idempotent, so an interrupted load can simply be re-run.
+
+Usage (from the project root):
+    python -m data_processing.load_qdrant --embeddings data/embeddings
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+
+from core.clients.qdrant_client import QdrantClient
+from core.search_api.settings import Settings
+from data_processing.embed_corpus import dequantize, load_shards
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+async def load_qdrant(
+    embeddings_dir: str = "data/embeddings",
+    batch_size: int = 256,
+    concurrency: int = 4,
+    client: QdrantClient = None
+) -> int:
+    """
+    Upsert every shard into the configured collection.
+
+    Args:
+        embeddings_dir: Shard directory from embed_corpus.py
+        batch_size: Points per upsert request
+        concurrency: Upsert requests in flight
+        client: Client to use; defaults to one built from Settings
+
+    Returns:
+        Number of points written
+    """
+    settings = Settings()
+    owns_client = client is None
+    client = client or QdrantClient(
+        base_url=settings.qdrant_url,
+        collection=settings.qdrant_collection,
+        api_key=settings.qdrant_api_key
+    )
+    with open(Path(embeddings_dir) / "manifest.json") as f:
+        manifest = json.load(f)
+
+    written = 0
+    start_time = time.perf_counter()
+    try:
+        await client.create_collection(manifest["dim"])
+        for shard, (vectors, docids, scales) in zip(manifest["shards"], load_shards(embeddings_dir)):
+            ids = np.arange(shard["start"], shard["start"] + len(docids))
+            payloads = [{"docid": str(docid)} for docid in docids]
+            written += await client.upsert(
+                ids, dequantize(vectors, scales), payloads, batch_size=batch_size, concurrency=concurrency
+            )
+            logger.info(f"Shard {shard['id']} loaded, {written} points ({written / (time.perf_counter() - start_time):.0f}/s)")
+    finally:
+        if owns_client:
+            await client.close()
+    return written
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load embedding shards into Qdrant")
+    parser.add_argument("--embeddings", default="data/embeddings", help="Shard directory from embed_corpus.py")
+    parser.add_argument("--batch-size", type=int, default=256, help="Points per upsert request")
+    parser.add_argument("--concurrency", type=int, default=4, help="Upsert requests in flight")
+    args = parser.parse_args()
+
+    total = asyncio.run(load_qdrant(args.embeddings, args.batch_size, args.concurrency))
+    logger.info(f"Loaded {total} points")
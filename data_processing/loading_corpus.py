@@ -9,6 +9,7 @@ from typing import Generator, List
 from dask.diagnostics import ProgressBar
 import logging
 import pyarrow.compute as pc
+from multiprocessing import Pool
 
 logging.basicConfig(
     level=logging.INFO,
@@ -35,6 +36,55 @@ def load_corpus_dask(corpus_path: str) -> Generator[str, None, None]:
     end_time = time.time()
     print(f"Dask Implementation Completed in {end_time - start_time:.2f} seconds")
 
+### === POLARS IMPLEMENTATION === ###
+def load_corpus_polars(corpus_path: str, chunk_size: int = 10_000) -> Generator[str, None, None]:
+    """Load the corpus with the Polars streaming engine and yield combined strings."""
+    df = (
+        pl.scan_parquet(corpus_path)
+        .select((pl.col("title") + pl.lit(" ") + pl.col("body")).alias("combined"))
+        .collect(streaming=True)
+    )
+    for batch in df.iter_slices(n_rows=chunk_size):
+        yield from batch["combined"].to_list()
+
+### === PYARROW IMPLEMENTATIONS === ###
+def _combine_columns(table: pa.Table) -> List[str]:
+    """Join title and body of an Arrow table/batch into one string per row."""
+    combined = pc.binary_join_element_wise(
+        table.column("title"),
+        table.column("body"),
+        " ",
+        null_handling="replace"
+    )
+    return combined.to_pylist()
+
+def load_corpus_arrow(corpus_path: str, chunk_size: int = 10_000) -> Generator[str, None, None]:
+    """Stream the corpus with pyarrow's iter_batches, reading only title and body."""
+    parquet_file = pq.ParquetFile(corpus_path)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=["title", "body"]):
+        yield from _combine_columns(batch)
+
+def _read_row_group(args) -> List[str]:
+    """Worker: read a single row group and return its combined strings."""
+    corpus_path, rg_idx = args
+    table = pq.ParquetFile(corpus_path).read_row_group(rg_idx, columns=["title", "body"])
+    return _combine_columns(table)
+
+def load_corpus_multiprocessing(
+    corpus_path: str,
+    processes: int | None = None
+) -> Generator[str, None, None]:
+    """
+    Read row groups in a process pool with plain pyarrow.
+    Row groups are yielded in file order; each worker opens the file itself
+    so only the resulting strings cross the process boundary.
+    """
+    num_row_groups = pq.ParquetFile(corpus_path).num_row_groups
+    tasks = [(corpus_path, rg_idx) for rg_idx in range(num_row_groups)]
+    with Pool(processes=processes) as pool:
+        for rows in pool.imap(_read_row_group, tasks):
+            yield from rows
+
 ### === RAY IMPLEMENTATION === ###
 @ray.remote
 def process_subtable(arrow_subtable: pa.Table) -> pl.DataFrame:
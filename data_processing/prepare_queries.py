@@ -25,5 +25,14 @@ def extract_queries(input_file, output_file):
     with open(output_file, 'w', encoding='utf8') as outfile:
         json.dump(queries, outfile, indent=4)
 
+def load_queries(path=OUTPUT_FILE):
+    """Load a qid -> query mapping from queries.json or a raw queries TSV"""
+    if path.endswith(".tsv"):
+        with open(path, 'r', encoding='utf8') as infile:
+            return {row[0]: row[1] for row in csv.reader(infile, delimiter='\t') if len(row) >= 2}
+
+    with open(path, 'r', encoding='utf8') as infile:
+        return json.load(infile)
+
 if __name__ == "__main__":
     extract_queries(INPUT_FILE, OUTPUT_FILE)
@@ -1,11 +1,17 @@
 # main.py
+import asyncio
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from contextlib import asynccontextmanager
 from core.search_api.routes import router as search_router
-from core.search_api.settings import Settings
+from core.search_api.dependencies import close_shared_clients, get_settings, warm_connection_pools
 from core.middleware.cache import SearchCacheMiddleware
+from core.middleware.metrics import MetricsMiddleware
+from core.pipeline.admission import Overloaded
+from core.observability.metrics import monitor_event_loop_lag
+from core.observability.routes import router as observability_router
 import logging
 
 logging.basicConfig(
@@ -21,14 +27,19 @@ async def lifespan(app: FastAPI):
     Handles startup and shutdown events
     """
     # Load settings
-    settings = Settings()
+    settings = get_settings()
     
     # Log configuration on startup
     logger.info(f"Starting application with settings: {settings.dict()}")
     
+    if settings.warmup_enabled:
+        await warm_connection_pools()
+    lag_monitor = asyncio.create_task(monitor_event_loop_lag(settings.event_loop_lag_interval))
     try:
         yield
     finally:
+        lag_monitor.cancel()
+        await close_shared_clients()
         logger.info("Shutting down application")
 
 app = FastAPI(lifespan=lifespan)
@@ -37,7 +48,18 @@ templates = Jinja2Templates(directory="templates")
 
 # Include routers
 app.include_router(search_router, prefix="")
+app.include_router(observability_router, prefix="")
 app.add_middleware(SearchCacheMiddleware)
+app.add_middleware(MetricsMiddleware)  # Outermost, so cache lookups are included in request latency
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    """Shed requests fail fast with 503 and a hint when to retry"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
 @app.get("/health")
 async def health_check():
@@ -45,6 +67,7 @@ async def health_check():
     return {"status": "healthy"}
 
 if __name__ == "__main__":
+    # Development server; in production run `python -m core.search_api.serve`
     import uvicorn
     uvicorn.run(
         "main:app",